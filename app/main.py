@@ -1,22 +1,72 @@
+import asyncio
 import json
-import os
-import gitlab
-import openai
-from fastapi import FastAPI
-from pydantic import BaseModel
-from io import StringIO
-from ruamel.yaml import YAML
-
-GITLAB_URL = os.environ.get("GITLAB_URL", "http://192.168.113.26:1081")
-GITLAB_TOKEN = os.environ.get("GITLAB_TOKEN") # Personal Access Token (api scope 필수)
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-
-openai.api_key = OPENAI_API_KEY
-
-# GitLab 클라이언트 초기화
-gl = gitlab.Gitlab(GITLAB_URL, private_token=GITLAB_TOKEN)
-
-app = FastAPI(title="GitLab CI/CD GPT Manager")
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel, ValidationError
+
+from app.services import dependencies
+from app.routers import natural_router
+from app.models.batch_models import BatchRequest
+from app.models.deploy_models import DeploymentRequirements, DeploymentSpec
+from app.services.agent_config import get_agent_config_writer
+from app.services.batch_onboarding import batch_manager
+from app.services.fast_extract import (
+    classify_dockerfile_answer,
+    extract_gitlab_url,
+    extract_k8s_name,
+    extract_requirement_changes,
+)
+from app.services.fingerprint import Fingerprint, get_fingerprint_engine
+from app.services.generation_cache import get_generation_cache, make_key, normalize_text
+from app.services.gitlab_client import GITLAB_URL, GitLabError, get_gateway
+from app.services.llm_client import chat_completion, chat_completion_stream
+from app.services.manifest_validation import REQUIREMENTS_RESPONSE_FORMAT, manifest_stats
+from app.services.onboarding import (
+    DEFAULT_AGENT_PROJECT,
+    DEPLOYMENT_PATHS,
+    ManifestRenderError,
+    dockerfile_cache_key,
+    dockerfile_prompt,
+    fingerprint_project,
+    grant_agent_access,
+    project_languages,
+    project_path,
+    render_ci_file,
+    render_deployment_manifests,
+    stale_manifests,
+    template_dockerfile,
+    with_primary_language,
+)
+from app.services.job_queue import JobWorkers, RetryLater, checkpoint, get_job_queue, job_status
+from app.services.rate_limit import RateLimitTimeout, rate_limit_stats
+from app.services.session_store import SESSION_LOCK_LEASE, SessionLockTimeout, get_session_store
+from app.services.task_graph import TaskGraph, TaskGraphError, leaf_errors
+from app.services.telemetry import TimingMiddleware, configure_logging, logger, timed
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 공유 클라이언트는 최초 사용 시 만들어지므로 시작 시에는 기다리지 않고 백그라운드에서 미리 만들어 둔다
+    warm_up = asyncio.ensure_future(dependencies.warm_up()) if dependencies.WARMUP_ON_STARTUP else None
+    job_workers.start()
+    yield
+    # 종료 시 진행 중인 배치 작업 취소, 실행 중인 백그라운드 작업은 대기 상태로 되돌린 후 공유 커넥션 풀 정리
+    if warm_up is not None:
+        warm_up.cancel()
+    await batch_manager.aclose()
+    await job_workers.aclose()
+    await dependencies.aclose()
+
+
+configure_logging()
+
+app = FastAPI(title="GitLab CI/CD GPT Manager", lifespan=lifespan)
+app.add_middleware(TimingMiddleware)
+app.include_router(natural_router.router)
 
 # -------------------------------
 # Request 모델
@@ -24,65 +74,305 @@ app = FastAPI(title="GitLab CI/CD GPT Manager")
 class ChatRequest(BaseModel):
     user_id: str
     message: str
+    stream: bool = False  # True 면 NDJSON 이벤트 스트림으로 응답 (GPT 토큰/진행 상황 실시간 전달)
+    regenerate: bool = False  # True 면 생성 캐시와 이전 배포 설정을 무시하고 GPT 로 새로 생성
+    background: bool = False  # True 면 작업 큐에 넣고 job_id 를 바로 반환 (결과는 GET /api/ci/jobs/{job_id})
 
 # -------------------------------
 # 세션 상태 관리
 # -------------------------------
-sessions = {}
+session_store = get_session_store()
+
+# 백그라운드 작업 워커 (종류별 handler 는 아래에 정의)
+job_workers = JobWorkers(get_job_queue(), {"chat": lambda payload: run_chat_job(payload)})
 
 # -------------------------------
 # 유틸 함수
 # -------------------------------
-async def query_gpt(prompt: str) -> str:
-    response = openai.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
-    return response.choices[0].message.content
-
-
-def get_gitlab_project(url_or_path: str):
-    """URL에서 프로젝트 경로 추출 및 객체 반환"""
-    # 예: https://gitlab.com/mygroup/myproject.git -> mygroup/myproject
-    clean_path = url_or_path.replace(GITLAB_URL, "").replace(".git", "").strip("/")
-    if clean_path.startswith("http"):  # 다른 도메인 입력 시 방어
-        clean_path = clean_path.split("/")[-2] + "/" + clean_path.split("/")[-1]
+async def query_gpt(prompt: str, events: asyncio.Queue = None, **kwargs) -> str:
+    """GPT 호출. events 가 주어지면 스트리밍으로 받아 토큰 이벤트를 흘려보낸다"""
+    messages = [{"role": "user", "content": prompt}]
+    kwargs.setdefault("temperature", 0.7)
+    if events is None:
+        response = await chat_completion(model="gpt-4o", messages=messages, **kwargs)
+        return response.choices[0].message.content
+
+    chunks = []
+    async for token in chat_completion_stream(model="gpt-4o", messages=messages, **kwargs):
+        chunks.append(token)
+        emit(events, "token", content=token)
+    return "".join(chunks)
+
+
+async def load_generation(key: str, req: ChatRequest, trace: dict, events: asyncio.Queue = None):
+    """생성 캐시 조회. 캐시가 꺼져 있거나 regenerate 요청이면 None"""
+    cache = get_generation_cache()
+    value = None
+    if cache is not None and not req.regenerate:
+        value = await cache.get(key)
+    trace["generation"] = "llm" if value is None else "cache"
+    if value is not None:
+        emit(events, "progress", step="cache_hit")
+    return value
+
+
+async def store_generation(key: str, kind: str, value):
+    cache = get_generation_cache()
+    if cache is not None:
+        await cache.put(key, kind, value)
+
+
+def parse_requirements(raw: str) -> DeploymentRequirements:
+    """GPT 응답(JSON)을 DeploymentRequirements 로 변환. 언급되지 않아 null 인 항목은 기본값 사용"""
+    data = json.loads(raw)
+    return DeploymentRequirements(**{k: v for k, v in data.items() if v is not None})
+
+
+async def extract_requirements(message: str, events: asyncio.Queue = None):
+    """
+    자유 텍스트 요구사항을 structured output 으로 DeploymentRequirements 로 변환.
+    검증에 실패하면 오류 내용만 담은 작은 repair 요청을 한 번 보낸다. (requirements, 오류 메시지) 반환
+    """
+    manifest_stats.generations += 1
+    prompt = f"""
+        사용자 요구사항: "{message}"
+
+        위 요구사항에서 Kubernetes 배포 설정을 추출하세요.
+        1. 외부 노출이 필요하다면 expose 를 true 로, Service 타입(LoadBalancer/NodePort)과 포트를 반영하세요.
+        2. 데이터 영속성이 필요하다면 persistence 를 true 로 하고 저장소 크기를 반영하세요.
+        3. CPU/메모리 요청이 있다면 Kubernetes 단위(예: 500m, 512Mi)로 반영하세요.
+        요구사항에 언급되지 않은 항목은 null 로 두세요.
+        """
+    raw = await query_gpt(prompt, events, temperature=0, response_format=REQUIREMENTS_RESPONSE_FORMAT)
+    emit(events, "progress", step="validate")
+    try:
+        requirements = parse_requirements(raw)
+        manifest_stats.first_pass_valid += 1
+        return requirements, None
+    except (json.JSONDecodeError, ValidationError) as e:
+        error = str(e)
+
+    # 잘못된 값만 고치도록 오류 내용과 이전 응답을 전달
+    manifest_stats.repair_calls += 1
+    emit(events, "progress", step="repair")
+    repair_prompt = f"""
+        다음 배포 설정 JSON 이 검증에 실패했습니다. 오류가 난 값만 고쳐서 다시 반환하세요.
+
+        JSON: {raw}
+        오류: {error}
+        """
+    raw = await query_gpt(repair_prompt, temperature=0, response_format=REQUIREMENTS_RESPONSE_FORMAT)
+    try:
+        requirements = parse_requirements(raw)
+        manifest_stats.repair_success += 1
+        return requirements, None
+    except (json.JSONDecodeError, ValidationError) as e:
+        manifest_stats.failures += 1
+        return None, f"요구사항을 배포 설정으로 변환하지 못했습니다. 요구사항을 다시 명확히 입력해주세요.\n오류: {str(e)}"
+
+
+def emit(events: asyncio.Queue, event_type: str, **data):
+    """스트리밍 모드일 때만 이벤트 전달 (일반 JSON 응답에서는 무시)"""
+    if events is not None:
+        events.put_nowait({"type": event_type, **data})
+
+
+async def extract_or_query(extraction, prompt: str, trace: dict):
+    """규칙 기반 추출 결과가 확실하면 그대로 사용하고, 아니면 GPT 에 질의"""
+    if extraction.confident:
+        trace["extraction"] = "rule"
+        return extraction.value
+    trace["extraction"] = "llm"
+    return await query_gpt(prompt)
+
+
+async def get_gitlab_project(url_or_path: str):
+    """URL에서 프로젝트 경로 추출 및 프로젝트 정보 반환"""
+    clean_path = project_path(url_or_path)
 
     try:
-        project = gl.projects.get(clean_path)
+        project = await get_gateway().get_project(clean_path)
         return project
     except Exception as e:
-        print(f"Error finding project: {e}")
+        logger.warning("gitlab_project_lookup_failed", extra={"project": clean_path, "error": str(e)})
         return None
 
-def commit_file(project, file_path, content, commit_message, branch="main"):
-    """GitLab API를 사용하여 파일 생성 또는 수정"""
-    try:
-        f = project.files.get(file_path=file_path, ref=branch)
-        # 파일이 존재하면 업데이트
-        f.content = content
-        f.save(branch=branch, commit_message=commit_message, encoding='text')
-        return "updated"
-    except gitlab.exceptions.GitlabGetError:
-        # 파일이 없으면 생성
-        project.files.create({
-            'file_path': file_path,
-            'branch': branch,
-            'content': content,
-            'commit_message': commit_message
-        })
-        return "created"
+async def commit_files(project_id, files: dict, commit_message, branch="main", delete=()):
+    """GitLab Commits API를 사용하여 여러 파일을 하나의 커밋으로 생성/수정 (delete 의 파일은 있으면 삭제)"""
+    return await get_gateway().commit_files(project_id, branch, files, commit_message, delete)
+
+
+async def commit_file(project_id, file_path, content, commit_message, branch="main"):
+    """파일 하나 생성 또는 수정 (commit_files 의 단일 파일 버전). "created"|"updated"|"unchanged" 반환"""
+    result = await commit_files(project_id, {file_path: content}, commit_message, branch)
+    return result[file_path]
+
+
+@app.get("/api/ci/stats")
+async def ci_stats():
+    """Manifest 생성 품질 및 캐시 지표"""
+    return {
+        "manifests": manifest_stats.as_dict(),
+        "gitlab_cache": get_gateway().cache_stats(),
+        "commits": get_gateway().commit_stats,
+        "agent_config": get_agent_config_writer().stats(),
+        "fingerprint_cache": get_fingerprint_engine().stats(),
+        "jobs": await get_job_queue().stats(),
+        "rate_limits": rate_limit_stats(),
+    }
+
+
+@app.get("/health/live")
+async def health_live():
+    """liveness: 프로세스가 요청을 처리할 수 있으면 항상 200 (외부 의존성은 확인하지 않음)"""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """readiness: OpenAI 설정, GitLab 접속, 세션 저장소, 작업 큐 확인. 하나라도 실패하면 503"""
+    result = await dependencies.readiness()
+    return JSONResponse(result, status_code=200 if result["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 지표 (LLM/GitLab 호출 시간, 토큰/비용, 단계별 시간)"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.post("/api/ci/chat")
 async def ci_chat(req: ChatRequest):
-    # 세션 초기화
-    if req.user_id not in sessions:
-        sessions[req.user_id] = {"stage": "url_parse"}
+    if req.background:
+        if not session_store.shared:
+            # 메모리 세션은 재시작/다른 레플리카에서 보이지 않아, 재개된 작업이 엉뚱한 단계(url_parse)에서 실행된다
+            raise HTTPException(status_code=400, detail="background 실행은 공유 세션 저장소(SESSION_BACKEND=sqlite)에서만 사용할 수 있습니다.")
+        # 단계 처리는 워커가 실행하고, 요청은 작업 등록만 하고 바로 반환 (프록시 타임아웃에 커밋이 끊기지 않도록)
+        job = await get_job_queue().enqueue("chat", req.model_dump(exclude={"stream", "background"}), req.user_id)
+        job_workers.notify()
+        return JSONResponse(job_status(job), status_code=202)
+    if req.stream:
+        return StreamingResponse(
+            stream_chat(req),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return await process_chat(req)
+
+
+@app.post("/api/ci/batch", status_code=202)
+async def ci_batch(req: BatchRequest):
+    """여러 프로젝트 일괄 온보딩 시작. 진행 상황은 GET /api/ci/batch/{batch_id} 로 조회"""
+    job = batch_manager.submit(req)
+    return job.as_dict()
+
+
+@app.get("/api/ci/batch/{batch_id}")
+async def ci_batch_status(batch_id: str):
+    job = batch_manager.get(batch_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="배치 작업을 찾을 수 없습니다.")
+    return job.as_dict()
+
+
+@app.get("/api/ci/jobs/{job_id}")
+async def ci_job_status(job_id: str):
+    """백그라운드 작업 상태: queued -> running -> done(result) | failed(error)"""
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job_status(job)
+
+
+def rate_limit_error(error: Exception):
+    """호출 한도 초과(RateLimitTimeout, GitLab 429) 예외. TaskGraph 단계에서 난 경우 TaskGraphError 안에서 찾는다"""
+    for leaf in leaf_errors(error):
+        if isinstance(leaf, RateLimitTimeout) or (isinstance(leaf, GitLabError) and leaf.status_code == 429):
+            return leaf
+    return None
+
+
+async def process_chat(req: ChatRequest, events: asyncio.Queue = None):
+    try:
+        return await run_stage(req, events)
+    except SessionLockTimeout:
+        return {"message": "이전 메시지를 아직 처리 중입니다. 잠시 후 다시 시도해주세요."}
+    except (RateLimitTimeout, GitLabError, TaskGraphError) as e:
+        error = rate_limit_error(e)
+        if error is None:
+            raise
+        # 단계가 바뀌지 않은 채 세션이 저장되므로 같은 메시지를 다시 보내면 이어서 진행된다
+        if isinstance(error, GitLabError):
+            logger.warning("rate_limit_timeout", extra={"upstream": "gitlab", "error": error.message})
+            return {"message": "GitLab 요청이 많아 지금은 처리하지 못했습니다. 잠시 후 같은 메시지를 다시 보내주세요."}
+        logger.warning("rate_limit_timeout", extra={"upstream": error.upstream, "lane": error.lane})
+        return {"message": "요청이 많아 지금은 처리하지 못했습니다. 잠시 후 같은 메시지를 다시 보내주세요.",
+                "retry_after": round(error.retry_after, 1)}
+
+
+async def run_stage(req: ChatRequest, events: asyncio.Queue = None):
+    # 같은 user_id 의 메시지가 동시에 들어와도 단계 처리가 겹치지 않도록 사용자별 잠금
+    async with session_store.lock(req.user_id):
+        # 세션 초기화
+        session = await session_store.get(req.user_id) or {"stage": "url_parse"}
+        emit(events, "progress", step="stage", stage=session["stage"])
+        # 단계 처리 중 사용한 추출 경로(rule/llm) 등을 응답에 함께 담는다
+        trace = {}
+        try:
+            with timed(f"chat:{session['stage']}", "stage"):
+                response = await handle_stage(req, session, trace, events)
+            if isinstance(response, dict) and trace:
+                response.update(trace)
+            return response
+        finally:
+            await session_store.save(req.user_id, session)
+
+
+async def run_chat_job(payload: dict) -> dict:
+    """
+    작업 큐의 chat handler. 중단된 이전 실행이 잡고 있던 세션 잠금은 lease 가 만료될 때까지 기다린다
+    (같은 사용자의 작업은 워커가 하나씩만 실행하므로 다른 요청과 경쟁하는 경우는 드물다).
+    호출 한도에 걸리면 세션 단계는 그대로이므로 작업을 대기 상태로 되돌려 나중에 같은 메시지로 다시 실행한다.
+    """
+    req = ChatRequest(**payload)
+    deadline = time.monotonic() + SESSION_LOCK_LEASE
+    while True:
+        try:
+            return await run_stage(req)
+        except SessionLockTimeout:
+            if time.monotonic() >= deadline:
+                raise
+        except (RateLimitTimeout, GitLabError, TaskGraphError) as e:
+            error = rate_limit_error(e)
+            if error is None:
+                raise
+            raise RetryLater(getattr(error, "retry_after", 0.0), str(error)) from e
+
+
+async def stream_chat(req: ChatRequest):
+    """
+    NDJSON 이벤트 스트림: accepted -> progress/token ... -> result (또는 error).
+    클라이언트가 연결을 끊어도 커밋 도중 중단되지 않도록 단계 처리는 별도 task 로 끝까지 실행한다.
+    """
+    events = asyncio.Queue()
+
+    async def run():
+        try:
+            result = await process_chat(req, events)
+            emit(events, "result", **(result or {}))
+        except Exception as e:
+            emit(events, "error", message=f"처리 중 오류가 발생했습니다: {str(e)}")
+        finally:
+            events.put_nowait(None)
 
-    session = sessions[req.user_id]
+    task = asyncio.create_task(run())
+    yield json.dumps({"type": "accepted"}) + "\n"
+    while (event := await events.get()) is not None:
+        yield json.dumps(event, ensure_ascii=False) + "\n"
+    await task
 
+
+async def handle_stage(req: ChatRequest, session: dict, trace: dict, events: asyncio.Queue = None):
     # ==========================================
     # 1) GitLab 프로젝트 URL 파싱
     # ==========================================
@@ -92,37 +382,56 @@ async def ci_chat(req: ChatRequest):
             이 메시지에서 GitLab 프로젝트 URL을 추출하고 URL만 반환하세요.
             URL이 없다면 빈 문자열을 반환하세요.
             """
-        gpt_output = await query_gpt(prompt)
-        url = gpt_output.strip()
+        url = (await extract_or_query(extract_gitlab_url(req.message, GITLAB_URL), prompt, trace) or "").strip()
 
         if "http" not in url:
             return {"message": "GitLab URL을 찾을 수 없습니다. 올바른 URL을 입력해주세요."}
 
-        project = get_gitlab_project(url)
+        project = await get_gitlab_project(url)
         if not project:
             return {"message": "GitLab 프로젝트를 찾을 수 없거나 접근 권한이 없습니다. 토큰과 URL을 확인해주세요."}
 
         session.update({
             "stage": "dockerfile_check",
-            "project_id": project.id,
-            "project_path_with_namespace": project.path_with_namespace,
-            "web_url": project.web_url,
-            "default_branch": project.default_branch or "main"
+            "project_id": project["id"],
+            "project_path_with_namespace": project["path_with_namespace"],
+            "web_url": project["web_url"],
+            "default_branch": project.get("default_branch") or "main"
         })
-        # Dockerfile 존재 여부 확인
-        try:
-            project.files.get(file_path="Dockerfile", ref=session["default_branch"])
-            dockerfile_exists = True
-        except:
-            dockerfile_exists = False
-
-        if not dockerfile_exists:
-                    # 주 언어 감지 (간단히 가장 많이 쓰인 언어)
-                    langs = project.languages()
-                    primary_lang = list(langs.keys())[0] if langs else "Python"
-                    session["primary_lang"] = primary_lang
-                    return {"message": f"프로젝트({project.path_with_namespace}) 확인 완료.\n"
-                                       f"Dockerfile이 없습니다. 주 언어인 '{primary_lang}' 기반으로 생성할까요? (예/아니오)"}
+        gateway = get_gateway()
+        branch = session["default_branch"]
+        graph = TaskGraph("url_parse")
+
+        async def probe_dockerfile():
+            # Dockerfile 존재 여부 확인. 이미 있으면 진행 중인 스택 판별은 필요 없으므로 취소
+            try:
+                exists = await gateway.file_exists(project["id"], "Dockerfile", branch)
+            except GitLabError:
+                return False
+            if exists:
+                graph.cancel("fingerprint")
+                graph.cancel("languages")
+            return exists
+
+        graph.add("dockerfile", probe_dockerfile)
+        # 매니페스트 파일로 런타임/프레임워크 판별 (못 하면 가장 많이 쓰인 언어). Dockerfile 확인과 동시에 진행하고,
+        # 판별에 실패할 때 쓸 언어 통계(캐시됨)도 판별이 끝나기를 기다리지 않고 미리 조회
+        graph.add("fingerprint", lambda: fingerprint_project(project["id"], branch))
+        graph.add("languages", lambda: project_languages(project["id"]))
+        graph.add("stack", with_primary_language, after=["fingerprint", "languages"])
+        results = await graph.run()
+
+        if not results["dockerfile"]:
+                    fp = results["stack"]
+                    session["primary_lang"] = fp.language
+                    session["fingerprint"] = fp.as_dict()
+                    if fp.template:
+                        trace["fingerprint"] = fp.template
+                        return {"message": f"프로젝트({project['path_with_namespace']}) 확인 완료.\n"
+                                           f"Dockerfile이 없습니다. 분석 결과 {fp.describe()} 프로젝트입니다.\n"
+                                           f"이 구성에 맞춘 Dockerfile을 생성할까요? (예/아니오, 또는 다른 언어 이름)"}
+                    return {"message": f"프로젝트({project['path_with_namespace']}) 확인 완료.\n"
+                                       f"Dockerfile이 없습니다. 주 언어인 '{fp.language}' 기반으로 생성할까요? (예/아니오)"}
         else:
             session["stage"] = "agent_check"
             return {"message": f"프로젝트 연결 성공. Dockerfile이 이미 존재합니다.\n다음으로 GitLab Agent 연결 정보를 입력받겠습니다."}
@@ -131,8 +440,6 @@ async def ci_chat(req: ChatRequest):
     # 2) Dockerfile 생성
     # ==========================================
     elif session["stage"] == "dockerfile_check":
-        project = gl.projects.get(session["project_id"])
-
         prompt = f"""
         사용자 메시지: "{req.message}"
 
@@ -147,9 +454,15 @@ async def ci_chat(req: ChatRequest):
         예시 2 (언어 제시): {{"status": "DISAGREE", "language": "Java"}}
         예시 3 (부정): {{"status": "DISAGREE", "language": "DISAGREE"}}
         """
-        response_str = await query_gpt(prompt)
-        print(response_str)
-        intent_result = json.loads(response_str)
+        extraction = classify_dockerfile_answer(req.message)
+        if extraction.confident:
+            trace["extraction"] = "rule"
+            intent_result = extraction.value
+        else:
+            trace["extraction"] = "llm"
+            response_str = await query_gpt(prompt)
+            logger.debug("dockerfile_answer_classified", extra={"response": response_str})
+            intent_result = json.loads(response_str)
         if intent_result.get("status") == "AGREE":
             # 긍정 응답이면, 기존 primary_lang 그대로 사용
             target_lang = session.get("primary_lang", "Python")
@@ -170,17 +483,44 @@ async def ci_chat(req: ChatRequest):
             return {"message": "응답 분석 중 오류가 발생했습니다. '예' 또는 언어 이름을 입력해주세요."}
 
 
-        # GPT에게 Dockerfile 작성 요청
-        prompt = f"""
-        언어: {target_lang}
-        프로젝트 상황: GitLab CI에서 빌드될 예정.
-        최적의 Dockerfile 내용만 출력하세요. 마크다운 없이 raw text로.
-        """
-        dockerfile_content = await query_gpt(prompt)
-
-        # GitLab API로 커밋
-        commit_file(project, "Dockerfile", dockerfile_content, "Add Dockerfile via GPT Manager",
-                    session["default_branch"])
+        # 판별한 스택과 같은 언어면 템플릿으로 바로 생성, 모르는 스택이거나 다른 언어를 원하면 GPT 에게 요청
+        fp = Fingerprint(**session["fingerprint"]) if session.get("fingerprint") else Fingerprint()
+        dockerfile_content = None
+        if (fp.language or "").lower() == target_lang.lower():
+            dockerfile_content = template_dockerfile(fp)
+        if dockerfile_content is not None:
+            trace["dockerfile"] = "template"
+            target_lang = fp.describe()
+
+        async def generate_dockerfile():
+            # 같은 언어로 이미 생성한 Dockerfile 이 있으면 재사용
+            cache_key = dockerfile_cache_key(target_lang)
+            content = await load_generation(cache_key, req, trace, events)
+            if content is None:
+                emit(events, "progress", step="generate", target="Dockerfile", language=target_lang)
+                content = await query_gpt(dockerfile_prompt(target_lang), events, lane="generation")
+                await store_generation(cache_key, "dockerfile", content)
+            return content
+
+        async def commit_dockerfile(dockerfile):
+            # GitLab API로 커밋
+            emit(events, "progress", step="commit", files=["Dockerfile"])
+            await commit_files(session["project_id"], {"Dockerfile": dockerfile}, "Add Dockerfile via GPT Manager",
+                               session["default_branch"])
+
+        graph = TaskGraph("dockerfile_check")
+        if dockerfile_content is not None:
+            graph.add("dockerfile", lambda: dockerfile_content)
+        else:
+            trace["dockerfile"] = "gpt"
+            # 백그라운드 작업이 재시작되면 생성/커밋한 결과는 checkpoint 에서 그대로 사용
+            graph.add("dockerfile", lambda: checkpoint("dockerfile", generate_dockerfile))
+        # 커밋 시 생성/수정 판단에 쓰는 루트 트리를 생성과 동시에 조회해 둔다
+        graph.add("tree", lambda: get_gateway().existing_files(session["project_id"], session["default_branch"],
+                                                               ["Dockerfile"]))
+        graph.add("commit", lambda dockerfile, tree: checkpoint("commit", lambda: commit_dockerfile(dockerfile)),
+                  after=["dockerfile", "tree"])
+        await graph.run()
 
         session["stage"] = "agent_check"
         return {
@@ -193,74 +533,29 @@ async def ci_chat(req: ChatRequest):
                 이 메시지에서 GitLab Kubernetes Agent의 이름만 추출하세요.
                 이름 외의 다른 텍스트는 무시하고 Agent 이름만 반환하세요.
                 """
-        agent_name = (await query_gpt(prompt)).strip()
+        agent_name = (await extract_or_query(extract_k8s_name(req.message), prompt, trace) or "").strip()
 
         if not agent_name:
             return {"message": "Agent 이름을 추출하지 못했습니다. Agent 이름만 입력해주세요. (예: my-k8s-agent)"}
 
-        agent_repo_path = "test1"
-
-        try:
-            agent_management_project = gl.projects.get(agent_repo_path)
-        except Exception:
-            return {"message": f"Agent 관리 프로젝트 경로({agent_repo_path})를 찾을 수 없거나 접근 권한이 없습니다. 관리 프로젝트 경로를 확인해주세요."}
-
-        config_file_path = f".gitlab/agents/{agent_name}/config.yaml"
+        agent_repo_path = DEFAULT_AGENT_PROJECT
         app_project_path = session["project_path_with_namespace"]
-        app_project_id = session["project_id"]
 
         try:
-            # 파일 가져오기 (UPDATE 모드 시도)
-            f = agent_management_project.files.get(file_path=config_file_path, ref=session["default_branch"])
-            yaml_content = f.decode().decode('utf-8')
-            yaml = YAML()
-            config_data = yaml.load(yaml_content)
-            config_data.setdefault('ci_access', {}).setdefault('projects', [])
-            is_already_listed = any(
-                p.get('id') == app_project_id or
-                p.get('id') == app_project_path for p in config_data['ci_access']['projects']
-            )
-            update_message = "Agent 설정 파일에 현재 프로젝트 권한을 추가했습니다."
-            if not is_already_listed:
-                config_data['ci_access']['projects'].append({'id': app_project_path})
-            else:
-                update_message = "Agent 설정 파일에 현재 프로젝트 권한이 이미 존재합니다."
-
-            # 업데이트된 YAML 내용을 StringIO로 변환
-            stream = StringIO()
-            yaml.dump(config_data, stream)
-            new_yaml_content = stream.getvalue()
-
-            # GitLab API를 통해 파일 업데이트 커밋
-            f.content = new_yaml_content
-            f.save(
-                branch=session["default_branch"],
-                commit_message=update_message,
-                encoding='text'
-            )
-
-            action_status = "수정 및 커밋"
-
-        except gitlab.exceptions.GitlabGetError:
-            # 파일이 존재하지 않음 (CREATE 모드)
-            new_yaml_content = f"""
-            ci_access:
-              projects:
-                - id: {app_project_path}
-            """
-            # GitLab API를 통해 새 파일 커밋
-            agent_management_project.files.create({
-                'file_path': config_file_path,
-                'branch': session["default_branch"],
-                'content': new_yaml_content.strip(),
-                'commit_message': f"Add initial config for Agent {agent_name} and grant access to {app_project_path}"
-            })
-
-            action_status = "새로 생성 및 커밋"
-
+            grant = await grant_agent_access(agent_name, [app_project_path], session["default_branch"], agent_repo_path)
+        except GitLabError as e:
+            if e.status_code == 404:
+                return {"message": f"Agent 관리 프로젝트 경로({agent_repo_path})를 찾을 수 없거나 접근 권한이 없습니다. 관리 프로젝트 경로를 확인해주세요."}
+            return {"message": f"Agent 설정 파일 처리 중 예기치 않은 오류 발생: {str(e)}"}
         except Exception as e:
             return {"message": f"Agent 설정 파일 처리 중 예기치 않은 오류 발생: {str(e)}"}
 
+        action_status = {
+            "created": "새로 생성 및 커밋",
+            "updated": "수정 및 커밋",
+            "unchanged": "확인(권한 이미 존재)",
+        }[grant["action"]]
+
         # 5. 세션 데이터 저장 및 다음 단계로 이동
         session["agent_name"] = agent_name
         session["agent_path"] = agent_repo_path  # 'test1' 저장
@@ -282,12 +577,14 @@ async def ci_chat(req: ChatRequest):
                           이 메시지에서 네임스페이스의 이름만 추출하세요.
                           이름 외의 다른 텍스트는 무시하고 네임스페이스 이름만 반환하세요.
                           """
-        namespace = (await query_gpt(prompt)).strip()
+        namespace = (await extract_or_query(extract_k8s_name(req.message, default="default"), prompt, trace)).strip()
         if not namespace:
             namespace = "default"
 
         session["namespace"] = namespace
         session["stage"] = "get_deployment_requirements"  # 다음 단계로 전환
+        # fingerprint 로 앱 포트를 알고 있으면 내부 포트 예시로 안내
+        app_port = (session.get("fingerprint") or {}).get("port") or 8080
 
         return {
             "message": f"""
@@ -296,7 +593,7 @@ async def ci_chat(req: ChatRequest):
                 이제 앱 배포를 위한 추가 요구사항을 알려주세요.
 
                 **1. 외부 노출 여부:** (예/아니오)
-                **2. 내부/외부 포트:** (예: 내부 8080, 외부 80)
+                **2. 내부/외부 포트:** (예: 내부 {app_port}, 외부 80)
                 **3. 리소스 설정:** (예: CPU 500m, 메모리 512Mi)
                 **4. 데이터 영속성:** (예: 예/아니오, 영구 저장소 필요 여부)
 
@@ -305,148 +602,80 @@ async def ci_chat(req: ChatRequest):
         }
 
     elif session["stage"] == "get_deployment_requirements":
-        # 세션에서 기본 정보 로드
-        project = gl.projects.get(session["project_id"])
-        app_name = project.path
-        namespace = session["namespace"]
-        image_placeholder = "$CI_REGISTRY_IMAGE:$CI_COMMIT_SHORT_SHA"
-
-        # 🚨 GPT에게 요구사항 분석 및 YAML 생성 요청
-        gpt_prompt = f"""
-            App Name: {app_name}
-            Namespace: {namespace}
-            Image: {image_placeholder}
-
-            사용자 요구사항: "{req.message}"
-
-            사용자 요구사항을 분석하여 다음 Kubernetes Manifest를 생성하세요.
-
-            1. **외부 노출이 필요하다면:** Service Type을 LoadBalancer 또는 NodePort로 설정하고, 요청된 포트를 반영하세요. (요청이 없으면 ClusterIP)
-            2. **데이터 영속성이 필요하다면:** Deployment에 VolumeMount를 추가하고 PersistentVolumeClaim(PVC) YAML을 별도로 생성하세요.
-            3. **리소스 요청이 있다면:** Deployment에 CPU/Memory limits와 requests를 설정하세요. (요청이 없으면 생략)
-
-            반드시 다음 3개의 파일을 구분하여 추가설명없이 JSON 형태로만 반환하세요:
-            {{
-                "deployment": "yaml content...",
-                "service": "yaml content...",
-                "pvc": "yaml content..."
-            }}
-            """
-
-        yaml_res = await query_gpt(gpt_prompt)
-
-
+        gateway = get_gateway()
+        branch = session["default_branch"]
+        project_id = session["project_id"]
+        # 이미 배포한 설정이 있으면 이번 메시지에서 언급한 항목만 바꾼다 (regenerate 면 처음부터 다시 추출)
+        previous = None
+        if session.get("deployment_spec") and not req.regenerate:
+            previous = DeploymentRequirements(**session["deployment_spec"])
+
+        async def load_requirements():
+            # "레플리카 3개로" 처럼 바꿀 항목만 말한 짧은 요청이면 GPT 없이 반영
+            if previous is not None:
+                changes = extract_requirement_changes(req.message)
+                if changes.confident:
+                    trace["extraction"] = "rule"
+                    return changes.value, None
+            # 같은 요구사항 문장으로 추출한 배포 설정이 있으면 재사용 (앱/네임스페이스와 무관)
+            cache_key = make_key("deployment_spec", "gpt-4o", requirements=normalize_text(req.message))
+            cached = await load_generation(cache_key, req, trace, events)
+            if cached is not None:
+                return cached, None
+            emit(events, "progress", step="generate", target="deployment_spec")
+            requirements, error_message = await extract_requirements(req.message, events)
+            if requirements is None:
+                return None, error_message
+            # 언급된 항목만 저장해야 재배포 시 나머지 항목을 이전 값으로 유지할 수 있다
+            mentioned = requirements.model_dump(exclude_unset=True)
+            await store_generation(cache_key, "deployment_spec", mentioned)
+            return mentioned, None
+
+        async def prefetch_blobs(trees):
+            # 커밋 전 비교에 쓸 기존 Manifest/CI 파일 내용을 GPT 응답을 기다리는 동안 받아 둔다
+            shas = [sha for path, sha in trees.items() if sha and (path.startswith("kubernetes/") or path == ".gitlab-ci.yml")]
+            await asyncio.gather(*(gateway.get_blob(project_id, sha) for sha in shas), return_exceptions=True)
+
+        # 프로젝트 조회, 요구사항 추출(GPT), CI 설정 렌더링, 커밋 대상 파일 조회는 서로 독립이므로 동시에 진행
+        graph = TaskGraph("deployment")
+        graph.add("project", lambda: gateway.get_project(project_id))
+        graph.add("requirements", lambda: checkpoint("requirements", load_requirements))
+        graph.add("ci", lambda: render_ci_file(session["agent_path"], session["agent_name"], branch))
+        graph.add("trees", lambda: gateway.existing_files(project_id, branch, DEPLOYMENT_PATHS))
+        graph.add("blobs", prefetch_blobs, after=["trees"])
+        results = await graph.run()
+
+        changes, error_message = results["requirements"]
+        if changes is None:
+            return {"message": error_message}
         try:
-            yaml_json = json.loads(yaml_res)
-
-            deploy_yaml = yaml_json.get('deployment')
-            svc_yaml = yaml_json.get('service')
-            pvc_yaml = yaml_json.get('pvc')
-
-            yaml_content_list = [
-                ("Deployment", deploy_yaml),
-                ("Service", svc_yaml),
-                ("PVC", pvc_yaml)
-            ]
-
-            # 1. 필수 파일(Deployment, Service) 유무 확인
-            if not deploy_yaml or not svc_yaml:
-                return {"message": "YAML 생성 중 Deployment 또는 Service 파일 내용이 누락되었습니다. 요구사항을 다시 명확히 입력해주세요."}
-
-            # 2. YAML 구문 검증 (Syntax Validation)
-            yaml = YAML()
-            for name, content in yaml_content_list:
-                if content:
-                    try:
-                        # GPT가 생성한 YAML 문자열을 로드하여 구문 오류 검사
-                        yaml.load(content)
-                    except Exception as e:
-                        return {"message": f"❌ GPT가 생성한 {name} YAML 파일에 구문 오류가 있습니다. 요구사항을 다시 확인해주세요.\n오류: {str(e)}"}
-
-
-        except json.JSONDecodeError:
-            return {"message": "YAML 파일 파싱 전, GPT 응답이 유효한 JSON 형식이 아닙니다. 다시 시도해 주세요."}
-        except Exception as e:
-            return {"message": f"YAML 생성 및 검증 중 예기치 않은 오류가 발생했습니다: {str(e)}"}
-
-        # -----------------------------------------------------
-        # 3. 파일 커밋 (GitLab API) - 검증이 완료된 파일만 커밋됩니다.
-        # -----------------------------------------------------
-        branch = session['default_branch']
-
-        # 파일 커밋 목록
-        commit_file(project, "kubernetes/deployment.yaml", deploy_yaml, "Add Deployment YAML", branch)
-        commit_file(project, "kubernetes/service.yaml", svc_yaml, "Add Service YAML", branch)
-        if pvc_yaml:  # PVC 파일이 있다면 커밋 (유효성 검증 완료됨)
-            commit_file(project, "kubernetes/pvc.yaml", pvc_yaml, "Add PVC YAML", branch)
-
-        ci_content = f"""
-        stages:
-          - build
-          - deploy
-
-        # Agent 경로를 변수로 설정하여 deploy Job에서 사용합니다.
-        variables:
-          KUBE_CONTEXT: "{session['agent_path']}:{session['agent_name']}"
-          K8S_MANIFESTS_DIR: "kubernetes"
-
-        # ==============================================================
-        # 1. Build Stage: Docker 이미지 빌드 및 레지스트리 푸시
-        # ==============================================================
-        build:
-          stage: build
-          # Docker 빌드에 필요한 이미지와 서비스
-          image: docker:20.10.16
-          services:
-            - docker:20.10.16-dind
-
-          script:
-            # GitLab Container Registry에 로그인
-            - docker login -u $CI_REGISTRY_USER -p $CI_REGISTRY_PASSWORD $CI_REGISTRY
-
-            # Dockerfile을 사용하여 이미지 빌드 (CI 변수로 태그 지정)
-            - docker build -t $CI_REGISTRY_IMAGE:$CI_COMMIT_SHORT_SHA .
-
-            # 빌드된 이미지를 레지스트리에 푸시
-            - docker push $CI_REGISTRY_IMAGE:$CI_COMMIT_SHORT_SHA
-
-          # main 브랜치에서 커밋이 발생할 때만 실행
-          rules:
-            - if: $CI_COMMIT_BRANCH == "{session['default_branch']}"
-
-        # ==============================================================
-        # 2. Deploy Stage: Agent를 사용하여 Kubernetes 배포
-        # ==============================================================
-        deploy:
-          stage: deploy
-          # Agent를 통한 배포에 필요한 kubectl 도구가 포함된 이미지
-          image: registry.gitlab.com/gitlab-org/cluster-integration/helm-kubectl/releases/latest-kubectl
-
-          script:
-            # 1. Agent를 통해 클러스터 컨텍스트 설정
-            # 이 명령어가 Agent 관리 레포와 Agent 이름을 사용하여 통신 채널을 설정합니다.
-            - kubectl config use-context "$KUBE_CONTEXT"
-
-            # 2. Manifest 파일 적용 (순서 중요: PVC -> Deployment -> Service)
-
-            # PVC가 있는지 확인하고 있다면 적용 (데이터 영속성)
-            - | # 멀티라인 스크립트 시작
-              if [ -f "$K8S_MANIFESTS_DIR/pvc.yaml" ]; then
-                echo "Applying PVC manifest..."
-                kubectl apply -f $K8S_MANIFESTS_DIR/pvc.yaml
-              else
-                echo "No pvc.yaml found, skipping PVC application."
-              fi
-
-            # Deployment 및 Service 적용
-            - kubectl apply -f $K8S_MANIFESTS_DIR/deployment.yaml
-            - kubectl apply -f $K8S_MANIFESTS_DIR/service.yaml
-
-            echo "Deployment via GitLab Agent completed."
-
-          # main 브랜치에서만 실행
-          rules:
-            - if: $CI_COMMIT_BRANCH == "{session['default_branch']}"
-        """
+            requirements = previous.updated(changes) if previous is not None else DeploymentRequirements(**changes)
+        except ValidationError as e:
+            return {"message": f"요구사항을 배포 설정으로 변환하지 못했습니다. 요구사항을 다시 명확히 입력해주세요.\n오류: {str(e)}"}
 
-        commit_file(project, ".gitlab-ci.yml", ci_content, "Add GitLab CI pipeline with Agent", branch)
+        # 템플릿으로 Manifest 렌더링 (검증이 완료된 파일만 커밋됩니다)
+        project = results["project"]
+        spec = DeploymentSpec(app_name=project["path"], namespace=session["namespace"], **requirements.model_dump())
+        try:
+            files = render_deployment_manifests(spec)
+        except ManifestRenderError as e:
+            return {"message": f"❌ {str(e)}"}
+        files[".gitlab-ci.yml"] = results["ci"]
+        session["deployment_spec"] = spec.model_dump()
+
+        # 바뀐 Manifest / CI 설정만 하나의 커밋으로 반영 (내용이 같은 파일은 제외, 모두 같으면 커밋하지 않음)
+        # 이번에 렌더링하지 않은 Manifest(영속성을 끈 경우의 pvc.yaml 등)는 같은 커밋에서 삭제
+        emit(events, "progress", step="commit", files=list(files))
+        result = await checkpoint("commit", lambda: commit_files(
+            project["id"], files, "Add Kubernetes manifests and GitLab CI pipeline with Agent", branch,
+            delete=stale_manifests(files)))
+
+        updated = ""
+        if previous is not None:
+            before, after = previous.model_dump(), requirements.model_dump()
+            updated = "".join(f"- {key}: {before[key]} → {after[key]}\n" for key in after if before[key] != after[key])
+            updated = f"변경된 설정:\n{updated}" if updated else "변경된 설정이 없습니다.\n"
+        if all(status == "unchanged" for status in result.values()):
+            return {"message": f"{updated}✅ 레포의 Manifest와 .gitlab-ci.yml이 이미 같은 내용이라 커밋하지 않았습니다."}
+        summary = "\n".join(f"- {path}: {status}" for path, status in result.items())
+        return {"message": f"{updated}✅ Kubernetes Manifest와 .gitlab-ci.yml이 하나의 커밋으로 반영되었습니다.\n{summary}"}
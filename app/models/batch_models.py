@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.models.deploy_models import DeploymentRequirements
+
+# Kubernetes DNS-1123 label
+K8S_NAME_PATTERN = r"^[a-z0-9]([-a-z0-9]{0,61}[a-z0-9])?$"
+
+
+class BatchProject(BaseModel):
+    """일괄 온보딩 대상 프로젝트 1개"""
+    url: str                                              # GitLab 프로젝트 URL 또는 경로 (group/app)
+    namespace: str = Field("default", pattern=K8S_NAME_PATTERN)
+    language: Optional[str] = None                        # Dockerfile 이 없을 때 사용할 언어 (미지정 시 판별한 스택)
+    deployment: DeploymentRequirements = Field(default_factory=DeploymentRequirements)
+
+
+class BatchRequest(BaseModel):
+    agent_name: str = Field(pattern=K8S_NAME_PATTERN)
+    agent_path: Optional[str] = None                      # Agent 관리 프로젝트 (미지정 시 기본 관리 프로젝트)
+    projects: List[BatchProject] = Field(min_length=1, max_length=1000)
+    concurrency: Optional[int] = Field(None, ge=1)        # 동시 처리 프로젝트 수 (BATCH_MAX_WORKERS 이하)
+    regenerate: bool = False                              # True 면 Dockerfile 생성 캐시를 무시
@@ -0,0 +1,50 @@
+import re
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional, Literal
+
+# Kubernetes quantity (예: 500m, 0.5, 512Mi, 1Gi)
+CPU_PATTERN = r"^[0-9]+(\.[0-9]+)?m?$"
+MEMORY_PATTERN = r"^[0-9]+(\.[0-9]+)?(Ki|Mi|Gi|Ti|K|M|G|T)?$"
+
+
+class DeploymentRequirements(BaseModel):
+    """사용자가 자유 텍스트로 입력한 배포 요구사항 (GPT는 이 구조만 채운다)"""
+    expose: bool = False
+    service_type: Literal["ClusterIP", "NodePort", "LoadBalancer"] = "ClusterIP"
+    container_port: int = Field(8080, ge=1, le=65535)
+    service_port: int = Field(80, ge=1, le=65535)
+    cpu: Optional[str] = Field(None, pattern=CPU_PATTERN)
+    memory: Optional[str] = Field(None, pattern=MEMORY_PATTERN)
+    persistence: bool = False
+    storage_size: str = Field("1Gi", pattern=MEMORY_PATTERN)
+    mount_path: str = "/data"
+    replicas: int = Field(1, ge=1, le=50)
+
+    @model_validator(mode="after")
+    def _expose_needs_external_type(self):
+        # 외부 노출을 요청했는데 ClusterIP 로 남아 있으면 LoadBalancer 로 보정
+        if self.expose and self.service_type == "ClusterIP":
+            self.service_type = "LoadBalancer"
+        return self
+
+    def updated(self, changes: dict) -> "DeploymentRequirements":
+        """changes 에 있는 항목만 바꾼 요구사항 (재배포 시 일부 항목만 바꾸는 경우)"""
+        data = {**self.model_dump(), **changes}
+        if changes.get("expose") is False and "service_type" not in changes:
+            data["service_type"] = "ClusterIP"  # 외부 노출을 끄면 보정했던 LoadBalancer 도 되돌림
+        return DeploymentRequirements(**data)
+
+
+class DeploymentSpec(DeploymentRequirements):
+    """템플릿 렌더링에 사용하는 전체 배포 명세"""
+    app_name: str
+    namespace: str = "default"
+    image: str = "$CI_REGISTRY_IMAGE:$CI_COMMIT_SHORT_SHA"
+
+    @field_validator("app_name")
+    @classmethod
+    def _dns1123_name(cls, value: str) -> str:
+        # GitLab 프로젝트 경로(대문자, '_', '.' 허용)를 Kubernetes 리소스 이름 규칙에 맞춤
+        name = re.sub(r"[^a-z0-9-]+", "-", value.lower()).strip("-")[:63].rstrip("-")
+        return name or "app"
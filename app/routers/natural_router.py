@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from app.models.analyze_models import AnalyzeRequest, AnalyzeResponse
+from app.services.analyzer_service import analyze
+from app.services.intent_engine import get_intent_engine
+
+router = APIRouter(prefix="/api/natural", tags=["natural"])
+
+
+@router.post("/analyze", response_model=AnalyzeResponse)
+async def analyze_request(req: AnalyzeRequest):
+    """자연어 요청 의도 분류 (cicd / k8s_api / unknown)"""
+    return await analyze(req)
+
+
+@router.get("/stats")
+async def intent_stats():
+    """의도 분류 캐시 적중 지표"""
+    return get_intent_engine().stats()
@@ -0,0 +1,178 @@
+"""
+공유 Agent 설정 파일(.gitlab/agents/{agent}/config.yaml) 쓰기.
+
+여러 사용자가 같은 Agent 로 동시에 온보딩해도 ci_access.projects 항목이 유실되지 않도록
+- Agent 별로 대기 중인 권한 추가 요청을 모아 flush 주기마다 하나의 커밋으로 반영하고
+  (프로세스 내에서는 Agent 별 커밋을 직렬화하여 서로 충돌하지 않음)
+- 파일을 읽은 시점의 last_commit_id 로 커밋하여, 그 사이 다른 곳에서 수정되었으면 다시 읽어 병합한다.
+"""
+import asyncio
+import os
+import random
+from io import StringIO
+
+from ruamel.yaml import YAML
+
+from app.services.gitlab_client import GitLabError, get_gateway
+from app.services.telemetry import logger, timed
+
+AGENT_CONFIG_FLUSH_WINDOW = float(os.environ.get("AGENT_CONFIG_FLUSH_WINDOW", "0.1"))  # 요청을 모으는 시간(초)
+AGENT_CONFIG_MAX_RETRIES = int(os.environ.get("AGENT_CONFIG_MAX_RETRIES", "5"))       # 충돌 시 재시도 횟수
+
+# 커밋 도중 파일이 바뀌었을 때 GitLab 이 돌려주는 응답. 400 은 검증 오류(잘못된 경로/브랜치)에도 쓰이므로 메시지로 구분
+CONFLICT_STATUS = 409
+CONFLICT_MESSAGES = (
+    "has changed since you started editing",  # last_commit_id 불일치
+    "already exists",                         # 다른 곳에서 먼저 생성
+    "doesn't exist", "does not exist",        # 다른 곳에서 삭제
+)
+
+
+def is_conflict(error: GitLabError) -> bool:
+    """다시 읽어서 병합하면 해결되는 쓰기 충돌인지"""
+    if error.status_code == CONFLICT_STATUS:
+        return True
+    return error.status_code == 400 and any(message in error.message for message in CONFLICT_MESSAGES)
+
+
+def agent_config_path(agent_name: str) -> str:
+    return f".gitlab/agents/{agent_name}/config.yaml"
+
+
+def merge_agent_config(yaml_content, project_paths: list):
+    """
+    Agent config.yaml 의 ci_access.projects 에 프로젝트들을 추가.
+    (새 YAML 내용, 실제로 추가된 경로 목록) 반환. 파일이 없으면 yaml_content 는 None.
+    """
+    yaml = YAML()
+    config_data = yaml.load(yaml_content) if yaml_content else None
+    if not isinstance(config_data, dict):
+        config_data = {}
+    if not isinstance(config_data.get("ci_access"), dict):
+        config_data["ci_access"] = {}
+    projects = config_data["ci_access"].setdefault("projects", [])
+
+    listed = {str(p.get("id")) for p in projects if isinstance(p, dict)}
+    added = []
+    for path in project_paths:
+        if path not in listed:
+            projects.append({"id": path})
+            listed.add(path)
+            added.append(path)
+
+    stream = StringIO()
+    yaml.dump(config_data, stream)
+    return stream.getvalue(), added
+
+
+class AgentConfigWriter:
+    """
+    Agent 별 권한 추가 요청을 모아서 쓰는 writer.
+    grant() 는 자신의 요청이 포함된 커밋이 반영된 뒤에 반환된다.
+    """
+
+    def __init__(self, flush_window: float = AGENT_CONFIG_FLUSH_WINDOW,
+                 max_retries: int = AGENT_CONFIG_MAX_RETRIES):
+        self.flush_window = flush_window
+        self.max_retries = max_retries
+        self.commits = 0
+        self.conflicts = 0
+        self._pending = {}  # (관리 프로젝트, agent, branch) -> [(future, 요청 경로 목록), ...]
+        self._locks = {}    # (관리 프로젝트, agent, branch) -> 커밋 직렬화용 asyncio.Lock
+        self._flushes = set()  # 실행 중인 flush task (참조를 잡아 두어야 도중에 GC 되지 않는다)
+
+    async def grant(self, agent_repo_path: str, agent_name: str, project_paths: list, branch: str) -> dict:
+        """
+        project_paths 의 CI/CD 접근 권한을 추가.
+        {"action": "created"|"updated"|"unchanged", "added": [...], "config_path": ...} 반환
+        """
+        key = (agent_repo_path, agent_name, branch)
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._pending.get(key)
+        if waiters is None:
+            waiters = self._pending[key] = []
+            task = asyncio.ensure_future(self._flush_later(key))
+            self._flushes.add(task)
+            task.add_done_callback(self._flush_done)
+        waiters.append((future, list(project_paths)))
+        return await future
+
+    async def _flush_later(self, key):
+        await asyncio.sleep(self.flush_window)
+        # 같은 Agent 의 이전 커밋이 진행 중이면 끝날 때까지 기다리는 동안 들어온 요청도 함께 반영
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            waiters = self._pending.pop(key)
+            paths = list(dict.fromkeys(path for _, requested in waiters for path in requested))
+            try:
+                created, added = await self._write(*key, paths)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+
+        if error is not None:
+            for future, _ in waiters:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        added = set(added)
+        for future, requested in waiters:
+            mine = [path for path in requested if path in added]
+            action = "created" if created else ("updated" if mine else "unchanged")
+            if not future.done():
+                future.set_result({"action": action, "added": mine, "config_path": agent_config_path(key[1])})
+
+    def _flush_done(self, task: asyncio.Task):
+        self._flushes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("agent_config_flush_failed", exc_info=task.exception())
+
+    async def _write(self, agent_repo_path: str, agent_name: str, branch: str, paths: list):
+        """읽기 -> 병합 -> last_commit_id 조건부 커밋. 충돌하면 다시 읽어 병합. (새로 생성 여부, 추가된 경로) 반환"""
+        gateway = get_gateway()
+        agent_project = await gateway.get_project(agent_repo_path)
+        config_path = agent_config_path(agent_name)
+
+        for attempt in range(self.max_retries + 1):
+            current = await gateway.get_file(agent_project["id"], config_path, branch)
+            content, added = merge_agent_config(current["text"] if current else None, paths)
+            if current is not None and not added:
+                return False, []
+
+            action = {"action": "create" if current is None else "update", "file_path": config_path, "content": content}
+            if current is not None and current.get("last_commit_id"):
+                action["last_commit_id"] = current["last_commit_id"]
+            if current is None:
+                message = f"Add initial config for Agent {agent_name} and grant access to {', '.join(added)}"
+            else:
+                message = f"Agent {agent_name} 설정 파일에 프로젝트 권한 추가: {', '.join(added)}"
+
+            try:
+                with timed("commit", "commit"):
+                    await gateway.create_commit(agent_project["id"], branch, message, [action])
+            except GitLabError as e:
+                if not is_conflict(e) or attempt == self.max_retries:
+                    raise
+                # 다른 워커/레플리카가 먼저 수정함 -> 백오프 후 다시 읽어서 병합
+                self.conflicts += 1
+                await asyncio.sleep(random.uniform(0, min(1.0, 0.05 * (2 ** attempt))))
+                continue
+            finally:
+                gateway.invalidate_paths(agent_project["id"], branch, [config_path])
+            self.commits += 1
+            return current is None, added
+
+    def stats(self) -> dict:
+        return {"commits": self.commits, "conflicts": self.conflicts, "pending_agents": len(self._pending)}
+
+
+_writer = None
+
+
+def get_agent_config_writer() -> AgentConfigWriter:
+    """프로세스 전체에서 공유하는 Agent 설정 writer (최초 사용 시 생성)"""
+    global _writer
+    if _writer is None:
+        _writer = AgentConfigWriter()
+    return _writer
@@ -1,4 +1,24 @@
+from app.models.analyze_models import AnalyzeRequest, AnalyzeResponse
+from app.services.intent_engine import URL_RE, get_intent_engine
 
-from app.models.analyze_models import AnalyzeResponse
 
+async def analyze(req: AnalyzeRequest) -> AnalyzeResponse:
+    """자연어 요청을 분류하여 AnalyzeResponse 로 반환 (비슷한 요청은 캐시로 응답)"""
+    result = await get_intent_engine().classify(req.text)
 
+    details = {
+        "command": result["command"],
+        "source": result["source"],
+        "similarity": result["similarity"],
+    }
+    # 캐시된 결과에는 다른 요청의 URL 이 섞이지 않도록 레포 주소는 항상 현재 요청에서 추출
+    repo_url = req.github_url or next(iter(URL_RE.findall(req.text)), None)
+    if repo_url:
+        details["repo_url"] = repo_url.rstrip(".,;:!?'\")")
+
+    return AnalyzeResponse(
+        action_type=result["action_type"],
+        summary=result["summary"],
+        confidence=result["confidence"],
+        details=details,
+    )
@@ -0,0 +1,239 @@
+"""
+여러 GitLab 프로젝트 일괄 온보딩.
+
+1) 프로젝트 조회 + Dockerfile 확인/생성   (워커 풀, 프로젝트별. 판별한 스택은 템플릿, 모르는 스택만 GPT)
+2) Agent config.yaml 권한 추가          (모든 프로젝트를 하나의 커밋으로)
+3) Dockerfile + Manifest + CI 커밋       (워커 풀, 프로젝트당 커밋 1개)
+
+Agent 권한이 먼저 반영되어야 CI 파이프라인의 deploy Job 이 클러스터에 접근할 수 있으므로
+생성한 Dockerfile 은 2) 이후 Manifest 와 같은 커밋으로 올린다.
+"""
+import asyncio
+import os
+import time
+import uuid
+
+from app.models.batch_models import BatchProject, BatchRequest
+from app.models.deploy_models import DeploymentSpec
+from app.services.cache import TTLCache
+from app.services.generation_cache import get_generation_cache
+from app.services.gitlab_client import get_gateway
+from app.services.llm_client import chat_completion
+from app.services.onboarding import (
+    DEFAULT_AGENT_PROJECT,
+    build_deployment_files,
+    detect_stack,
+    dockerfile_cache_key,
+    dockerfile_prompt,
+    grant_agent_access,
+    project_path,
+    stale_manifests,
+    template_dockerfile,
+)
+from app.services.rate_limit import lane
+from app.services.telemetry import logger
+
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", "8"))       # 동시에 처리하는 프로젝트 수 상한
+BATCH_MAX_JOBS = int(os.environ.get("BATCH_MAX_JOBS", "100"))           # 결과를 보관하는 배치 작업 수
+BATCH_RESULT_TTL = float(os.environ.get("BATCH_RESULT_TTL", "86400"))   # 배치 결과 보관 시간(초)
+
+
+class BatchItem:
+    """프로젝트 1개의 진행 상태"""
+
+    def __init__(self, index: int, spec: BatchProject):
+        self.index = index
+        self.spec = spec
+        self.status = "pending"   # pending -> running -> done | failed
+        self.step = None          # 현재(실패 시 마지막) 단계: project | dockerfile | agent | commit
+        self.error = None
+        self.project = None
+        self.dockerfile = None    # 새로 커밋할 Dockerfile 내용 (이미 있으면 None)
+        self.dockerfile_source = None  # template | gpt
+        self.fingerprint = None   # Dockerfile 을 만들 때 판별한 스택
+        self.files = {}           # 커밋 결과 {파일 경로: created|updated}
+
+    def fail(self, error: Exception):
+        self.status = "failed"
+        self.error = str(error)
+        logger.warning("batch_project_failed", extra={"url": self.spec.url, "step": self.step, "error": self.error})
+
+    def as_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "url": self.spec.url,
+            "project": self.project["path_with_namespace"] if self.project else None,
+            "status": self.status,
+            "step": self.step,
+            "error": self.error,
+            "stack": self.fingerprint.describe() if self.fingerprint and self.fingerprint.runtime else None,
+            "dockerfile": self.dockerfile_source,
+            "files": self.files,
+        }
+
+
+class BatchJob:
+    def __init__(self, request: BatchRequest):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status = "queued"    # queued -> running -> done
+        self.created_at = time.time()
+        self.finished_at = None
+        self.agent = None         # grant_agent_access 결과
+        self.items = [BatchItem(i, spec) for i, spec in enumerate(request.projects)]
+        self._dockerfiles = {}    # 캐시 키 -> 생성 task (같은 언어는 한 번만 생성)
+
+    def as_dict(self) -> dict:
+        counts = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return {
+            "batch_id": self.id,
+            "status": self.status,
+            "total": len(self.items),
+            "counts": counts,
+            "agent": self.agent,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "projects": [item.as_dict() for item in self.items],
+        }
+
+
+async def run_pool(items: list, worker, size: int):
+    """items 를 최대 size 개의 워커가 나눠서 처리 (worker 는 예외를 직접 처리해야 함)"""
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    async def drain():
+        while not queue.empty():
+            await worker(queue.get_nowait())
+
+    await asyncio.gather(*(drain() for _ in range(min(size, len(items)))))
+
+
+async def _generate_dockerfile(language: str, regenerate: bool) -> str:
+    cache = get_generation_cache()
+    key = dockerfile_cache_key(language)
+    if cache is not None and not regenerate:
+        content = await cache.get(key)
+        if content is not None:
+            return content
+    response = await chat_completion(
+        model="gpt-4o", messages=[{"role": "user", "content": dockerfile_prompt(language)}], temperature=0.7
+    )
+    content = response.choices[0].message.content
+    if cache is not None:
+        await cache.put(key, "dockerfile", content)
+    return content
+
+
+async def _prepare(job: BatchJob, item: BatchItem):
+    """프로젝트 조회 후 Dockerfile 이 없으면 내용 생성 (커밋은 3단계에서)"""
+    gateway = get_gateway()
+    item.status = "running"
+    try:
+        item.step = "project"
+        item.project = await gateway.get_project(project_path(item.spec.url))
+        branch = item.project.get("default_branch") or "main"
+
+        item.step = "dockerfile"
+        if not await gateway.file_exists(item.project["id"], "Dockerfile", branch):
+            item.fingerprint = await detect_stack(item.project["id"], branch)
+            language = item.spec.language or item.fingerprint.language
+            # 판별한 스택과 같은 언어면 템플릿, 모르는 스택이거나 다른 언어를 지정했으면 GPT (같은 언어는 한 번만)
+            if language.lower() == item.fingerprint.language.lower():
+                item.dockerfile = template_dockerfile(item.fingerprint)
+            if item.dockerfile is not None:
+                item.dockerfile_source = "template"
+                return
+            item.dockerfile_source = "gpt"
+            key = dockerfile_cache_key(language)
+            if key not in job._dockerfiles:
+                job._dockerfiles[key] = asyncio.ensure_future(_generate_dockerfile(language, job.request.regenerate))
+            item.dockerfile = await job._dockerfiles[key]
+    except Exception as e:
+        item.fail(e)
+
+
+async def _commit(job: BatchJob, item: BatchItem):
+    """Dockerfile(필요 시) + Manifest + .gitlab-ci.yml 을 프로젝트당 하나의 커밋으로 반영"""
+    request = job.request
+    try:
+        item.step = "commit"
+        branch = item.project.get("default_branch") or "main"
+        requirements = item.spec.deployment.model_dump()
+        if item.fingerprint and item.fingerprint.port and "container_port" not in item.spec.deployment.model_fields_set:
+            requirements["container_port"] = item.fingerprint.port  # 지정하지 않았으면 판별한 앱 포트
+        spec = DeploymentSpec(app_name=item.project["path"], namespace=item.spec.namespace, **requirements)
+        files = build_deployment_files(spec, request.agent_path or DEFAULT_AGENT_PROJECT, request.agent_name, branch)
+        if item.dockerfile is not None:
+            files = {"Dockerfile": item.dockerfile, **files}
+        item.files = await get_gateway().commit_files(
+            item.project["id"], branch, files, "Add Dockerfile, Kubernetes manifests and GitLab CI pipeline with Agent",
+            delete=stale_manifests(files),
+        )
+        item.status = "done"
+    except Exception as e:
+        item.fail(e)
+
+
+async def run_batch(job: BatchJob):
+    request = job.request
+    workers = min(request.concurrency or BATCH_MAX_WORKERS, BATCH_MAX_WORKERS)
+    job.status = "running"
+    # 대화 중인 사용자의 호출이 먼저 처리되도록 배치의 GPT/GitLab 호출은 batch 레인으로 한도를 기다린다
+    with lane("batch"):
+        try:
+            await run_pool(job.items, lambda item: _prepare(job, item), workers)
+
+            ready = [item for item in job.items if item.status == "running"]
+            if ready:
+                for item in ready:
+                    item.step = "agent"
+                agent_path = request.agent_path or DEFAULT_AGENT_PROJECT
+                try:
+                    agent_project = await get_gateway().get_project(agent_path)
+                    paths = list(dict.fromkeys(item.project["path_with_namespace"] for item in ready))
+                    job.agent = await grant_agent_access(
+                        request.agent_name, paths, agent_project.get("default_branch") or "main", agent_path
+                    )
+                except Exception as e:
+                    for item in ready:
+                        item.fail(e)
+                    ready = []
+
+            await run_pool(ready, lambda item: _commit(job, item), workers)
+        finally:
+            for task in job._dockerfiles.values():
+                task.cancel()
+            job._dockerfiles.clear()
+            job.status = "done"
+            job.finished_at = time.time()
+
+
+class BatchManager:
+    """배치 작업 생성/조회. 실행 중인 task 는 종료 시 취소할 수 있도록 보관한다."""
+
+    def __init__(self):
+        self.jobs = TTLCache(BATCH_MAX_JOBS, BATCH_RESULT_TTL)
+        self._tasks = set()
+
+    def submit(self, request: BatchRequest) -> BatchJob:
+        job = BatchJob(request)
+        self.jobs.set(job.id, job)
+        task = asyncio.create_task(run_batch(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, batch_id: str):
+        return self.jobs.get(batch_id)
+
+    async def aclose(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+batch_manager = BatchManager()
@@ -0,0 +1,131 @@
+"""
+공유 클라이언트/저장소의 수명 관리와 readiness 확인.
+
+각 서비스 모듈은 get_x() 로 최초 사용 시 싱글턴을 만든다 (설정은 각 모듈의 환경변수 상수).
+여기서는 그 싱글턴들을
+- 서버가 요청을 받기 시작한 뒤 백그라운드에서 미리 만들어 두고 (warm_up, 시작을 막지 않음)
+- 종료 시 한 곳에서 정리하며 (aclose)
+- /health/ready 용으로 짧은 타임아웃 안에서 상태(OpenAI 설정, GitLab, 세션 저장소, 작업 큐)를 확인한다.
+  warm_up 완료는 기다리지 않는다 (LLM 을 쓰지 않는 요청까지 openai import 시간만큼 늦추지 않도록).
+  성공 결과는 READINESS_CACHE_TTL 동안 재사용하고, 실패 결과는 다음 probe 에서 바로 다시 확인한다.
+"""
+import asyncio
+import importlib
+import os
+import time
+
+from app.services import generation_cache, gitlab_client, llm_client
+from app.services.gitlab_client import get_gateway
+from app.services.job_queue import get_job_queue
+from app.services.session_store import get_session_store
+from app.services.telemetry import logger
+
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "true").lower() != "false"  # 시작 직후 백그라운드 초기화
+READINESS_TIMEOUT = float(os.environ.get("READINESS_TIMEOUT", "2"))          # 의존성 확인 1건당 타임아웃(초)
+READINESS_CACHE_TTL = float(os.environ.get("READINESS_CACHE_TTL", "5"))      # probe 마다 GitLab 을 두드리지 않도록
+
+_readiness = None  # (확인 시각, 성공 결과)
+_readiness_task = None
+
+
+async def warm_up():
+    """
+    첫 요청이 초기화 비용을 떠안지 않도록 공유 클라이언트를 미리 만든다.
+    openai import 는 동기 작업이라 스레드에서 불러오고, 실패해도 첫 사용 시 다시 시도되므로 로그만 남긴다.
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(importlib.import_module, "openai")
+        if llm_client.OPENAI_API_KEY:
+            llm_client.get_client()
+        get_gateway()
+        await get_session_store().ping()
+        await asyncio.to_thread(generation_cache.get_generation_cache)
+    except Exception as e:
+        # 실패한 의존성은 readiness 의 해당 항목에서 드러난다
+        logger.warning("warm_up_failed", extra={"error": repr(e)})
+        return
+    logger.info("warm_up_done", extra={"duration_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+
+async def _check_openai():
+    if not llm_client.OPENAI_API_KEY:
+        raise RuntimeError("환경변수 OPENAI_API_KEY 가 설정되지 않았습니다. K8s secretMount 확인 필요")
+
+
+async def _check_gitlab():
+    if not gitlab_client.GITLAB_TOKEN:
+        raise RuntimeError("환경변수 GITLAB_TOKEN 이 설정되지 않았습니다.")
+    await get_gateway().get_version()
+
+
+async def _check_session_store():
+    await get_session_store().ping()
+
+
+async def _check_job_queue():
+    await get_job_queue().ping()
+
+
+CHECKS = {
+    "openai": _check_openai,
+    "gitlab": _check_gitlab,
+    "session_store": _check_session_store,
+    "job_queue": _check_job_queue,
+}
+
+
+async def _run_check(check) -> dict:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(check(), READINESS_TIMEOUT)
+    except asyncio.TimeoutError:
+        result = {"ok": False, "error": f"{READINESS_TIMEOUT}초 안에 응답 없음"}
+    except Exception as e:
+        result = {"ok": False, "error": str(e) or repr(e)}
+    else:
+        result = {"ok": True}
+    result["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+async def _check_all() -> dict:
+    results = await asyncio.gather(*(_run_check(check) for check in CHECKS.values()))
+    checks = dict(zip(CHECKS, results))
+    return {"ready": all(r["ok"] for r in results), "checks": checks}
+
+
+async def readiness() -> dict:
+    """
+    {"ready": bool, "checks": {이름: {"ok", "error"?, "duration_ms"}}} 반환.
+    최근 성공 결과가 있으면 재사용하고, 동시에 들어온 probe 는 진행 중인 확인 하나를 같이 기다린다.
+    """
+    global _readiness, _readiness_task
+    now = time.monotonic()
+    if _readiness is not None and now - _readiness[0] < READINESS_CACHE_TTL:
+        return _readiness[1]
+    if _readiness_task is None:
+        _readiness_task = asyncio.ensure_future(_check_all())
+    task = _readiness_task
+    try:
+        result = await asyncio.shield(task)
+    finally:
+        if _readiness_task is task and task.done():
+            _readiness_task = None
+    if result["ready"]:
+        _readiness = (time.monotonic(), result)
+    return result
+
+
+async def aclose():
+    """공유 커넥션 풀/저장소 정리 (lifespan 종료 시)"""
+    global _readiness, _readiness_task
+    if _readiness_task is not None:
+        _readiness_task.cancel()
+        _readiness_task = None
+    _readiness = None
+    await llm_client.aclose()
+    await gitlab_client.aclose()
+    await get_session_store().aclose()
+    await get_job_queue().aclose()
+    generation_cache.close()
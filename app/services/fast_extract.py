@@ -0,0 +1,207 @@
+"""
+GPT 호출 없이 짧은 사용자 메시지에서 값을 뽑아내는 규칙 기반 추출기.
+
+각 추출기는 Extraction(value, confidence)을 반환하고, confidence 가
+FAST_PATH_MIN_CONFIDENCE 이상일 때만 호출 측에서 GPT 를 건너뛴다.
+"""
+import os
+import re
+from dataclasses import dataclass
+
+FAST_PATH_ENABLED = os.environ.get("FAST_PATH_ENABLED", "true").lower() != "false"
+FAST_PATH_MIN_CONFIDENCE = float(os.environ.get("FAST_PATH_MIN_CONFIDENCE", "0.8"))
+
+URL_RE = re.compile(r"https?://[^\s\"'<>()\[\]{}]+")
+# Kubernetes DNS-1123 label (소문자/숫자/'-', 최대 63자)
+DNS1123_LABEL_RE = re.compile(r"^[a-z0-9]([-a-z0-9]{0,61}[a-z0-9])?$")
+TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+# 이름 후보에서 제외할 설명용 단어
+NAME_STOPWORDS = {"agent", "namespace", "name", "gitlab", "kubernetes", "is", "the", "my", "ns", "use"}
+DEFAULT_NAMESPACE_WORDS = {"기본", "기본값", "디폴트", "default", "기본으로", "기본값으로"}
+
+AFFIRMATIVE = {
+    "예", "네", "넵", "넹", "네네", "응", "어", "ㅇㅇ", "ㅇ", "그래", "그래요", "좋아", "좋아요", "좋습니다",
+    "맞아", "맞아요", "맞습니다", "진행", "진행해", "진행해줘", "진행해주세요", "생성", "생성해", "생성해줘",
+    "생성해주세요", "만들어줘", "만들어주세요", "해줘", "해주세요", "부탁해", "부탁합니다",
+    "yes", "y", "yep", "yeah", "ok", "okay", "sure", "agree",
+}
+NEGATIVE = {
+    "아니오", "아니요", "아니", "아뇨", "ㄴㄴ", "ㄴ", "싫어", "싫어요", "안해", "안해요", "하지마", "필요없어",
+    "필요없어요", "필요없습니다", "no", "n", "nope", "nah", "disagree",
+}
+# Dockerfile 생성 단계에서 사용자가 언어를 직접 지정한 경우
+LANGUAGES = {
+    "python": "Python", "파이썬": "Python",
+    "java": "Java", "자바": "Java",
+    "kotlin": "Kotlin", "코틀린": "Kotlin",
+    "node": "Node.js", "node.js": "Node.js", "nodejs": "Node.js", "노드": "Node.js",
+    "javascript": "JavaScript", "typescript": "TypeScript",
+    "go": "Go", "golang": "Go", "고랭": "Go",
+    "rust": "Rust", "러스트": "Rust",
+    "ruby": "Ruby", "루비": "Ruby",
+    "php": "PHP",
+    "c#": "C#", ".net": "C#", "dotnet": "C#",
+}
+# 일반 단어로도 쓰여("go ahead", "let's go") 메시지 전체이거나 "~로/~으로/~기반" 이 붙을 때만 언어로 본다
+AMBIGUOUS_LANGUAGES = {"go"}
+# 이런 단어가 있으면 언어/응답을 뒤집을 수 있으므로 ("python 말고", "not java", "파이썬으로 하지 마") GPT 로 해석
+NEGATION_WORDS = ("말고", "빼고", "대신", "제외", "않", "싫", "하지마", "하지 마", "하지말", "하지 말",
+                  "not", "don't", "dont", "instead", "except", "without")
+# 띄어 쓴 부정 부사 ("python 안 해", "java 못 써"). "안녕", "안내" 같은 단어는 제외
+NEGATION_ADVERB_RE = re.compile(r"(^|\s)(안|못)(\s|$|해|할|함|돼|됨|써|쓸)")
+# 긴 문장 안에서는 다른 뜻일 수 있는 짧은 응답 ("no problem", "y축")
+AMBIGUOUS_ANSWERS = {"no", "n", "y", "ㄴ", "ㅇ", "어"}
+
+
+@dataclass
+class Extraction:
+    value: object
+    confidence: float
+
+    @property
+    def confident(self) -> bool:
+        return FAST_PATH_ENABLED and self.confidence >= FAST_PATH_MIN_CONFIDENCE
+
+
+def _normalize(message: str) -> str:
+    return re.sub(r"[\s.,!?~^]+", " ", message.strip().lower()).strip()
+
+
+def extract_gitlab_url(message: str, gitlab_url: str) -> Extraction:
+    """메시지에서 GitLab 프로젝트 URL 추출. GITLAB_URL 로 시작하는 URL 이 하나면 확정"""
+    urls = [u.rstrip(".,;:!?'\"") for u in URL_RE.findall(message)]
+    if not urls:
+        return Extraction(None, 0.0)
+    ours = [u for u in urls if u.startswith(gitlab_url.rstrip("/") + "/")]
+    if len(ours) == 1:
+        return Extraction(ours[0], 1.0)
+    if len(urls) == 1:
+        # 다른 도메인이라도 URL 이 하나뿐이면 그대로 사용 (get_gitlab_project 에서 경로만 추림)
+        return Extraction(urls[0], 0.9)
+    return Extraction(None, 0.3)
+
+
+def extract_k8s_name(message: str, default: str = None) -> Extraction:
+    """메시지에서 DNS-1123 형식의 이름(Agent/네임스페이스) 하나를 추출"""
+    normalized = _normalize(message)
+    if not normalized or normalized in DEFAULT_NAMESPACE_WORDS:
+        return Extraction(default, 1.0 if default else 0.0)
+
+    stripped = message.strip().strip("`'\"")
+    if DNS1123_LABEL_RE.match(stripped):
+        return Extraction(stripped, 1.0)
+
+    candidates = [
+        t.rstrip(".-_") for t in TOKEN_RE.findall(message)
+        if t.lower() not in NAME_STOPWORDS
+    ]
+    valid = [c for c in candidates if DNS1123_LABEL_RE.match(c)]
+    if len(candidates) == 1 and len(valid) == 1:
+        return Extraction(valid[0], 0.9)
+    if default and not candidates and any(word in normalized for word in DEFAULT_NAMESPACE_WORDS):
+        return Extraction(default, 0.9)
+    return Extraction(None, 0.3)
+
+
+def classify_yes_no(message: str) -> Extraction:
+    """한국어/영어 긍정·부정 응답 분류 -> "AGREE" | "DISAGREE" """
+    normalized = _normalize(message)
+    if normalized in AFFIRMATIVE:
+        return Extraction("AGREE", 1.0)
+    if normalized in NEGATIVE:
+        return Extraction("DISAGREE", 1.0)
+
+    words = normalized.split(" ")
+    yes = [w for w in words if w in AFFIRMATIVE]
+    no = [w for w in words if w in NEGATIVE]
+    if yes and no or not (yes or no):
+        return Extraction(None, 0.0)
+    # 긴 문장 안의 "no" 같은 짧은 단어 하나만으로는 확정하지 않는다
+    confidence = 0.5 if all(w in AMBIGUOUS_ANSWERS for w in yes + no) else 0.8
+    return Extraction("AGREE" if yes else "DISAGREE", confidence)
+
+
+def _has_negation(normalized: str) -> bool:
+    """한국어 부정어는 앞 단어에 붙어 쓰이므로("python말고") 부분 문자열로, 영어는 단어 단위로 찾는다"""
+    return bool(NEGATION_ADVERB_RE.search(normalized)) or any(
+        word in normalized if not word.isascii() else re.search(rf"(^|[^a-z']){re.escape(word)}($|[^a-z'])", normalized)
+        for word in NEGATION_WORDS
+    )
+
+
+def classify_dockerfile_answer(message: str) -> Extraction:
+    """
+    Dockerfile 생성 여부 질문에 대한 응답 분류.
+    GPT 프롬프트와 같은 형식({"status": ..., "language": ...})으로 반환한다.
+    """
+    normalized = _normalize(message)
+    if _has_negation(normalized):
+        return Extraction(None, 0.0)
+    # 언어 이름은 "."(".net", "node.js")을 지우기 전의 문장에서 찾는다 (문장 끝의 "." 은 구분자로 취급)
+    text = re.sub(r"[\s,!?~^]+", " ", message.strip().lower()).strip().rstrip(".")
+    languages = set()
+    for key, canonical in LANGUAGES.items():
+        suffix = r"(로|으로|\s?기반)" if key in AMBIGUOUS_LANGUAGES else r"($|[\s).]|로|으로|기반)"
+        if text == key or re.search(rf"(^|[\s(]){re.escape(key)}{suffix}", text):
+            languages.add(canonical)
+    if len(languages) == 1:
+        return Extraction({"status": "DISAGREE", "language": languages.pop()}, 0.9)
+    if len(languages) > 1:
+        return Extraction(None, 0.0)
+
+    answer = classify_yes_no(message)
+    if answer.value == "AGREE":
+        return Extraction({"status": "AGREE"}, answer.confidence)
+    if answer.value == "DISAGREE":
+        return Extraction({"status": "DISAGREE", "language": "DISAGREE"}, answer.confidence)
+    return Extraction(None, 0.0)
+
+
+# 재배포 시 일부 요구사항만 바꾸는 짧은 요청 (예: "레플리카 3개로", "메모리 1Gi로 바꿔줘", "cpu 500m")
+_PARTICLE = r"\s*(?:를|을|는|은|만|도|:|=)?\s*"
+_QUANTITY = r"(\d+(?:\.\d+)?(?:ki|mi|gi|ti))"
+REQUIREMENT_PATTERNS = {
+    "replicas": re.compile(rf"(?:replicas?|레플리카|리플리카|파드|pods?)\s*(?:수|개수)?{_PARTICLE}(\d+)\s*(?:개|대)?"),
+    "cpu": re.compile(rf"cpu{_PARTICLE}(\d+(?:\.\d+)?m?)(?![a-z])"),
+    "memory": re.compile(rf"(?:memory|메모리|mem){_PARTICLE}{_QUANTITY}"),
+    "storage_size": re.compile(rf"(?:storage|스토리지|저장소|디스크)\s*(?:크기|용량)?{_PARTICLE}{_QUANTITY}"),
+    "container_port": re.compile(rf"(?:내부|컨테이너|container)\s*(?:포트|port){_PARTICLE}(\d{{2,5}})"),
+    "service_port": re.compile(rf"(?:외부|서비스|service)\s*(?:포트|port){_PARTICLE}(\d{{2,5}})"),
+}
+QUANTITY_UNITS = {"ki": "Ki", "mi": "Mi", "gi": "Gi", "ti": "Ti"}
+INT_REQUIREMENTS = {"replicas", "container_port", "service_port"}
+# 바꿀 값 외에 남아도 되는 단어 (이 외의 내용이 있으면 GPT 로 해석)
+CHANGE_FILLER = {
+    "로", "으로", "로만", "으로만", "만", "그리고", "및", "와", "과", "랑", "하고",
+    "변경", "변경해", "변경해줘", "변경해주세요", "바꿔", "바꿔줘", "바꿔주세요", "수정", "수정해줘", "수정해주세요",
+    "늘려", "늘려줘", "늘려주세요", "줄여", "줄여줘", "줄여주세요", "설정", "설정해줘", "설정해주세요",
+    "해줘", "해주세요", "해", "주세요", "재배포", "재배포해줘", "다시", "배포", "배포해줘",
+    "set", "change", "scale", "to", "and", "please", "update",
+}
+
+
+def extract_requirement_changes(message: str) -> Extraction:
+    """
+    배포 요구사항 중 바꿀 항목만 추출 -> {필드: 값}.
+    인식한 항목 외에 다른 내용이 없을 때만 확정 (나머지는 GPT 가 해석)
+    """
+    text = message.strip().lower()
+    changes = {}
+    for field, pattern in REQUIREMENT_PATTERNS.items():
+        match = pattern.search(text)
+        if not match:
+            continue
+        value = match.group(1)
+        if field in INT_REQUIREMENTS:
+            value = int(value)
+        elif value[-2:] in QUANTITY_UNITS:
+            value = value[:-2] + QUANTITY_UNITS[value[-2:]]
+        changes[field] = value
+        text = text[:match.start()] + " " + text[match.end():]
+    if not changes:
+        return Extraction(None, 0.0)
+    rest = [word for word in _normalize(text).split(" ") if word]
+    if all(word in CHANGE_FILLER for word in rest):
+        return Extraction(changes, 0.9)
+    return Extraction(changes, 0.3)
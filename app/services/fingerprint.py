@@ -0,0 +1,471 @@
+"""
+GPT 호출 없이 레포지토리의 런타임/프레임워크/진입점/포트를 판별하는 fingerprint 엔진.
+
+브랜치 HEAD 커밋 기준으로 루트 디렉터리 트리를 한 번 조회하고 (루트에 매니페스트가 없으면
+하위 디렉터리 한 단계까지), requirements.txt / pyproject.toml / package.json / go.mod /
+pom.xml / build.gradle 같은 매니페스트 파일만 읽어서 판별한다.
+결과는 (프로젝트, 커밋 SHA) 별로 캐시하므로 같은 커밋을 다시 분석하지 않는다.
+판별한 스택은 미리 준비한 Dockerfile 템플릿으로 바로 렌더링하고, 모르는 스택만 GPT 로 생성한다.
+"""
+import asyncio
+import json
+import os
+import posixpath
+import re
+import tomllib
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from app.services.cache import TTLCache
+from app.services.gitlab_client import GitLabError, get_gateway
+from app.services.task_graph import TaskGraph
+from app.services.telemetry import timed
+
+FINGERPRINT_CACHE_SIZE = int(os.environ.get("FINGERPRINT_CACHE_SIZE", "10000"))
+FINGERPRINT_CACHE_TTL = float(os.environ.get("FINGERPRINT_CACHE_TTL", str(7 * 86400)))  # 커밋 단위라 길게 보관
+FINGERPRINT_MAX_SUBDIRS = int(os.environ.get("FINGERPRINT_MAX_SUBDIRS", "5"))  # 루트에 매니페스트가 없을 때 살펴볼 하위 디렉터리 수
+FINGERPRINT_MAX_FILE_SIZE = 256 * 1024  # 이보다 큰 매니페스트는 읽지 않음 (생성된 lock 파일 등)
+
+DEFAULT_VERSIONS = {"python": "3.12", "node": "20", "go": "1.22", "java": "17"}
+
+# 스택을 결정하는 매니페스트 (우선순위 순)
+MANIFESTS = {
+    "pyproject.toml": "python",
+    "requirements.txt": "python",
+    "Pipfile": "python",
+    "package.json": "node",
+    "go.mod": "go",
+    "pom.xml": "java",
+    "build.gradle": "java",
+    "build.gradle.kts": "java",
+    # 템플릿이 없는 스택: 언어만 알려주고 GPT 로 생성
+    "Gemfile": "ruby",
+    "Cargo.toml": "rust",
+    "composer.json": "php",
+    "mix.exs": "elixir",
+}
+# 판별에 함께 읽는 보조 파일
+AUXILIARY_FILES = ("manage.py", "Procfile", ".python-version", "runtime.txt", ".nvmrc")
+
+LANGUAGE_NAMES = {
+    "python": "Python", "node": "Node.js", "go": "Go", "java": "Java",
+    "ruby": "Ruby", "rust": "Rust", "php": "PHP", "elixir": "Elixir",
+}
+
+PYTHON_FRAMEWORKS = ("django", "fastapi", "flask", "streamlit")
+NODE_FRAMEWORKS = {"next": "next", "@nestjs/core": "nest", "express": "express", "fastify": "fastify",
+                   "koa": "koa", "@hapi/hapi": "hapi"}
+GO_FRAMEWORKS = {"github.com/gin-gonic/gin": "gin", "github.com/labstack/echo": "echo",
+                 "github.com/gofiber/fiber": "fiber", "github.com/go-chi/chi": "chi"}
+
+PORT_RE = re.compile(r"(?:--port[= ]|-p |PORT=|--server\.port[= ]|:)(\d{2,5})\b")
+VERSION_RE = re.compile(r"(\d+)(?:\.(\d+))?")
+
+
+@dataclass
+class Fingerprint:
+    runtime: Optional[str] = None              # python | node | go | java (템플릿 있음) / ruby 등 (템플릿 없음) / None
+    language: Optional[str] = None             # 표시용 언어 이름 (예: Python, TypeScript)
+    framework: Optional[str] = None            # fastapi, django, next, gin, spring-boot ...
+    version: Optional[str] = None              # 베이스 이미지 태그에 쓸 런타임 버전
+    package_manager: Optional[str] = None      # pip | poetry | pyproject | npm | yarn | pnpm | go | maven | gradle
+    entry_point: Optional[str] = None          # main:app, server.js, ./cmd/api ...
+    command: list = field(default_factory=list)  # 컨테이너 실행 명령 (exec form)
+    port: Optional[int] = None
+    root: str = ""                             # 매니페스트가 있는 디렉터리 (레포 루트면 "")
+    build: bool = False                        # node: build 스크립트 실행 필요
+    lockfile: Optional[str] = None
+    extra_packages: list = field(default_factory=list)  # 의존성에 없어서 추가로 설치할 실행 서버 (gunicorn 등)
+    manifests: list = field(default_factory=list)
+    commit: Optional[str] = None
+
+    @property
+    def template(self) -> Optional[str]:
+        """사용할 Dockerfile 템플릿 이름. 템플릿으로 만들 수 없는 스택이면 None"""
+        if self.runtime == "python" and self.command and self.package_manager in ("pip", "poetry", "pyproject"):
+            return "python"
+        if self.runtime == "node" and self.command:
+            return "node"
+        if self.runtime == "go" and self.entry_point:
+            return "go"
+        if self.runtime == "java" and self.framework == "spring-boot":
+            return self.package_manager  # maven | gradle
+        return None
+
+    def describe(self) -> str:
+        """사용자 안내용 요약 (예: Python 3.12 / fastapi, 진입점 main:app, 포트 8000)"""
+        text = f"{self.language} {self.version or ''}".strip()
+        if self.framework:
+            text += f" / {self.framework}"
+        details = []
+        if self.entry_point:
+            details.append(f"진입점 {self.entry_point}")
+        if self.port:
+            details.append(f"포트 {self.port}")
+        if self.root:
+            details.append(f"경로 {self.root}/")
+        return f"{text} ({', '.join(details)})" if details else text
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+# -------------------------------
+# 버전 / 포트 파싱
+# -------------------------------
+def _major_minor(text: str) -> Optional[tuple]:
+    match = VERSION_RE.search(text or "")
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def python_version(spec) -> Optional[str]:
+    """
+    requires-python / poetry 의 python 제약에서 베이스 이미지 버전 선택.
+    minor 까지 고정(==3.10, 3.10.*, poetry 의 3.10 / ~3.10)이면 그 버전,
+    아니면 기본 버전이 범위 안에 있을 때 기본 버전, 아니면 하한부터 올라가며 처음 허용되는 버전.
+    != 로 제외한 minor 버전(!=3.9.*, !=3.9)은 고르지 않는다.
+    """
+    if isinstance(spec, dict):  # poetry: python = {version = "^3.10"}
+        spec = spec.get("version")
+    if not spec or not isinstance(spec, str):
+        return None
+    default = _major_minor(DEFAULT_VERSIONS["python"])
+    lower = upper = None
+    upper_inclusive = False
+    excluded = set()
+    for op, version, wildcard in re.findall(r"(==|~=|!=|>=|<=|\^|~|>|<)?\s*(\d+(?:\.\d+)*)(\.\*)?", spec):
+        parsed = _major_minor(version)
+        patch = version.count(".") >= 2 and int(version.rsplit(".", 1)[1]) > 0
+        if op == "!=":
+            if wildcard or not patch:  # 3.9.1 만 제외하면 3.9 이미지는 그대로 쓸 수 있다
+                excluded.add(parsed)
+        elif op in ("==", "~", ""):
+            return "%d.%d" % parsed
+        elif op in (">=", ">", "~=", "^"):
+            lower = parsed
+        elif op in ("<", "<="):
+            # <=3.12, <3.12.1 은 3.12 를 포함한다
+            upper, upper_inclusive = parsed, op == "<=" or patch
+
+    def allowed(candidate: tuple) -> bool:
+        return ((lower is None or lower <= candidate) and candidate not in excluded
+                and (upper is None or candidate < upper or (upper_inclusive and candidate == upper)))
+
+    if allowed(default):
+        return DEFAULT_VERSIONS["python"]
+    if lower is None:
+        return None
+    candidate = lower
+    while candidate[1] < lower[1] + 20 and not allowed(candidate) and (upper is None or candidate < upper):
+        candidate = (candidate[0], candidate[1] + 1)
+    return "%d.%d" % (candidate if allowed(candidate) else lower)
+
+
+def find_port(text: str) -> Optional[int]:
+    match = PORT_RE.search(text or "")
+    if match and 1 <= int(match.group(1)) <= 65535:
+        return int(match.group(1))
+    return None
+
+
+def _requirement_name(line: str) -> Optional[str]:
+    line = line.split("#", 1)[0].strip()
+    if not line or line.startswith("-"):
+        return None
+    return re.split(r"[\s<>=!~\[;@]", line, 1)[0].lower().replace("_", "-")
+
+
+# -------------------------------
+# 스택별 판별
+# -------------------------------
+def _first_existing(candidates, paths: set) -> Optional[str]:
+    return next((c for c in candidates if c in paths), None)
+
+
+def _table(value) -> dict:
+    """매니페스트의 표/객체 값. 사용자가 작성한 파일이라 모양이 다르면(null, 문자열 등) 빈 dict"""
+    return value if isinstance(value, dict) else {}
+
+
+def _strings(value) -> list:
+    """매니페스트의 문자열 목록 값. 목록이 아니거나 문자열이 아닌 항목은 무시"""
+    return [item for item in value if isinstance(item, str)] if isinstance(value, list) else []
+
+
+def detect_python(fp: Fingerprint, files: dict, paths: set):
+    deps = set()
+    if "requirements.txt" in files:
+        fp.package_manager = "pip"
+        deps.update(filter(None, map(_requirement_name, files["requirements.txt"].splitlines())))
+    if "pyproject.toml" in files:
+        try:
+            pyproject = tomllib.loads(files["pyproject.toml"])
+        except tomllib.TOMLDecodeError:
+            pyproject = {}
+        project = _table(pyproject.get("project"))
+        poetry = _table(_table(pyproject.get("tool")).get("poetry"))
+        poetry_deps = _table(poetry.get("dependencies"))
+        deps.update(filter(None, map(_requirement_name, _strings(project.get("dependencies")))))
+        deps.update(name.lower() for name in poetry_deps if name.lower() != "python")
+        fp.version = python_version(project.get("requires-python") or poetry_deps.get("python"))
+        if poetry and "poetry.lock" in paths:
+            fp.package_manager, fp.lockfile = "poetry", "poetry.lock"
+        elif fp.package_manager is None:
+            fp.package_manager = "pyproject"
+    if "Pipfile" in paths and fp.package_manager is None:
+        fp.package_manager = "pipenv"  # 템플릿 없음 -> GPT
+
+    for name in (".python-version", "runtime.txt"):
+        if name in files and _major_minor(files[name]):
+            fp.version = "%d.%d" % _major_minor(files[name])
+    fp.version = fp.version or DEFAULT_VERSIONS["python"]
+
+    fp.framework = next((f for f in PYTHON_FRAMEWORKS if f in deps), None)
+    if fp.framework == "django" and "manage.py" in paths:
+        match = re.search(r"DJANGO_SETTINGS_MODULE['\"],\s*['\"]([\w.]+)\.settings", files.get("manage.py", ""))
+        project_module = match.group(1) if match else None
+        if project_module:
+            fp.entry_point = f"{project_module}.wsgi:application"
+            fp.port = 8000
+            fp.command = ["gunicorn", "--bind", "0.0.0.0:8000", fp.entry_point]
+    elif fp.framework in ("fastapi", "flask"):
+        entry = _first_existing(("main.py", "app.py", "server.py", "app/main.py", "src/main.py", "wsgi.py"), paths)
+        if entry:
+            module = entry[:-3].replace("/", ".")
+            fp.entry_point = f"{module}:app"
+            fp.port = 8000
+            if fp.framework == "fastapi":
+                fp.command = ["uvicorn", fp.entry_point, "--host", "0.0.0.0", "--port", "8000"]
+            else:
+                fp.command = ["gunicorn", "--bind", "0.0.0.0:8000", fp.entry_point]
+    elif fp.framework == "streamlit":
+        entry = _first_existing(("streamlit_app.py", "app.py", "main.py"), paths)
+        if entry:
+            fp.entry_point = entry
+            fp.port = 8501
+            fp.command = ["streamlit", "run", entry, "--server.port", "8501", "--server.address", "0.0.0.0"]
+    else:
+        entry = _first_existing(("main.py", "app.py", "server.py", "run.py"), paths)
+        if entry:
+            fp.entry_point = entry
+            fp.command = ["python", entry]
+
+    if fp.command and fp.command[0] in ("gunicorn", "uvicorn") and fp.command[0] not in deps:
+        fp.extra_packages.append(fp.command[0])
+
+
+def detect_node(fp: Fingerprint, files: dict, paths: set):
+    try:
+        package = json.loads(files["package.json"])
+    except (KeyError, ValueError):
+        return
+    if not isinstance(package, dict):
+        return
+    deps = {**_table(package.get("devDependencies")), **_table(package.get("dependencies"))}
+    scripts = {name: command for name, command in _table(package.get("scripts")).items() if isinstance(command, str)}
+
+    fp.language = "TypeScript" if "tsconfig.json" in paths or "typescript" in deps else "Node.js"
+    fp.framework = next((name for dep, name in NODE_FRAMEWORKS.items() if dep in deps), None)
+    engines = _table(package.get("engines")).get("node")
+    engines = engines if isinstance(engines, str) and engines else files.get(".nvmrc", "")
+    version = _major_minor(engines)
+    if version is None or (engines.lstrip().startswith(">") and version[0] <= int(DEFAULT_VERSIONS["node"])):
+        fp.version = DEFAULT_VERSIONS["node"]  # 하한만 있으면 기본 LTS 사용
+    else:
+        fp.version = str(version[0])
+
+    manager = package.get("packageManager")
+    manager = manager.split("@")[0] if isinstance(manager, str) else ""
+    for lockfile, name in (("pnpm-lock.yaml", "pnpm"), ("yarn.lock", "yarn"), ("package-lock.json", "npm")):
+        if lockfile in paths:
+            fp.package_manager, fp.lockfile = name, lockfile
+            break
+    else:
+        fp.package_manager = manager if manager in ("pnpm", "yarn") else "npm"
+
+    fp.build = "build" in scripts
+    if "start" in scripts:
+        fp.entry_point = scripts["start"]
+        fp.command = ["npm", "start"] if fp.package_manager == "npm" else [fp.package_manager, "start"]
+    else:
+        main = package.get("main")
+        entry = main if isinstance(main, str) and main in paths else None
+        entry = entry or _first_existing(("server.js", "index.js", "app.js", "main.js"), paths)
+        if entry:
+            fp.entry_point = entry
+            fp.command = ["node", entry]
+    fp.port = find_port(scripts.get("start", "")) or 3000
+
+
+def detect_go(fp: Fingerprint, files: dict, paths: set):
+    go_mod = files.get("go.mod", "")
+    match = re.search(r"^go\s+(\d+\.\d+)", go_mod, re.MULTILINE)
+    fp.version = match.group(1) if match else DEFAULT_VERSIONS["go"]
+    fp.package_manager = "go"
+    fp.lockfile = "go.sum" if "go.sum" in paths else None
+    fp.framework = next((name for module, name in GO_FRAMEWORKS.items() if module in go_mod), "net/http")
+    fp.port = 3000 if fp.framework == "fiber" else 8080
+    if "main.go" in paths:
+        fp.entry_point = "."
+    else:
+        # cmd/<이름>/ 디렉터리: 여러 개면 모듈 이름과 같은 것, 없으면 첫 번째
+        commands = sorted(p[4:-1] for p in paths if p.startswith("cmd/") and p.endswith("/") and p.count("/") == 2)
+        if commands:
+            module = re.search(r"^module\s+(\S+)", go_mod, re.MULTILINE)
+            module_name = posixpath.basename(module.group(1)) if module else ""
+            fp.entry_point = f"./cmd/{module_name if module_name in commands else commands[0]}"
+    if fp.entry_point:
+        fp.command = ["/app"]
+
+
+def _pom_text(root, path: str) -> Optional[str]:
+    ns = {"m": root.tag[1:root.tag.index("}")]} if root.tag.startswith("{") else {}
+    prefix = "m:" if ns else ""
+    node = root.find("/".join(prefix + part for part in path.split("/")), ns)
+    return node.text.strip() if node is not None and node.text else None
+
+
+def detect_java(fp: Fingerprint, files: dict, paths: set):
+    if "pom.xml" in files:
+        fp.package_manager = "maven"
+        text = files["pom.xml"]
+        try:
+            root = ET.fromstring(text)
+            version = (_pom_text(root, "properties/java.version")
+                       or _pom_text(root, "properties/maven.compiler.release")
+                       or _pom_text(root, "properties/maven.compiler.source"))
+        except ET.ParseError:
+            version = None
+    else:
+        fp.package_manager = "gradle"
+        text = files.get("build.gradle") or files.get("build.gradle.kts") or ""
+        match = (re.search(r"JavaLanguageVersion\.of\((\d+)\)", text)
+                 or re.search(r"sourceCompatibility\s*=\s*(?:JavaVersion\.VERSION_)?['\"]?(\d+)", text))
+        version = match.group(1) if match else None
+        if "kotlin" in text:
+            fp.language = "Kotlin"
+    version = _major_minor(version or "")
+    # 1.8 같은 예전 표기는 8 로
+    fp.version = str(version[1] if version and version[0] == 1 else version[0]) if version else DEFAULT_VERSIONS["java"]
+    if "spring-boot" in text or "org.springframework.boot" in text:
+        fp.framework = "spring-boot"
+        fp.port = 8080
+        fp.entry_point = "app.jar"
+        fp.command = ["java", "-jar", "/app/app.jar"]
+
+
+DETECTORS = {"python": detect_python, "node": detect_node, "go": detect_go, "java": detect_java}
+
+
+def _apply_procfile(fp: Fingerprint, procfile: str):
+    """Procfile 의 web 프로세스가 있으면 그 명령을 그대로 사용 ($PORT 는 감지한 포트로 설정)"""
+    for line in procfile.splitlines():
+        name, _, command = line.partition(":")
+        command = command.strip()
+        if name.strip() == "web" and command:
+            fp.command = ["sh", "-c", command]
+            fp.entry_point = command
+            fp.port = find_port(command) or fp.port or (8000 if "$PORT" in command else None)
+            return
+
+
+def detect(tree_paths: set, files: dict, root: str = "") -> Fingerprint:
+    """
+    트리의 경로 집합(root 기준 상대 경로, 디렉터리는 '/' 로 끝남)과 읽어 온 매니페스트 내용으로 판별.
+    네트워크를 쓰지 않는 순수 함수이므로 로컬 디렉터리 분석에도 쓸 수 있다.
+    """
+    fp = Fingerprint(root=root)
+    fp.manifests = [name for name in MANIFESTS if name in tree_paths]
+    if not fp.manifests:
+        return fp
+    fp.runtime = MANIFESTS[fp.manifests[0]]
+    fp.language = LANGUAGE_NAMES.get(fp.runtime)
+    detector = DETECTORS.get(fp.runtime)
+    if detector is not None:
+        detector(fp, files, tree_paths)
+        if fp.runtime == "python" and "Procfile" in files:
+            _apply_procfile(fp, files["Procfile"])
+    return fp
+
+
+# -------------------------------
+# GitLab 레포 분석
+# -------------------------------
+class FingerprintEngine:
+    def __init__(self):
+        self.cache = TTLCache(FINGERPRINT_CACHE_SIZE, FINGERPRINT_CACHE_TTL)  # (프로젝트, 커밋) -> Fingerprint
+
+    async def fingerprint(self, project_id, branch: str) -> Fingerprint:
+        """branch HEAD 커밋 기준 fingerprint. 같은 커밋이면 캐시된 결과를 반환"""
+        gateway = get_gateway()
+        sha = (await gateway.get_branch(project_id, branch))["commit"]["id"]
+        key = (str(project_id), sha)
+        fp = self.cache.get(key)
+        if fp is None:
+            with timed("fingerprint", "fingerprint"):
+                fp = await self._analyze(project_id, sha)
+            fp.commit = sha
+            self.cache.set(key, fp)
+        return fp
+
+    async def _analyze(self, project_id, ref: str) -> Fingerprint:
+        gateway = get_gateway()
+        root_tree = await gateway.list_tree(project_id, "", ref)
+        root = ""
+        tree = root_tree
+        if not any(item["name"] in MANIFESTS for item in root_tree if item["type"] == "blob"):
+            # 루트에 매니페스트가 없으면 (backend/ 등) 하위 디렉터리 한 단계만 확인
+            directories = [item["path"] for item in root_tree if item["type"] == "tree"
+                           and not item["name"].startswith(".")][:FINGERPRINT_MAX_SUBDIRS]
+            subtrees = await asyncio.gather(*(gateway.list_tree(project_id, d, ref) for d in directories))
+            for directory, subtree in zip(directories, subtrees):
+                if any(item["name"] in MANIFESTS for item in subtree if item["type"] == "blob"):
+                    root, tree = directory, subtree
+                    break
+            else:
+                return Fingerprint(manifests=[])
+
+        prefix = f"{root}/" if root else ""
+        # 매니페스트는 모두 루트 파일이므로 진입점 후보 디렉터리(app/, src/, cmd/) 목록 조회와 동시에 읽는다
+        nested = [item["path"] for item in tree if item["type"] == "tree" and item["name"] in ("app", "src", "cmd")]
+        names = {item["name"] for item in tree if item["type"] == "blob"}
+        wanted = [name for name in (*MANIFESTS, *AUXILIARY_FILES) if name in names]
+        graph = TaskGraph("fingerprint")
+        graph.add("nested", lambda: asyncio.gather(*(gateway.list_tree(project_id, d, ref) for d in nested)))
+        graph.add("manifests", lambda: asyncio.gather(
+            *(self._read(gateway, project_id, prefix + name, ref) for name in wanted)))
+        results = await graph.run()
+
+        paths = {
+            item["path"][len(prefix):] + ("/" if item["type"] == "tree" else "")
+            for item in [*tree, *(entry for subtree in results["nested"] for entry in subtree)]
+        }
+        files = {name: text for name, text in zip(wanted, results["manifests"]) if text is not None}
+        return detect(paths, files, root)
+
+    @staticmethod
+    async def _read(gateway, project_id, path: str, ref: str) -> Optional[str]:
+        try:
+            data = await gateway.get_file(project_id, path, ref)
+        except (GitLabError, UnicodeDecodeError):
+            return None
+        if data is None or int(data.get("size") or 0) > FINGERPRINT_MAX_FILE_SIZE:
+            return None
+        return data["text"]
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+_engine = None
+
+
+def get_fingerprint_engine() -> FingerprintEngine:
+    """프로세스 전체에서 공유하는 fingerprint 엔진 (최초 사용 시 생성)"""
+    global _engine
+    if _engine is None:
+        _engine = FingerprintEngine()
+    return _engine
@@ -0,0 +1,117 @@
+"""
+GPT 생성 결과(Dockerfile, Kubernetes Manifest)의 content-addressed 캐시.
+
+키는 (종류, 모델, 프롬프트 버전, 정규화된 입력)의 해시이고, 값은 검증을 통과한 결과만 저장한다.
+프롬프트를 바꾸면 PROMPT_VERSIONS 를 올려서 이전 결과가 재사용되지 않도록 한다.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+GENERATION_CACHE_ENABLED = os.environ.get("GENERATION_CACHE_ENABLED", "true").lower() != "false"
+GENERATION_CACHE_PATH = os.environ.get("GENERATION_CACHE_PATH", "/tmp/gpt-manager/generation_cache.db")
+GENERATION_CACHE_MAX_ENTRIES = int(os.environ.get("GENERATION_CACHE_MAX_ENTRIES", "10000"))
+GENERATION_CACHE_TTL = float(os.environ.get("GENERATION_CACHE_TTL", str(30 * 86400)))  # 30일
+
+# 생성 프롬프트가 바뀔 때마다 올린다
+PROMPT_VERSIONS = {
+    "dockerfile": 1,
+    "deployment_spec": 2,  # 2: 언급된 항목만 저장
+}
+
+
+def normalize_text(text: str) -> str:
+    """대소문자/공백 차이만 있는 입력이 같은 키가 되도록 정규화"""
+    return " ".join(text.lower().split())
+
+
+def make_key(kind: str, model: str, **inputs) -> str:
+    payload = json.dumps(
+        {"kind": kind, "model": model, "version": PROMPT_VERSIONS[kind], "inputs": inputs},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """SQLite 기반 생성 결과 캐시 (LRU 개수 제한 + TTL)"""
+
+    def __init__(self, path: str = GENERATION_CACHE_PATH, max_entries: int = GENERATION_CACHE_MAX_ENTRIES,
+                 ttl: float = GENERATION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._db_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS generations ("
+            " key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS generations_last_used ON generations(last_used)")
+
+    def _get(self, key: str):
+        now = time.time()
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT value FROM generations WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE generations SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]) if row else None
+
+    def _put(self, key: str, kind: str, value):
+        now = time.time()
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generations (key, kind, value, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            # 개수 제한을 넘으면 가장 오래 사용되지 않은 항목부터 제거
+            self._conn.execute(
+                "DELETE FROM generations WHERE key IN ("
+                " SELECT key FROM generations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    async def get(self, key: str):
+        value = await asyncio.to_thread(self._get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def put(self, key: str, kind: str, value):
+        """검증이 끝난 결과만 저장할 것"""
+        await asyncio.to_thread(self._put, key, kind, value)
+
+    def close(self):
+        with self._db_lock:
+            self._conn.close()
+
+
+_cache = None
+
+
+def get_generation_cache():
+    """공유 생성 캐시 (최초 사용 시 생성). 비활성화 시 None"""
+    global _cache
+    if _cache is None and GENERATION_CACHE_ENABLED:
+        _cache = GenerationCache()
+    return _cache
+
+
+def close():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
@@ -0,0 +1,341 @@
+import asyncio
+import base64
+import os
+import posixpath
+import time
+from typing import Optional
+from urllib.parse import quote
+
+import httpx
+
+from app.services.cache import TTLCache
+from app.services.manifest_diff import blob_sha, same_content
+from app.services.rate_limit import RateLimitTimeout, deadline_for, get_limiter, gitlab_headers
+from app.services.telemetry import observe_gitlab, timed
+
+GITLAB_URL = os.environ.get("GITLAB_URL", "http://192.168.113.26:1081")
+GITLAB_TOKEN = os.environ.get("GITLAB_TOKEN")  # Personal Access Token (api scope 필수)
+
+GITLAB_TIMEOUT = float(os.environ.get("GITLAB_TIMEOUT", "15"))                # 요청 1회당 타임아웃(초)
+GITLAB_MAX_CONCURRENCY = int(os.environ.get("GITLAB_MAX_CONCURRENCY", "16"))  # 동시에 진행 가능한 요청 수
+GITLAB_POOL_SIZE = int(os.environ.get("GITLAB_POOL_SIZE", "32"))              # keep-alive 커넥션 풀 크기
+GITLAB_CACHE_SIZE = int(os.environ.get("GITLAB_CACHE_SIZE", "2048"))          # 캐시별 최대 항목 수
+GITLAB_CACHE_TTL = float(os.environ.get("GITLAB_CACHE_TTL", "300"))           # 캐시 항목 유효 시간(초)
+
+
+class GitLabError(Exception):
+    """GitLab API 오류 (HTTP 상태 코드 포함)"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"GitLab API {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def _encode(value) -> str:
+    """프로젝트 경로/파일 경로를 URL path 파라미터로 인코딩 (예: group/app -> group%2Fapp)"""
+    return quote(str(value), safe="")
+
+
+class GitLabGateway:
+    """
+    GitLab REST API(v4) 비동기 게이트웨이.
+    keep-alive 커넥션 풀을 공유하고, 동시 요청 수와 요청별 타임아웃을 제한한다.
+    분당 요청 수는 rate_limit 의 "gitlab" limiter 로 조절하며 429 는 마감 시간까지 기다렸다 다시 보낸다.
+    프로젝트 정보, 디렉터리 트리, 언어 통계는 TTL 캐시에 보관하며 commit_files 로 쓴 경로는 즉시 무효화한다.
+    commit_files 는 레포에 있는 내용과 (의미상) 같은 파일을 빼고 커밋하며, 바뀐 파일이 없으면 커밋하지 않는다.
+    """
+
+    def __init__(self, base_url: str = GITLAB_URL, token: str = GITLAB_TOKEN,
+                 timeout: float = GITLAB_TIMEOUT, max_concurrency: int = GITLAB_MAX_CONCURRENCY,
+                 pool_size: int = GITLAB_POOL_SIZE, transport: httpx.AsyncBaseTransport = None):
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.AsyncClient(
+            base_url=f"{self.base_url}/api/v4",
+            headers={"PRIVATE-TOKEN": token or ""},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=30,
+            ),
+            transport=transport,
+        )
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+
+        self.project_cache = TTLCache(GITLAB_CACHE_SIZE, GITLAB_CACHE_TTL)   # id 또는 경로 -> 프로젝트
+        self.tree_cache = TTLCache(GITLAB_CACHE_SIZE, GITLAB_CACHE_TTL)      # (프로젝트, ref, 디렉터리) -> 항목 목록
+        self.language_cache = TTLCache(GITLAB_CACHE_SIZE, GITLAB_CACHE_TTL)  # 프로젝트 -> 언어 통계
+        self.blob_cache = TTLCache(GITLAB_CACHE_SIZE, GITLAB_CACHE_TTL)      # blob SHA -> 내용 (내용 주소라 무효화 불필요)
+        self.commit_stats = {"commits": 0, "skipped_commits": 0, "files_changed": 0, "files_unchanged": 0}
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        # 호출 한도는 동시 요청 슬롯을 잡기 전에 기다리고, 429 는 레인의 마감 시간까지 한도를 다시 기다린다
+        limiter = get_limiter("gitlab")
+        deadline = deadline_for()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        while True:
+            if limiter is not None:
+                try:
+                    await limiter.acquire(deadline=deadline)
+                except RateLimitTimeout as e:
+                    raise GitLabError(429, str(e)) from e
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await self._client.request(method, path, **kwargs)
+                except httpx.HTTPError:
+                    observe_gitlab(method, path, "error", time.perf_counter() - start)
+                    raise
+                observe_gitlab(method, path, response.status_code, time.perf_counter() - start)
+            if limiter is None:
+                break
+            if response.status_code != 429:
+                limiter.observe(**gitlab_headers(response.headers))
+                break
+            limiter.throttled(**gitlab_headers(response.headers))
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("message", response.text)
+            except ValueError:
+                detail = response.text
+            raise GitLabError(response.status_code, str(detail))
+        return response
+
+    async def get_version(self) -> dict:
+        """GitLab 버전 조회 (토큰/접속 확인용, 캐시하지 않음)"""
+        return (await self._request("GET", "/version")).json()
+
+    # -------------------------------
+    # 프로젝트
+    # -------------------------------
+    async def get_project(self, id_or_path) -> dict:
+        project = self.project_cache.get(str(id_or_path))
+        if project is None:
+            response = await self._request("GET", f"/projects/{_encode(id_or_path)}")
+            project = response.json()
+            # id 와 경로 어느 쪽으로 조회해도 캐시가 적중하도록 둘 다 저장
+            self.project_cache.set(str(project["id"]), project)
+            self.project_cache.set(project["path_with_namespace"], project)
+        return project
+
+    async def get_languages(self, project_id) -> dict:
+        languages = self.language_cache.get(str(project_id))
+        if languages is None:
+            response = await self._request("GET", f"/projects/{_encode(project_id)}/languages")
+            languages = response.json()
+            self.language_cache.set(str(project_id), languages)
+        return languages
+
+    async def get_branch(self, project_id, branch: str) -> dict:
+        """브랜치 정보 (commit.id 가 현재 HEAD). 최신 커밋을 알아야 하므로 캐시하지 않음"""
+        response = await self._request("GET", f"/projects/{_encode(project_id)}/repository/branches/{_encode(branch)}")
+        return response.json()
+
+    async def branch_head(self, project_id, branch: str) -> Optional[str]:
+        """브랜치 HEAD 커밋 SHA. 브랜치가 없으면 (빈 레포) None"""
+        try:
+            return (await self.get_branch(project_id, branch))["commit"]["id"]
+        except GitLabError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    # -------------------------------
+    # 파일
+    # -------------------------------
+    async def file_exists(self, project_id, file_path: str, ref: str) -> bool:
+        """상위 디렉터리의 (캐시된) 트리 목록으로 파일 존재 여부 확인"""
+        tree = await self.list_tree(project_id, posixpath.dirname(file_path), ref)
+        return any(item["path"] == file_path and item["type"] == "blob" for item in tree)
+
+    async def get_file(self, project_id, file_path: str, ref: str):
+        """파일 메타데이터 + 디코딩된 내용('text') 반환. 파일이 없으면 None"""
+        try:
+            response = await self._request(
+                "GET",
+                f"/projects/{_encode(project_id)}/repository/files/{_encode(file_path)}",
+                params={"ref": ref},
+            )
+        except GitLabError as e:
+            if e.status_code == 404:
+                return None
+            raise
+        data = response.json()
+        data["text"] = base64.b64decode(data.get("content", "")).decode("utf-8")
+        return data
+
+    async def last_commit_id(self, project_id, file_path: str, ref: str) -> str:
+        """파일을 마지막으로 바꾼 커밋 SHA (HEAD 요청이라 내용은 받지 않음). 수정 커밋의 충돌 확인에 사용"""
+        response = await self._request(
+            "HEAD",
+            f"/projects/{_encode(project_id)}/repository/files/{_encode(file_path)}",
+            params={"ref": ref},
+        )
+        return response.headers["X-Gitlab-Last-Commit-Id"]
+
+    async def get_blob(self, project_id, sha: str) -> str:
+        """blob SHA 로 파일 내용 조회 (같은 SHA 는 항상 같은 내용이므로 캐시)"""
+        content = self.blob_cache.get(sha)
+        if content is None:
+            response = await self._request("GET", f"/projects/{_encode(project_id)}/repository/blobs/{sha}/raw")
+            content = response.content.decode("utf-8")
+            self.blob_cache.set(sha, content)
+        return content
+
+    # -------------------------------
+    # 트리 / 커밋
+    # -------------------------------
+    async def list_tree(self, project_id, path: str, ref: str) -> list:
+        """디렉터리 한 단계의 항목 목록 반환. 디렉터리가 없으면 빈 목록"""
+        key = (str(project_id), ref, path)
+        items = self.tree_cache.get(key)
+        if items is not None:
+            return items
+
+        items = []
+        page = "1"
+        while page:
+            try:
+                response = await self._request(
+                    "GET",
+                    f"/projects/{_encode(project_id)}/repository/tree",
+                    params={"path": path, "ref": ref, "per_page": 100, "page": page},
+                )
+            except GitLabError as e:
+                if e.status_code != 404:
+                    raise
+                break
+            items.extend(response.json())
+            page = response.headers.get("X-Next-Page")
+        self.tree_cache.set(key, items)
+        return items
+
+    def invalidate_paths(self, project_id, ref: str, paths):
+        """변경된 파일들의 상위 디렉터리 트리 캐시 무효화 (새 디렉터리가 생길 수 있으므로 조상 전체)"""
+        for path in paths:
+            directory = posixpath.dirname(path)
+            while True:
+                self.tree_cache.invalidate((str(project_id), ref, directory))
+                if not directory:
+                    break
+                directory = posixpath.dirname(directory)
+
+    async def create_commit(self, project_id, branch: str, commit_message: str, actions: list) -> dict:
+        """여러 파일 변경(actions)을 하나의 커밋으로 반영"""
+        response = await self._request(
+            "POST",
+            f"/projects/{_encode(project_id)}/repository/commits",
+            json={"branch": branch, "commit_message": commit_message, "actions": actions},
+        )
+        return response.json()
+
+    async def existing_files(self, project_id, branch: str, paths) -> dict:
+        """
+        paths 의 상위 디렉터리들을 branch HEAD 커밋의 트리로 한 번에 조회하여 그 안에 있는 {파일 경로: blob SHA} 반환.
+        트리는 커밋 SHA 로 조회/캐시하므로 다른 곳에서 브랜치에 커밋해도 오래된 목록을 쓰지 않는다.
+        """
+        head = await self.branch_head(project_id, branch)
+        return await self._files_at(project_id, head, paths) if head else {}
+
+    async def _files_at(self, project_id, ref: str, paths) -> dict:
+        directories = sorted({posixpath.dirname(path) for path in paths})
+        trees = await asyncio.gather(*(self.list_tree(project_id, d, ref) for d in directories))
+        return {item["path"]: item.get("id") for tree in trees for item in tree if item["type"] == "blob"}
+
+    async def unchanged_files(self, project_id, files: dict, existing: dict) -> set:
+        """레포에 있는 내용과 같은 파일 경로. blob SHA 가 다를 때만 내용을 받아 의미상 비교한다"""
+        unchanged = {path for path, content in files.items()
+                     if path in existing and existing[path] == blob_sha(content)}
+        candidates = [path for path in files if path in existing and path not in unchanged and existing[path]]
+
+        async def compare(path: str) -> bool:
+            try:
+                old = await self.get_blob(project_id, existing[path])
+            except (GitLabError, UnicodeDecodeError):
+                return False
+            return same_content(path, old, files[path])
+
+        results = await asyncio.gather(*(compare(path) for path in candidates))
+        unchanged.update(path for path, same in zip(candidates, results) if same)
+        return unchanged
+
+    async def commit_files(self, project_id, branch: str, files: dict, commit_message: str, delete=()) -> dict:
+        """
+        {파일 경로: 내용} 중 바뀐 파일만 하나의 커밋으로 생성/수정하고 {파일 경로: "created"|"updated"|"unchanged"} 반환.
+        delete 의 경로는 레포에 있으면 같은 커밋에서 삭제한다 (결과에 "deleted", 없던 파일은 결과에서 제외).
+        생성/수정 여부는 branch HEAD 커밋의 대상 디렉터리 트리로 한 번에 판단한다. 모두 unchanged 면 커밋하지 않는다.
+        수정하는 파일에는 비교한 시점의 last_commit_id 를 붙여, 그 사이 다른 곳에서 바뀌었으면 덮어쓰지 않고 실패한다.
+        """
+        head = await self.branch_head(project_id, branch)
+        existing = await self._files_at(project_id, head, [*files, *delete]) if head else {}
+        # SHA 가 다른 파일의 마지막 커밋은 의미상 비교와 동시에 조회 (비교 결과 같으면 쓰지 않는다)
+        differing = [path for path in files if path in existing and existing[path] != blob_sha(files[path])]
+        unchanged, *last_commits = await asyncio.gather(
+            self.unchanged_files(project_id, files, existing),
+            *(self.last_commit_id(project_id, path, head) for path in differing),
+        )
+        last_commits = dict(zip(differing, last_commits))
+
+        actions = []
+        result = {}
+        for path, content in files.items():
+            if path in unchanged:
+                result[path] = "unchanged"
+                continue
+            if path in existing:
+                actions.append({"action": "update", "file_path": path, "content": content,
+                                "last_commit_id": last_commits[path]})
+                result[path] = "updated"
+            else:
+                actions.append({"action": "create", "file_path": path, "content": content})
+                result[path] = "created"
+        for path in delete:
+            if path in existing and path not in files:
+                actions.append({"action": "delete", "file_path": path})
+                result[path] = "deleted"
+        self.commit_stats["files_unchanged"] += len(unchanged)
+        self.commit_stats["files_changed"] += len(actions)
+        if not actions:
+            # 빈 커밋은 파이프라인만 다시 돌리므로 만들지 않는다
+            self.commit_stats["skipped_commits"] += 1
+            return result
+        self.commit_stats["commits"] += 1
+        try:
+            with timed("commit", "commit"):
+                await self.create_commit(project_id, branch, commit_message, actions)
+        finally:
+            # 실패한 경우에도 캐시된 트리가 실제 상태와 다를 수 있으므로 무효화
+            self.invalidate_paths(project_id, branch, [*files, *delete])
+        return result
+
+    def cache_stats(self) -> dict:
+        return {
+            "project": self.project_cache.stats(),
+            "tree": self.tree_cache.stats(),
+            "language": self.language_cache.stats(),
+            "blob": self.blob_cache.stats(),
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_gateway = None
+
+
+def get_gateway() -> GitLabGateway:
+    """프로세스 전체에서 공유하는 GitLab 게이트웨이 (최초 사용 시 생성)"""
+    global _gateway
+    if _gateway is None:
+        _gateway = GitLabGateway()
+    return _gateway
+
+
+async def aclose():
+    global _gateway
+    if _gateway is not None:
+        await _gateway.aclose()
+        _gateway = None
@@ -0,0 +1,220 @@
+"""
+자연어 요청 의도 분류 엔진.
+
+이전에 분류한 문장을 (공백을 뺀) 문자 3-gram 집합으로 보관하고, 같은 문장은 dict 조회로,
+거의 같은 문장(Jaccard 유사도 INTENT_CACHE_MIN_SIMILARITY 이상)은 prefix 역색인 후보 비교로
+GPT 호출 없이 응답한다. 부정어가 들어간 문장은 몇 글자 차이로 의도가 뒤집히므로 정확히 같은 문장만 재사용한다. 캐시에 없을 때만 저렴한 모델(INTENT_MODEL)을 한 번 호출한다.
+"""
+import asyncio
+import json
+import math
+import os
+import re
+from collections import OrderedDict
+
+from app.services.llm_client import chat_completion
+
+INTENT_MODEL = os.environ.get("INTENT_MODEL", "gpt-4.1-mini")
+INTENT_CACHE_SIZE = int(os.environ.get("INTENT_CACHE_SIZE", "5000"))                        # 보관할 분류 결과 수
+INTENT_CACHE_MIN_SIMILARITY = float(os.environ.get("INTENT_CACHE_MIN_SIMILARITY", "0.75"))   # 근사 일치 기준
+INTENT_CACHE_MIN_CONFIDENCE = float(os.environ.get("INTENT_CACHE_MIN_CONFIDENCE", "0.6"))   # 이 이상만 캐시
+INTENT_MAX_POSTING = int(os.environ.get("INTENT_MAX_POSTING", "500"))  # 너무 흔한 3-gram 은 후보 검색에서 제외
+
+URL_RE = re.compile(r"https?://\S+")
+# 부정 표현: 영어는 정규화된 단어 단위("don't" -> "don t"), 한국어는 어미에 붙어 쓰이므로 공백을 뺀 부분 문자열로 찾는다
+NEGATION_TOKENS = {"not", "no", "never", "don", "dont", "doesn", "cancel", "stop", "without", "안", "못"}
+NEGATION_SUBSTRINGS = ("않", "지마", "지말", "말고", "말아", "금지", "취소", "중지", "멈춰")
+
+# parse_command / ask_gpt_for_classification 이 쓰던 두 분류 체계를 한 번의 호출로 채운다
+SYSTEM_PROMPT = """
+당신은 DevOps + Kubernetes 분석 전문가입니다.
+
+사용자 요청을 분류하세요.
+- action_type: cicd (CI/CD 파이프라인, 레포 배포) | k8s_api (클러스터 리소스 조회/조작) | unknown
+- command: deploy_repo (레포를 CI/CD로 배포) | setup_test_server (테스트 서버 구축) | unknown
+- summary: 요청 요약 한 문장
+- confidence: 0.0~1.0
+"""
+
+INTENT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "intent",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "action_type": {"type": "string", "enum": ["cicd", "k8s_api", "unknown"]},
+                "command": {"type": "string", "enum": ["deploy_repo", "setup_test_server", "unknown"]},
+                "summary": {"type": "string"},
+                "confidence": {"type": "number"},
+            },
+            "required": ["action_type", "command", "summary", "confidence"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def normalize(text: str) -> str:
+    """URL 은 자리표시자로 바꾸고 대소문자/공백/문장부호 차이를 없앤다 (레포 주소만 다른 요청은 같은 의도)"""
+    text = URL_RE.sub(" <url> ", text.lower())
+    return " ".join(re.sub(r"[^\w<>]+", " ", text).split())
+
+
+def shingles(normalized: str) -> frozenset:
+    """공백을 뺀 문자 3-gram 집합 (한국어 띄어쓰기 차이는 무시)"""
+    compact = normalized.replace(" ", "")
+    return frozenset(compact[i:i + 3] for i in range(max(1, len(compact) - 2)))
+
+
+def has_negation(normalized: str) -> bool:
+    compact = normalized.replace(" ", "")
+    return any(token in NEGATION_TOKENS for token in normalized.split()) or any(
+        word in compact for word in NEGATION_SUBSTRINGS
+    )
+
+
+class IntentCache:
+    """정규화된 문장 -> 분류 결과 LRU 캐시 + 3-gram 역색인 근사 검색"""
+
+    def __init__(self, maxsize: int = INTENT_CACHE_SIZE, min_similarity: float = INTENT_CACHE_MIN_SIMILARITY):
+        self.maxsize = maxsize
+        self.min_similarity = min_similarity
+        self._entries = OrderedDict()  # 정규화된 문장 -> (3-gram 집합, 결과). 부정문은 색인하지 않으므로 집합이 None
+        self._postings = {}            # 3-gram -> 해당 3-gram 이 prefix 에 있는 문장 집합
+
+    def _prefix(self, grams: frozenset) -> list:
+        """
+        prefix filtering: 모든 문장에 같은 순서(hash)를 적용했을 때, 유사도가 min_similarity 이상인 두 집합은
+        앞쪽 len - ceil(min_similarity * len) + 1 개 안에서 반드시 하나 이상 겹친다. 그 부분만 색인/검색한다.
+        """
+        ordered = sorted(grams, key=hash)
+        return ordered[:len(ordered) - math.ceil(self.min_similarity * len(ordered)) + 1]
+
+    def lookup(self, normalized: str):
+        """(결과, 유사도) 반환. 없으면 (None, 0.0)"""
+        entry = self._entries.get(normalized)
+        if entry is not None:
+            self._entries.move_to_end(normalized)
+            return entry[1], 1.0
+        if has_negation(normalized):
+            return None, 0.0
+
+        grams = shingles(normalized)
+        candidates = set()
+        for gram in self._prefix(grams):
+            posting = self._postings.get(gram)
+            if posting and len(posting) <= INTENT_MAX_POSTING:
+                candidates.update(posting)
+
+        best, best_score = None, 0.0
+        for candidate in candidates:
+            candidate_grams = self._entries[candidate][0]
+            # 길이 차이만으로 기준 미달이 확정되면 계산 생략
+            if min(len(grams), len(candidate_grams)) < self.min_similarity * max(len(grams), len(candidate_grams)):
+                continue
+            overlap = len(grams & candidate_grams)
+            score = overlap / (len(grams) + len(candidate_grams) - overlap)
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is None or best_score < self.min_similarity:
+            return None, 0.0
+        self._entries.move_to_end(best)
+        return self._entries[best][1], best_score
+
+    def store(self, normalized: str, result: dict):
+        if normalized in self._entries:
+            self._entries.move_to_end(normalized)
+            self._entries[normalized] = (self._entries[normalized][0], result)
+            return
+        # 부정문은 정확히 같은 문장으로만 찾고, 다른 문장의 근사 후보로도 나오지 않게 한다
+        grams = None if has_negation(normalized) else shingles(normalized)
+        self._entries[normalized] = (grams, result)
+        for gram in self._prefix(grams or frozenset()):
+            self._postings.setdefault(gram, set()).add(normalized)
+        while len(self._entries) > self.maxsize:
+            evicted, (evicted_grams, _) = self._entries.popitem(last=False)
+            for gram in self._prefix(evicted_grams or frozenset()):
+                posting = self._postings[gram]
+                posting.discard(evicted)
+                if not posting:
+                    del self._postings[gram]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class IntentEngine:
+    def __init__(self, cache: IntentCache = None):
+        self.cache = cache or IntentCache()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._inflight = {}  # 정규화된 문장 -> 진행 중인 모델 호출 (같은 문장 동시 요청은 한 번만 호출)
+
+    async def classify(self, text: str) -> dict:
+        """
+        {"action_type", "command", "summary", "confidence", "source": "cache"|"llm", "similarity"} 반환.
+        summary 는 캐시 적중 시 원래 분류했던 문장의 요약이다 (URL 만 현재 요청의 것으로 교체).
+        """
+        normalized = normalize(text)
+        result, similarity = self.cache.lookup(normalized)
+        if result is not None:
+            if similarity == 1.0:
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+            # 요약에 들어 있던 원래 요청의 URL 은 현재 요청의 URL 로 바꿔서 돌려준다
+            url = next(iter(URL_RE.findall(text)), "<url>")
+            summary = result["summary"].replace("<url>", url)
+            return {**result, "summary": summary, "source": "cache", "similarity": round(similarity, 3)}
+
+        self.misses += 1
+        task = self._inflight.get(normalized)
+        if task is None:
+            task = self._inflight[normalized] = asyncio.ensure_future(self._ask_model(text))
+            task.add_done_callback(lambda _: self._inflight.pop(normalized, None))
+        result = await asyncio.shield(task)
+        if result["confidence"] >= INTENT_CACHE_MIN_CONFIDENCE:
+            self.cache.store(normalized, {**result, "summary": URL_RE.sub("<url>", result["summary"])})
+        return {**result, "source": "llm", "similarity": 0.0}
+
+    async def _ask_model(self, text: str) -> dict:
+        response = await chat_completion(
+            model=INTENT_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": text},
+            ],
+            temperature=0,
+            max_tokens=200,
+            response_format=INTENT_RESPONSE_FORMAT,
+        )
+        try:
+            result = json.loads(response.choices[0].message.content)
+        except (TypeError, json.JSONDecodeError):
+            return {"action_type": "unknown", "command": "unknown", "summary": "", "confidence": 0.0}
+        result["confidence"] = min(1.0, max(0.0, float(result.get("confidence") or 0.0)))
+        return result
+
+    def stats(self) -> dict:
+        total = self.exact_hits + self.near_hits + self.misses
+        return {
+            "size": len(self.cache),
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.near_hits) / total if total else None,
+        }
+
+
+_engine = None
+
+
+def get_intent_engine() -> IntentEngine:
+    """프로세스 전체에서 공유하는 의도 분류 엔진 (최초 사용 시 생성)"""
+    global _engine
+    if _engine is None:
+        _engine = IntentEngine()
+    return _engine
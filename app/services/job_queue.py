@@ -0,0 +1,321 @@
+"""
+오래 걸리는 생성/커밋 작업을 HTTP 요청 밖에서 실행하는 백그라운드 작업 큐.
+
+- 엔드포인트는 enqueue() 로 작업을 넣고 job_id 를 바로 돌려준다 (요청 지연이 단계 처리 시간과 무관).
+- JobWorkers 의 워커 N개가 SQLite(WAL) 테이블에서 작업을 lease 로 가져가 실행한다.
+  같은 user_id 의 작업은 들어온 순서대로 하나씩만 실행된다.
+- 실행 중에는 lease 를 주기적으로 연장하고, 워커 프로세스가 죽어 lease 가 만료된 작업은 다른 워커가 다시 가져간다.
+- 작업 안에서 checkpoint(step, fn) 으로 감싼 단계(GPT 생성, 커밋)는 결과를 저장해 두므로
+  재시작된 작업은 마지막으로 성공한 커밋 이후부터 이어서 실행한다.
+- handler 가 RetryLater 를 올리면 (rate limit 등 일시적인 실패) delay 뒤에 다시 실행하도록 대기 상태로 되돌린다.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from app.services.telemetry import JOB_SECONDS, JOBS_TOTAL, logger
+
+JOB_DB_PATH = os.environ.get("JOB_DB_PATH", "/tmp/gpt-manager/jobs.db")        # 재시작 후 이어서 실행하려면 볼륨 경로로 지정
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))                          # 프로세스당 워커 수 (0 이면 실행 안 함)
+JOB_LEASE = float(os.environ.get("JOB_LEASE", "60"))                           # 워커가 응답 없을 때 다른 워커가 가져가기까지(초)
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))                # lease 만료로 다시 실행하는 최대 횟수
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1"))            # 다른 프로세스가 넣은 작업 확인 주기(초)
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "86400"))              # 끝난 작업 결과 보관 시간(초)
+JOB_RETRY_DELAY = float(os.environ.get("JOB_RETRY_DELAY", "10"))               # RetryLater 후 다시 실행하기까지 최소 대기(초)
+
+_current = ContextVar("current_job", default=None)
+
+
+class RetryLater(Exception):
+    """일시적인 실패. 작업을 failed 로 끝내지 않고 delay(최소 JOB_RETRY_DELAY)초 뒤에 다시 실행 (JOB_MAX_ATTEMPTS 에 포함)"""
+
+    def __init__(self, delay: float = 0.0, reason: str = ""):
+        super().__init__(reason or "일시적인 오류로 재시도")
+        self.delay = delay
+
+
+class JobQueue:
+    """SQLite 작업 테이블. 상태: queued -> running -> done | failed"""
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self._path = path
+        self._db_lock = threading.Lock()
+        self._conn = None  # 첫 쿼리 때 연다
+        self._next_purge = 0.0
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, user_id TEXT, status TEXT NOT NULL,"
+            " payload TEXT NOT NULL, checkpoints TEXT NOT NULL DEFAULT '{}', result TEXT, error TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0, owner TEXT, lease_expires REAL, not_before REAL,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        if "not_before" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN not_before REAL")  # 이전 버전에서 만든 테이블
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created_at)")
+        return conn
+
+    def _execute(self, sql: str, params=()):
+        with self._db_lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            cursor = self._conn.execute(sql, params)
+            return cursor.fetchall(), cursor.rowcount
+
+    async def _run(self, sql: str, params=()):
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    @staticmethod
+    def _decode(row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["checkpoints"] = json.loads(job["checkpoints"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    async def enqueue(self, kind: str, payload: dict, user_id: str = None) -> dict:
+        job_id = uuid.uuid4().hex
+        rows, _ = await self._run(
+            "INSERT INTO jobs (id, kind, user_id, status, payload, created_at) VALUES (?, ?, ?, 'queued', ?, ?)"
+            " RETURNING *",
+            (job_id, kind, user_id, json.dumps(payload, ensure_ascii=False), time.time()),
+        )
+        return self._decode(rows[0])
+
+    async def get(self, job_id: str):
+        rows, _ = await self._run("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._decode(rows[0]) if rows else None
+
+    async def claim(self, owner: str):
+        """
+        실행할 작업 하나를 lease 와 함께 가져온다. 대기 중인 작업과 lease 가 만료된 실행 중 작업 중 가장 오래된 것.
+        같은 user_id 의 다른 작업이 실행 중이면 건너뛴다 (대화 단계가 순서대로 진행되도록).
+        재시도 대기(not_before) 중인 작업은 시간이 될 때까지 가져가지 않고, 그동안 같은 사용자의 뒤 작업도 기다린다.
+        """
+        now = time.time()
+        rows, _ = await self._run(
+            "UPDATE jobs SET status = 'running', owner = ?, lease_expires = ?, attempts = attempts + 1,"
+            " started_at = COALESCE(started_at, ?)"
+            " WHERE id = ("
+            "  SELECT id FROM jobs AS j"
+            "  WHERE ((j.status = 'queued' AND (j.not_before IS NULL OR j.not_before <= ?))"
+            "    OR (j.status = 'running' AND j.lease_expires < ?))"
+            "   AND (j.user_id IS NULL OR NOT EXISTS ("
+            "    SELECT 1 FROM jobs AS r WHERE r.user_id = j.user_id AND r.id != j.id"
+            "     AND ((r.status = 'running' AND r.lease_expires >= ?)"
+            "      OR (r.status = 'queued' AND r.created_at < j.created_at))))"
+            "  ORDER BY j.created_at LIMIT 1)"
+            " RETURNING *",
+            (owner, now + JOB_LEASE, now, now, now, now),
+        )
+        if now >= self._next_purge:
+            self._next_purge = now + 60
+            await self._run("DELETE FROM jobs WHERE finished_at < ?", (now - JOB_RESULT_TTL,))
+        return self._decode(rows[0]) if rows else None
+
+    async def renew(self, job_id: str, owner: str) -> bool:
+        _, rowcount = await self._run(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner = ? AND status = 'running'",
+            (time.time() + JOB_LEASE, job_id, owner),
+        )
+        return rowcount == 1
+
+    async def save_checkpoint(self, job_id: str, owner: str, checkpoints: dict):
+        await self._run(
+            "UPDATE jobs SET checkpoints = ? WHERE id = ? AND owner = ?",
+            (json.dumps(checkpoints, ensure_ascii=False), job_id, owner),
+        )
+
+    async def finish(self, job_id: str, owner: str, status: str, result=None, error: str = None):
+        await self._run(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires = NULL"
+            " WHERE id = ? AND owner = ?",
+            (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error, time.time(),
+             job_id, owner),
+        )
+
+    async def retry(self, job_id: str, owner: str, delay: float):
+        """일시적으로 실패한 작업을 delay 초 뒤에 다시 가져가도록 대기 상태로 되돌림 (체크포인트 유지)"""
+        await self._run(
+            "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires = NULL, not_before = ?"
+            " WHERE id = ? AND owner = ? AND status = 'running'",
+            (time.time() + delay, job_id, owner),
+        )
+
+    async def release(self, job_id: str, owner: str):
+        """종료 중인 워커가 작업을 내려놓음 (체크포인트는 유지, 재시도 횟수에 포함하지 않음)"""
+        await self._run(
+            "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires = NULL, attempts = attempts - 1"
+            " WHERE id = ? AND owner = ? AND status = 'running'",
+            (job_id, owner),
+        )
+
+    async def stats(self) -> dict:
+        rows, _ = await self._run("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
+
+    async def ping(self):
+        await self._run("SELECT 1")
+
+    async def aclose(self):
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _JobContext:
+    def __init__(self, queue: JobQueue, job: dict, owner: str):
+        self.queue = queue
+        self.id = job["id"]
+        self.owner = owner
+        self.checkpoints = job["checkpoints"]
+
+
+async def checkpoint(step: str, fn):
+    """
+    작업 안에서 실행 중이면 fn() 결과(JSON 직렬화 가능)를 step 이름으로 저장하고,
+    이미 저장된 step 이면 fn 을 다시 실행하지 않고 저장된 결과를 반환한다. 작업 밖에서는 그냥 fn() 실행.
+    """
+    context = _current.get()
+    if context is None:
+        return await fn()
+    if step in context.checkpoints:
+        logger.info("job_checkpoint_reused", extra={"job_id": context.id, "step": step})
+        return context.checkpoints[step]
+    value = await fn()
+    context.checkpoints[step] = value
+    await context.queue.save_checkpoint(context.id, context.owner, context.checkpoints)
+    return value
+
+
+class JobWorkers:
+    """
+    작업 종류별 handler(payload) -> 결과 dict 를 실행하는 워커 풀.
+    handler 의 예외는 failed 로 기록하고, lease 만료(워커 중단)로 다시 가져간 작업과 RetryLater 만 재실행한다.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: dict, size: int = JOB_WORKERS):
+        self.queue = queue
+        self.handlers = handlers
+        self.size = size
+        self.owner = uuid.uuid4().hex
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.size)]
+
+    def notify(self):
+        """같은 프로세스에서 작업을 넣었으면 폴링 주기를 기다리지 않고 바로 가져가도록 깨움"""
+        self._wakeup.set()
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self.queue.claim(self.owner)
+            except Exception as e:
+                logger.warning("job_claim_failed", extra={"error": repr(e)})
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+            self._wakeup.set()  # 같은 사용자의 다음 작업이 기다리고 있을 수 있음
+
+    async def _execute(self, job: dict):
+        kind = job["kind"]
+        JOB_SECONDS.labels(kind, "wait").observe(max(0.0, time.time() - job["created_at"]))
+        if job["attempts"] > JOB_MAX_ATTEMPTS:
+            await self._finish(job, "failed", error=f"{JOB_MAX_ATTEMPTS}회 시도했지만 완료하지 못했습니다.")
+            return
+        handler = self.handlers.get(kind)
+        if handler is None:
+            await self._finish(job, "failed", error=f"알 수 없는 작업 종류입니다: {kind}")
+            return
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(job["id"]))
+        token = _current.set(_JobContext(self.queue, job, self.owner))
+        start = time.perf_counter()
+        try:
+            result = await handler(job["payload"])
+        except asyncio.CancelledError:
+            # 서버 종료: 다음 워커가 체크포인트부터 바로 이어서 실행하도록 대기 상태로 되돌림
+            await asyncio.shield(self.queue.release(job["id"], self.owner))
+            raise
+        except RetryLater as e:
+            delay = max(e.delay, JOB_RETRY_DELAY)
+            logger.warning("job_retry_later", extra={"job_id": job["id"], "kind": kind, "delay": delay,
+                                                     "reason": str(e)})
+            await self.queue.retry(job["id"], self.owner, delay)
+        except Exception as e:
+            logger.exception("job_failed", extra={"job_id": job["id"], "kind": kind})
+            await self._finish(job, "failed", error=str(e) or repr(e))
+        else:
+            await self._finish(job, "done", result=result)
+        finally:
+            _current.reset(token)
+            heartbeat.cancel()
+            JOB_SECONDS.labels(kind, "run").observe(time.perf_counter() - start)
+
+    async def _finish(self, job: dict, status: str, result=None, error: str = None):
+        await self.queue.finish(job["id"], self.owner, status, result, error)
+        JOBS_TOTAL.labels(job["kind"], status).inc()
+        logger.info("job_finished", extra={"job_id": job["id"], "kind": job["kind"], "status": status,
+                                           "attempts": job["attempts"]})
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(JOB_LEASE / 3)
+            try:
+                await self.queue.renew(job_id, self.owner)
+            except Exception as e:
+                logger.warning("job_lease_renew_failed", extra={"job_id": job_id, "error": repr(e)})
+
+    async def aclose(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """프로세스 공유 작업 큐 (최초 사용 시 생성)"""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
+
+
+def job_status(job: dict) -> dict:
+    """상태 조회 응답 (payload 제외)"""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "checkpoints": list(job["checkpoints"]),
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
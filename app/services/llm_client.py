@@ -0,0 +1,201 @@
+import asyncio
+import os
+import random
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+
+from app.services.rate_limit import (
+    RateLimitTimeout,
+    current_lane,
+    deadline_for,
+    estimate_tokens,
+    get_limiter,
+    openai_headers,
+)
+from app.services.telemetry import observe_llm
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL")  # 로컬 stub 서버 등 (미설정 시 api.openai.com)
+
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "60"))                # 호출 1회당 타임아웃(초)
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "32"))  # 동시에 진행 가능한 호출 수
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "64"))              # keep-alive 커넥션 풀 크기
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "8"))
+
+_client = None
+_semaphore = None
+_retryable_errors = ()
+
+
+def get_client() -> "AsyncOpenAI":
+    """
+    프로세스 전체에서 공유하는 AsyncOpenAI 클라이언트 (최초 사용 시 생성).
+    openai 패키지는 import 에만 수백 ms 가 걸리므로 서버 시작 시가 아니라 이때 불러온다.
+    """
+    global _client, _retryable_errors
+    if _client is None:
+        from openai import (
+            AsyncOpenAI,
+            DefaultAsyncHttpxClient,
+            APIConnectionError,
+            InternalServerError,
+            RateLimitError,
+        )
+
+        # 재시도 대상: 네트워크 오류/타임아웃, 429, 5xx
+        _retryable_errors = (APIConnectionError, RateLimitError, InternalServerError)
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=LLM_POOL_SIZE,
+                max_keepalive_connections=LLM_POOL_SIZE,
+                keepalive_expiry=30,
+            ),
+        )
+        _client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            timeout=LLM_TIMEOUT,
+            max_retries=0,  # 재시도는 chat_completion 에서 직접 처리
+            http_client=http_client,
+        )
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _backoff(attempt: int) -> float:
+    """지수 백오프 + jitter"""
+    delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _rate_limited(error) -> bool:
+    """호출 한도 초과 429 인지 (사용량 한도 소진 insufficient_quota 는 기다려도 풀리지 않으므로 제외)"""
+    return getattr(error, "status_code", None) == 429 and getattr(error, "code", None) != "insufficient_quota"
+
+
+async def chat_completion(messages: list, model: str = "gpt-4o", timeout: float = None, lane: str = None, **kwargs):
+    """
+    공유 클라이언트로 chat completion 호출.
+    모델별 호출 한도(rate_limit)를 lane 우선순위로 기다린 뒤 호출하고, 동시 호출 수를 제한한다.
+    429 는 레인의 마감 시간까지 한도를 다시 기다리고, 그 밖의 일시적 오류는 백오프 후 재시도한다.
+    """
+    client = get_client()
+    limiter = get_limiter(f"openai:{model}")
+    lane = lane or current_lane()
+    deadline = deadline_for(lane)
+    cost = estimate_tokens(messages, kwargs.get("max_tokens"))
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            if limiter is not None:
+                await limiter.acquire(cost, lane, deadline)
+            async with _get_semaphore():
+                raw = await client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    timeout=timeout or LLM_TIMEOUT,
+                    **kwargs
+                )
+            response = raw.parse()
+            if limiter is not None:
+                limiter.observe(**openai_headers(raw.headers))
+                limiter.settle(cost, getattr(response.usage, "total_tokens", None))
+            observe_llm(model, "completion", "ok", time.perf_counter() - start, response.usage)
+            return response
+        except RateLimitTimeout:
+            observe_llm(model, "completion", "rate_limited", time.perf_counter() - start)
+            raise
+        except _retryable_errors as e:
+            if limiter is not None and _rate_limited(e):
+                # 한도 초과는 재시도 횟수에 넣지 않고 마감 시간까지 다시 줄을 선다
+                limiter.throttled(**openai_headers(e.response.headers))
+                continue
+            if attempt == LLM_MAX_RETRIES:
+                observe_llm(model, "completion", "error", time.perf_counter() - start)
+                raise
+            # 대기하는 동안에는 세마포어를 반납하여 다른 호출이 진행되도록 함
+            await asyncio.sleep(_backoff(attempt))
+            attempt += 1
+        except Exception:
+            observe_llm(model, "completion", "error", time.perf_counter() - start)
+            raise
+
+
+async def chat_completion_stream(messages: list, model: str = "gpt-4o", timeout: float = None, lane: str = None,
+                                 **kwargs):
+    """
+    chat completion 을 스트리밍으로 호출하여 토큰(delta)을 도착하는 대로 yield.
+    호출 한도는 chat_completion 과 같이 기다리며, 첫 토큰을 받기 전의 오류만 재시도한다
+    (이미 전달한 토큰은 되돌릴 수 없으므로).
+    """
+    client = get_client()
+    limiter = get_limiter(f"openai:{model}")
+    lane = lane or current_lane()
+    deadline = deadline_for(lane)
+    cost = estimate_tokens(messages, kwargs.get("max_tokens"))
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        started = False
+        usage = None
+        try:
+            if limiter is not None:
+                await limiter.acquire(cost, lane, deadline)
+            async with _get_semaphore():
+                raw = await client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    timeout=timeout or LLM_TIMEOUT,
+                    stream=True,
+                    stream_options={"include_usage": True},  # 마지막 chunk 에 토큰 사용량 포함
+                    **kwargs
+                )
+                if limiter is not None:
+                    limiter.observe(**openai_headers(raw.headers))
+                async for chunk in raw.parse():
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        started = True
+                        yield chunk.choices[0].delta.content
+            if limiter is not None:
+                limiter.settle(cost, getattr(usage, "total_tokens", None))
+            observe_llm(model, "stream", "ok", time.perf_counter() - start, usage)
+            return
+        except RateLimitTimeout:
+            observe_llm(model, "stream", "rate_limited", time.perf_counter() - start)
+            raise
+        except _retryable_errors as e:
+            if not started and limiter is not None and _rate_limited(e):
+                limiter.throttled(**openai_headers(e.response.headers))
+                continue
+            if started or attempt == LLM_MAX_RETRIES:
+                observe_llm(model, "stream", "error", time.perf_counter() - start)
+                raise
+            await asyncio.sleep(_backoff(attempt))
+            attempt += 1
+        except Exception:
+            observe_llm(model, "stream", "error", time.perf_counter() - start)
+            raise
+
+
+async def aclose():
+    """공유 클라이언트 종료 (커넥션 풀 정리)"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,71 @@
+"""
+커밋하려는 파일과 레포에 이미 있는 파일 비교.
+
+- 먼저 git blob SHA 로 비교한다 (트리 목록에 있는 값이라 내용을 받지 않아도 됨).
+- SHA 가 다르면 YAML 은 파싱한 결과(문서 목록)로, Dockerfile 은 주석/빈 줄/줄 끝 공백을 뺀 명령으로 비교한다.
+  들여쓰기, 따옴표, 키 순서, 주석만 다른 파일은 다시 커밋하지 않는다.
+"""
+import hashlib
+import posixpath
+import re
+
+from ruamel.yaml import YAML, YAMLError
+
+
+def blob_sha(content: str) -> str:
+    """git 이 파일 내용에 부여하는 blob SHA-1"""
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _yaml_documents(content: str) -> list:
+    return list(YAML(typ="safe", pure=True).load_all(content))
+
+
+# 파일 맨 위의 "# syntax=..." 같은 parser directive 는 주석이 아니라 빌드에 영향을 준다
+DOCKERFILE_DIRECTIVE_RE = re.compile(r"#\s*([a-zA-Z]+)\s*=\s*(\S.*)$")
+
+
+def _dockerfile_instructions(content: str) -> list:
+    """줄 잇기(\\)를 합친 명령 목록. Docker 처럼 \\ 뒤 공백, 이어지는 줄 사이의 주석/빈 줄은 무시한다"""
+    instructions, current = [], []
+    header = True
+    for line in content.splitlines():
+        line = line.strip()
+        directive = DOCKERFILE_DIRECTIVE_RE.match(line) if header else None
+        if directive:
+            instructions.append(f"#{directive.group(1).lower()}={directive.group(2).strip()}")
+            continue
+        header = False
+        if not line or line.startswith("#"):
+            continue
+        continued = line.endswith("\\")
+        current.append(line[:-1] if continued else line)
+        if not continued:
+            instructions.append(" ".join(current))
+            current = []
+    if current:
+        instructions.append(" ".join(current))
+    result = []
+    for instruction in instructions:
+        if instruction.startswith("#"):
+            result.append(instruction)
+            continue
+        keyword, _, rest = instruction.partition(" ")
+        result.append(" ".join([keyword.upper(), *rest.split()]))  # 명령어는 대소문자를 가리지 않는다
+    return result
+
+
+def same_content(path: str, old: str, new: str) -> bool:
+    """파일 종류에 맞게 의미상 같은 내용인지 비교 (파싱할 수 없으면 바이트 비교)"""
+    if old == new:
+        return True
+    name = posixpath.basename(path)
+    if name.endswith((".yaml", ".yml")):
+        try:
+            return _yaml_documents(old) == _yaml_documents(new)
+        except YAMLError:
+            return False
+    if name == "Dockerfile" or name.endswith(".Dockerfile"):
+        return _dockerfile_instructions(old) == _dockerfile_instructions(new)
+    return False
@@ -0,0 +1,55 @@
+"""
+.gitlab-ci.yml, Kubernetes Manifest, Dockerfile 템플릿 렌더링.
+
+템플릿(app/templates/*.j2)은 import 시 한 번만 컴파일해 두고,
+요청마다 DeploymentSpec 값만 채워 넣는다.
+"""
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+from app.models.deploy_models import DeploymentSpec
+from app.services.fingerprint import Fingerprint
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATE_DIR)),
+    undefined=StrictUndefined,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True,
+    autoescape=False,
+)
+
+# 시작 시 미리 컴파일
+TEMPLATES = {
+    "deployment": _env.get_template("deployment.yaml.j2"),
+    "service": _env.get_template("service.yaml.j2"),
+    "pvc": _env.get_template("pvc.yaml.j2"),
+    "gitlab_ci": _env.get_template("gitlab-ci.yml.j2"),
+}
+
+# fingerprint 로 판별한 스택별 Dockerfile (Fingerprint.template -> 템플릿)
+DOCKERFILE_TEMPLATES = {
+    name: _env.get_template(f"dockerfiles/{name}.Dockerfile.j2")
+    for name in ("python", "node", "go", "maven", "gradle")
+}
+
+
+def render_manifests(spec: DeploymentSpec) -> dict:
+    """{"deployment", "service", "pvc"} YAML 반환. 영속성이 필요 없으면 pvc 는 빈 문자열"""
+    return {
+        "deployment": TEMPLATES["deployment"].render(spec=spec),
+        "service": TEMPLATES["service"].render(spec=spec),
+        "pvc": TEMPLATES["pvc"].render(spec=spec) if spec.persistence else "",
+    }
+
+
+def render_gitlab_ci(agent_path: str, agent_name: str, branch: str) -> str:
+    return TEMPLATES["gitlab_ci"].render(agent_path=agent_path, agent_name=agent_name, branch=branch)
+
+
+def render_dockerfile(fp: Fingerprint) -> str:
+    """Fingerprint 로 Dockerfile 렌더링. 매니페스트가 하위 디렉터리에 있으면 그 경로에서 복사한다"""
+    return DOCKERFILE_TEMPLATES[fp.template].render(fp=fp, src=f"{fp.root}/" if fp.root else "")
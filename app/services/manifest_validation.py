@@ -0,0 +1,165 @@
+"""
+Kubernetes Manifest(Deployment, Service, PVC) 검증 및 배포 요구사항 추출 형식.
+
+YAML 구문 뿐 아니라 각 오브젝트에 꼭 필요한 필드가 있는지까지 확인하고,
+문서별 오류 목록을 돌려준다.
+"""
+from ruamel.yaml import YAML
+
+# 응답 키 -> (표시 이름, 기대 kind, 기대 apiVersion, 필수 여부)
+MANIFEST_KINDS = {
+    "deployment": ("Deployment", "Deployment", "apps/v1", True),
+    "service": ("Service", "Service", "v1", True),
+    "pvc": ("PVC", "PersistentVolumeClaim", "v1", False),
+}
+
+# 자유 텍스트 요구사항 -> DeploymentRequirements 변환용 structured output schema
+# (strict 모드는 모든 필드가 required 여야 하므로, 언급되지 않은 항목은 null 로 받는다)
+REQUIREMENTS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "deployment_requirements",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "expose": {"type": ["boolean", "null"], "description": "외부 노출 필요 여부"},
+                "service_type": {"type": ["string", "null"], "enum": ["ClusterIP", "NodePort", "LoadBalancer", None]},
+                "container_port": {"type": ["integer", "null"], "description": "컨테이너(내부) 포트"},
+                "service_port": {"type": ["integer", "null"], "description": "Service(외부) 포트"},
+                "cpu": {"type": ["string", "null"], "description": "CPU 요청량 (예: 500m)"},
+                "memory": {"type": ["string", "null"], "description": "메모리 요청량 (예: 512Mi)"},
+                "persistence": {"type": ["boolean", "null"], "description": "영구 저장소 필요 여부"},
+                "storage_size": {"type": ["string", "null"], "description": "저장소 크기 (예: 1Gi)"},
+                "mount_path": {"type": ["string", "null"], "description": "저장소 마운트 경로"},
+                "replicas": {"type": ["integer", "null"], "description": "Pod 개수"},
+            },
+            "required": [
+                "expose", "service_type", "container_port", "service_port", "cpu", "memory",
+                "persistence", "storage_size", "mount_path", "replicas",
+            ],
+            "additionalProperties": False,
+        },
+    },
+}
+
+SERVICE_TYPES = {"ClusterIP", "NodePort", "LoadBalancer", "ExternalName"}
+
+
+class ManifestStats:
+    """배포 요구사항 추출 품질 지표 (첫 응답 유효율, repair 호출 수)"""
+
+    def __init__(self):
+        self.generations = 0
+        self.first_pass_valid = 0
+        self.repair_calls = 0
+        self.repair_success = 0
+        self.failures = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "generations": self.generations,
+            "first_pass_valid": self.first_pass_valid,
+            "first_pass_valid_rate": self.first_pass_valid / self.generations if self.generations else None,
+            "repair_calls": self.repair_calls,
+            "repair_success": self.repair_success,
+            "failures": self.failures,
+        }
+
+
+manifest_stats = ManifestStats()
+
+
+def _get(data, path: str):
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def _check_deployment(doc: dict) -> list:
+    errors = []
+    containers = _get(doc, "spec.template.spec.containers")
+    if not isinstance(containers, list) or not containers:
+        errors.append("spec.template.spec.containers 가 비어 있습니다.")
+    else:
+        for i, container in enumerate(containers):
+            if not isinstance(container, dict) or not container.get("name") or not container.get("image"):
+                errors.append(f"containers[{i}] 에 name/image 가 필요합니다.")
+    match_labels = _get(doc, "spec.selector.matchLabels")
+    template_labels = _get(doc, "spec.template.metadata.labels")
+    if not isinstance(match_labels, dict) or not match_labels:
+        errors.append("spec.selector.matchLabels 가 필요합니다.")
+    elif not isinstance(template_labels, dict) or any(template_labels.get(k) != v for k, v in match_labels.items()):
+        errors.append("spec.selector.matchLabels 가 spec.template.metadata.labels 와 일치하지 않습니다.")
+    return errors
+
+
+def _check_service(doc: dict) -> list:
+    errors = []
+    ports = _get(doc, "spec.ports")
+    if not isinstance(ports, list) or not ports:
+        errors.append("spec.ports 가 비어 있습니다.")
+    else:
+        for i, port in enumerate(ports):
+            if not isinstance(port, dict) or not isinstance(port.get("port"), int):
+                errors.append(f"spec.ports[{i}].port 는 정수여야 합니다.")
+    service_type = _get(doc, "spec.type")
+    if service_type is not None and service_type not in SERVICE_TYPES:
+        errors.append(f"spec.type '{service_type}' 은(는) 지원하지 않는 Service 타입입니다.")
+    if not isinstance(_get(doc, "spec.selector"), dict):
+        errors.append("spec.selector 가 필요합니다.")
+    return errors
+
+
+def _check_pvc(doc: dict) -> list:
+    errors = []
+    if not isinstance(_get(doc, "spec.accessModes"), list):
+        errors.append("spec.accessModes 가 필요합니다.")
+    if not _get(doc, "spec.resources.requests.storage"):
+        errors.append("spec.resources.requests.storage 가 필요합니다.")
+    return errors
+
+
+CHECKERS = {
+    "Deployment": _check_deployment,
+    "Service": _check_service,
+    "PersistentVolumeClaim": _check_pvc,
+}
+
+
+def validate_manifest(key: str, content: str) -> list:
+    """단일 문서 검증. 오류 메시지 목록 반환 (비어 있으면 유효)"""
+    name, kind, api_version, required = MANIFEST_KINDS[key]
+    if not content or not content.strip():
+        return [f"{name} YAML 이 누락되었습니다."] if required else []
+
+    try:
+        doc = YAML(typ="safe").load(content)
+    except Exception as e:
+        return [f"YAML 구문 오류: {str(e)}"]
+    if not isinstance(doc, dict):
+        return ["YAML 최상위가 오브젝트(mapping)가 아닙니다."]
+
+    errors = []
+    if doc.get("kind") != kind:
+        errors.append(f"kind 는 {kind} 여야 합니다. (현재: {doc.get('kind')})")
+    if doc.get("apiVersion") != api_version:
+        errors.append(f"apiVersion 은 {api_version} 이어야 합니다. (현재: {doc.get('apiVersion')})")
+    if not _get(doc, "metadata.name"):
+        errors.append("metadata.name 이 필요합니다.")
+    if not isinstance(doc.get("spec"), dict):
+        errors.append("spec 이 필요합니다.")
+        return errors
+    return errors + CHECKERS[kind](doc)
+
+
+def validate_manifests(manifests: dict) -> dict:
+    """{응답 키: 오류 목록} 반환 (오류가 있는 문서만 포함)"""
+    result = {}
+    for key in MANIFEST_KINDS:
+        errors = validate_manifest(key, manifests.get(key) or "")
+        if errors:
+            result[key] = errors
+    return result
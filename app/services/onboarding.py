@@ -0,0 +1,136 @@
+"""
+프로젝트 온보딩 단계(Dockerfile, Agent 권한, Manifest/CI 커밋)의 공통 구현.
+
+대화형 /api/ci/chat 과 일괄 처리 /api/ci/batch 가 같은 함수를 사용한다.
+"""
+from app.models.deploy_models import DeploymentSpec
+from app.services.agent_config import get_agent_config_writer
+from app.services.fingerprint import Fingerprint, get_fingerprint_engine
+from app.services.generation_cache import make_key, normalize_text
+from app.services.gitlab_client import GITLAB_URL, GitLabError, get_gateway
+from app.services.manifest_renderer import render_dockerfile, render_gitlab_ci, render_manifests
+from app.services.manifest_validation import MANIFEST_KINDS, validate_manifests
+from app.services.task_graph import TaskGraphError, leaf_errors
+from app.services.telemetry import logger, timed
+
+DEFAULT_AGENT_PROJECT = "test1"  # Agent 설정(.gitlab/agents/*)을 관리하는 프로젝트 경로
+DEPLOYMENT_PATHS = ("kubernetes/deployment.yaml", ".gitlab-ci.yml")  # 배포 커밋 대상 디렉터리(kubernetes/, 루트)를 대표하는 경로
+MANIFEST_PATHS = {key: f"kubernetes/{key}.yaml" for key in MANIFEST_KINDS}  # 이 도구가 렌더링/관리하는 Manifest 파일
+
+
+class ManifestRenderError(Exception):
+    """렌더링한 Manifest 가 검증을 통과하지 못함"""
+
+
+def project_path(url_or_path: str) -> str:
+    """URL 에서 프로젝트 경로 추출 (예: https://gitlab.com/mygroup/myproject.git -> mygroup/myproject)"""
+    clean_path = url_or_path.replace(GITLAB_URL, "").replace(".git", "").strip("/")
+    if clean_path.startswith("http"):  # 다른 도메인 입력 시 방어
+        clean_path = clean_path.split("/")[-2] + "/" + clean_path.split("/")[-1]
+    return clean_path
+
+
+def dockerfile_prompt(language: str) -> str:
+    return f"""
+        언어: {language}
+        프로젝트 상황: GitLab CI에서 빌드될 예정.
+        최적의 Dockerfile 내용만 출력하세요. 마크다운 없이 raw text로.
+        """
+
+
+def dockerfile_cache_key(language: str) -> str:
+    """같은 언어로 생성한 Dockerfile 은 프로젝트와 무관하게 재사용"""
+    return make_key("dockerfile", "gpt-4o", language=normalize_text(language))
+
+
+async def fingerprint_project(project_id, branch: str) -> Fingerprint:
+    """매니페스트 파일로 런타임/프레임워크 판별. GitLab 조회가 실패하거나 매니페스트를 해석하지 못하면 빈 결과"""
+    try:
+        return await get_fingerprint_engine().fingerprint(project_id, branch)
+    except GitLabError:
+        return Fingerprint()
+    except (TypeError, ValueError, AttributeError, KeyError) as e:
+        # 예상하지 못한 모양의 매니페스트: 온보딩은 GPT 생성 경로로 계속 진행
+        logger.warning("fingerprint_failed", extra={"project_id": project_id, "error": repr(e)})
+        return Fingerprint()
+    except TaskGraphError as e:
+        # 동시에 읽던 파일 중 하나가 실패해도 GitLab 오류뿐이면 언어 통계로 넘어갈 수 있게 빈 결과
+        if not all(isinstance(error, GitLabError) for error in leaf_errors(e)):
+            raise
+        return Fingerprint()
+
+
+async def project_languages(project_id) -> dict:
+    """GitLab 언어 통계 (조회 실패 시 빈 결과)"""
+    try:
+        return await get_gateway().get_languages(project_id)
+    except GitLabError:
+        return {}
+
+
+def with_primary_language(fingerprint: Fingerprint, languages: dict) -> Fingerprint:
+    """판별하지 못한 fingerprint 에 언어 통계의 주 언어를 채운다"""
+    if fingerprint.language is not None:
+        return fingerprint
+    return Fingerprint(**{**fingerprint.as_dict(), "language": next(iter(languages), "Python")})
+
+
+async def detect_stack(project_id, branch: str) -> Fingerprint:
+    """
+    매니페스트 파일로 런타임/프레임워크 판별. 판별하지 못하면 GitLab 언어 통계의 주 언어만 채운다.
+    (GitLab 조회가 실패해도 온보딩은 GPT 생성으로 계속 진행할 수 있도록 빈 결과를 반환)
+    """
+    fp = await fingerprint_project(project_id, branch)
+    if fp.language is None:
+        fp = with_primary_language(fp, await project_languages(project_id))
+    return fp
+
+
+def template_dockerfile(fp: Fingerprint):
+    """판별한 스택의 템플릿 Dockerfile. 템플릿이 없는 스택이면 None (GPT 로 생성)"""
+    if fp.template is None:
+        return None
+    with timed("render", "render"):
+        return render_dockerfile(fp)
+
+
+async def grant_agent_access(agent_name: str, project_paths: list, branch: str = "main",
+                             agent_repo_path: str = DEFAULT_AGENT_PROJECT) -> dict:
+    """
+    Agent 설정 파일에 여러 프로젝트의 CI/CD 접근 권한을 추가.
+    다른 요청과 모아서 하나의 커밋으로 반영되며, 동시 수정과 충돌하면 다시 병합한다.
+    {"action": "created"|"updated"|"unchanged", "added": [...], "config_path": ...} 반환
+    """
+    return await get_agent_config_writer().grant(agent_repo_path, agent_name, project_paths, branch)
+
+
+def render_deployment_manifests(spec: DeploymentSpec) -> dict:
+    """DeploymentSpec 으로 Manifest 를 렌더링/검증하여 {파일 경로: 내용} 반환"""
+    with timed("render", "render"):
+        manifests = render_manifests(spec)
+    with timed("validate", "validate"):
+        errors = validate_manifests(manifests)
+    if errors:
+        key, doc_errors = next(iter(errors.items()))
+        raise ManifestRenderError(f"{MANIFEST_KINDS[key][0]} YAML 렌더링 결과가 올바르지 않습니다.\n오류: {'; '.join(doc_errors)}")
+
+    # 데이터 영속성이 필요 없으면 PVC 는 렌더링 결과가 비어 있으므로 커밋하지 않는다
+    return {MANIFEST_PATHS[key]: content for key, content in manifests.items() if content}
+
+
+def stale_manifests(files: dict) -> list:
+    """관리하는 Manifest 중 이번에 렌더링하지 않은 경로 (레포에 남아 있으면 CI 가 계속 apply 하므로 삭제 대상)"""
+    return [path for path in MANIFEST_PATHS.values() if path not in files]
+
+
+def render_ci_file(agent_path: str, agent_name: str, branch: str) -> str:
+    """.gitlab-ci.yml 렌더링 (배포 설정과 무관하므로 요구사항 추출과 동시에 준비할 수 있다)"""
+    with timed("render", "render"):
+        return render_gitlab_ci(agent_path, agent_name, branch)
+
+
+def build_deployment_files(spec: DeploymentSpec, agent_path: str, agent_name: str, branch: str) -> dict:
+    """DeploymentSpec 으로 Manifest 와 .gitlab-ci.yml 을 렌더링하여 {파일 경로: 내용} 반환"""
+    files = render_deployment_manifests(spec)
+    files[".gitlab-ci.yml"] = render_ci_file(agent_path, agent_name, branch)
+    return files
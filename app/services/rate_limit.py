@@ -0,0 +1,277 @@
+"""
+업스트림(OpenAI 모델별, GitLab) 호출 한도 스케줄러.
+
+- 토큰 버킷: 분당 요청 수(RPM)와, OpenAI 는 분당 토큰 수(TPM)를 함께 제한한다.
+  응답의 rate-limit 헤더(x-ratelimit-*, RateLimit-*)로 실제 한도와 남은 양을 반영하고,
+  429 를 받으면 Retry-After 동안 해당 업스트림 호출을 모두 멈춘다.
+- 우선순위 레인: 한도를 기다리는 호출은 레인 순서(interactive > generation > batch)로,
+  같은 레인 안에서는 도착 순서로 처리한다. 레인은 호출 시 지정하거나 lane() 으로 감싼 코드 전체에 적용한다.
+- 마감 시간: 바로 실패시키지 않고 줄을 세우되, 레인별 최대 대기 시간 안에 한도를 얻지 못하면 RateLimitTimeout.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from app.services.telemetry import RATE_LIMIT_WAIT, RATE_LIMITED_TOTAL, record
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() != "false"
+OPENAI_RPM = float(os.environ.get("OPENAI_RPM", "500"))         # 모델별 분당 요청 수
+OPENAI_TPM = float(os.environ.get("OPENAI_TPM", "30000"))       # 모델별 분당 토큰 수 (입력 + 출력)
+GITLAB_RPM = float(os.environ.get("GITLAB_RPM", "2000"))        # GitLab API 분당 요청 수
+RATE_LIMIT_RETRY_AFTER = float(os.environ.get("RATE_LIMIT_RETRY_AFTER", "1"))  # 429 에 Retry-After 가 없을 때 멈추는 시간(초)
+COMPLETION_TOKENS_ESTIMATE = int(os.environ.get("COMPLETION_TOKENS_ESTIMATE", "256"))  # max_tokens 미지정 시 응답 토큰 예상치
+
+# 업스트림별 (RPM, TPM). RATE_LIMITS='{"openai:gpt-4.1-mini": [500, 200000], "gitlab": [600]}' 형식으로 덮어쓸 수 있다
+RATE_LIMITS = {
+    "openai": (OPENAI_RPM, OPENAI_TPM),
+    "gitlab": (GITLAB_RPM, None),
+    **{k: tuple(v) + (None,) * (2 - len(v)) for k, v in json.loads(os.environ.get("RATE_LIMITS", "{}")).items()},
+}
+
+# 레인 -> (우선순위: 작을수록 먼저, 한도를 기다릴 수 있는 최대 시간(초))
+LANES = {
+    "interactive": (0, float(os.environ.get("RATE_LIMIT_WAIT_INTERACTIVE", "30"))),  # 대화 중 짧은 추출/분류
+    "generation": (1, float(os.environ.get("RATE_LIMIT_WAIT_GENERATION", "60"))),    # Dockerfile 등 긴 생성
+    "batch": (2, float(os.environ.get("RATE_LIMIT_WAIT_BATCH", "600"))),             # 일괄 온보딩
+}
+
+_lane: ContextVar = ContextVar("rate_limit_lane", default="interactive")
+
+
+class RateLimitTimeout(Exception):
+    """마감 시간 안에 호출 한도를 얻지 못함"""
+
+    def __init__(self, upstream: str, lane: str, retry_after: float):
+        super().__init__(f"{upstream} 호출 한도 대기 시간 초과 (lane={lane}, 약 {retry_after:.1f}초 후 재시도 가능)")
+        self.upstream = upstream
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+@contextmanager
+def lane(name: str):
+    """블록 안(과 그 안에서 만든 task)의 호출에 적용할 기본 레인"""
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+def deadline_for(lane_name: str = None) -> float:
+    """레인의 최대 대기 시간으로 정한 마감 시각 (time.monotonic 기준). 재시도 전체에 같은 마감을 쓴다"""
+    return time.monotonic() + LANES[lane_name or current_lane()][1]
+
+
+def estimate_tokens(messages: list, max_tokens: int = None) -> int:
+    """요청이 차지할 토큰 수 어림값 (글자 수 / 3 + 응답 예상치). 응답의 usage 로 정산한다"""
+    prompt = sum(len(m.get("content") or "") for m in messages if isinstance(m.get("content"), str))
+    return prompt // 3 + (max_tokens or COMPLETION_TOKENS_ESTIMATE)
+
+
+def _number(value):
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def openai_headers(headers) -> dict:
+    """OpenAI 응답 헤더(x-ratelimit-*, retry-after) -> RateLimiter.observe 인자"""
+    retry_after = _number(headers.get("retry-after-ms"))
+    return {
+        "limit_requests": _number(headers.get("x-ratelimit-limit-requests")),
+        "remaining_requests": _number(headers.get("x-ratelimit-remaining-requests")),
+        "limit_tokens": _number(headers.get("x-ratelimit-limit-tokens")),
+        "remaining_tokens": _number(headers.get("x-ratelimit-remaining-tokens")),
+        "retry_after": retry_after / 1000 if retry_after is not None else _number(headers.get("retry-after")),
+    }
+
+
+def gitlab_headers(headers) -> dict:
+    """GitLab 응답 헤더(RateLimit-*, Retry-After) -> RateLimiter.observe 인자"""
+    return {
+        "limit_requests": _number(headers.get("ratelimit-limit")),
+        "remaining_requests": _number(headers.get("ratelimit-remaining")),
+        "retry_after": _number(headers.get("retry-after")),
+    }
+
+
+class TokenBucket:
+    """분당 per_minute 만큼 일정하게 채워지고 그만큼까지 쌓이는 버킷. 사용량 정산으로 음수가 될 수 있다"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """amount 를 꺼낼 수 있을 때까지 남은 시간. 한도보다 큰 요청은 버킷이 가득 차면 통과시킨다"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) * 60 / self.capacity
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= amount
+
+    def put(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def observe(self, limit, remaining, now: float):
+        """서버가 알려준 한도/남은 양에 맞춘다 (남은 양은 우리가 어림한 값보다 적을 때만 반영)"""
+        self._refill(now)
+        if limit and limit != self.capacity:
+            self.capacity = limit
+            self.tokens = min(self.tokens, limit)
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    cost: float = field(compare=False)
+    event: asyncio.Event = field(compare=False, default_factory=asyncio.Event)
+
+
+class RateLimiter:
+    """업스트림 하나의 요청/토큰 버킷과 우선순위 대기열"""
+
+    def __init__(self, name: str, rpm: float, tpm: float = None):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.paused_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self.counts = {"acquired": 0, "waited": 0, "timeouts": 0, "throttled": 0}
+
+    def _delay(self, cost: float, now: float) -> float:
+        delay = max(self.paused_until - now, self.requests.delay(1, now))
+        if self.tokens is not None and cost:
+            delay = max(delay, self.tokens.delay(cost, now))
+        return delay
+
+    async def acquire(self, cost: float = 0, lane_name: str = None, deadline: float = None):
+        """
+        요청 1개(와 토큰 cost)를 차감. 한도가 없으면 앞선 대기자(우선순위, 도착 순) 다음 차례까지 기다린다.
+        deadline 전에 차례가 오지 않거나, 차례가 와도 마감 후에야 한도가 생기면 RateLimitTimeout.
+        """
+        lane_name = lane_name or current_lane()
+        deadline = deadline if deadline is not None else deadline_for(lane_name)
+        waiter = _Waiter(LANES[lane_name][0], next(self._seq), cost)
+        heapq.heappush(self._waiters, waiter)
+        start = time.monotonic()
+        acquired = False
+        try:
+            while True:
+                now = time.monotonic()
+                delay = self._delay(cost, now) if self._waiters[0] is waiter else None
+                if delay is not None and delay <= 0:
+                    break
+                if now + (delay or 0) > deadline:
+                    self.counts["timeouts"] += 1
+                    RATE_LIMITED_TOTAL.labels(self.name, "timeout").inc()
+                    raise RateLimitTimeout(self.name, lane_name, delay or self._delay(cost, now))
+                # 맨 앞이면 한도가 생길 때까지, 아니면 앞 차례가 끝나 깨울 때까지 (마감까지만) 기다린다
+                waiter.event.clear()
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), delay if delay is not None else deadline - now)
+                except asyncio.TimeoutError:
+                    pass
+            heapq.heappop(self._waiters)
+            self.requests.take(1, now)
+            if self.tokens is not None and cost:
+                self.tokens.take(cost, now)
+            acquired = True
+        finally:
+            if not acquired:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            if self._waiters:
+                self._waiters[0].event.set()
+            waited = time.monotonic() - start
+            if acquired:
+                self.counts["acquired"] += 1
+            if waited > 0.001:
+                self.counts["waited"] += 1
+                record("rate_limit", waited)
+            RATE_LIMIT_WAIT.labels(self.name, lane_name).observe(waited)
+
+    def settle(self, estimated: float, actual: float):
+        """acquire 때 어림한 토큰 수를 실제 사용량으로 정산"""
+        if self.tokens is not None and actual is not None:
+            self.tokens.put(estimated - actual)
+
+    def observe(self, limit_requests=None, remaining_requests=None, limit_tokens=None, remaining_tokens=None,
+                retry_after=None):
+        """
+        응답 헤더로 버킷의 한도와 남은 양을 맞춘다. 남은 양이 0 이면 버킷이 한도 속도로 다시 찰 때까지 기다리게 된다
+        (reset 헤더는 한도가 "가득" 찰 때까지의 시간이라 그때까지 멈추면 너무 오래 기다린다).
+        """
+        now = time.monotonic()
+        self.requests.observe(limit_requests, remaining_requests, now)
+        if self.tokens is not None:
+            self.tokens.observe(limit_tokens, remaining_tokens, now)
+
+    def throttled(self, retry_after: float = None, **headers):
+        """429 응답: 헤더를 반영하고 Retry-After 동안 모든 호출을 멈춘다"""
+        self.counts["throttled"] += 1
+        RATE_LIMITED_TOTAL.labels(self.name, "throttled").inc()
+        self.observe(**headers)
+        self.pause(retry_after or RATE_LIMIT_RETRY_AFTER)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        self.requests._refill(now)
+        stats = {
+            **self.counts,
+            "queued": len(self._waiters),
+            "paused": round(max(0.0, self.paused_until - now), 3),
+            "rpm": self.requests.capacity,
+            "requests_available": round(self.requests.tokens, 1),
+        }
+        if self.tokens is not None:
+            self.tokens._refill(now)
+            stats.update(tpm=self.tokens.capacity, tokens_available=round(self.tokens.tokens, 1))
+        return stats
+
+
+_limiters = {}
+
+
+def get_limiter(name: str):
+    """
+    업스트림별 공유 limiter (RATE_LIMIT_ENABLED=false 면 None).
+    "openai:<모델>" 은 모델마다 따로 버킷을 두고, 모델별 설정이 없으면 "openai" 한도를 쓴다.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return None
+    limiter = _limiters.get(name)
+    if limiter is None:
+        rpm, tpm = RATE_LIMITS.get(name) or RATE_LIMITS[name.split(":")[0]]
+        limiter = _limiters[name] = RateLimiter(name, rpm, tpm)
+    return limiter
+
+
+def rate_limit_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
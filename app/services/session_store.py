@@ -0,0 +1,233 @@
+import abc
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from app.services.cache import TTLCache
+from app.services.telemetry import logger
+
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")                  # memory | sqlite
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "86400"))                    # 마지막 대화 이후 세션 유지 시간(초)
+SESSION_MAX_SIZE = int(os.environ.get("SESSION_MAX_SIZE", "100000"))           # memory 백엔드 최대 세션 수
+SESSION_DB_PATH = os.environ.get("SESSION_DB_PATH", "/data/sessions.db")       # sqlite 백엔드 파일 (공유 볼륨)
+SESSION_LOCK_TIMEOUT = float(os.environ.get("SESSION_LOCK_TIMEOUT", "30"))     # 사용자별 잠금 대기 시간(초)
+SESSION_LOCK_LEASE = float(os.environ.get("SESSION_LOCK_LEASE", "60"))         # 잠금 보유자가 죽었을 때 자동 해제까지(초, 보유 중에는 lease/3 마다 갱신)
+
+
+class SessionLockTimeout(Exception):
+    """같은 사용자의 이전 요청이 잠금을 놓지 않음"""
+
+
+class _UserLocks:
+    """프로세스 내 사용자별 asyncio 잠금. 대기자가 없어지면 잠금 객체를 정리한다."""
+
+    def __init__(self):
+        self._locks = {}  # user_id -> [asyncio.Lock, 대기/보유 중인 요청 수]
+
+    @asynccontextmanager
+    async def hold(self, user_id: str):
+        entry = self._locks.setdefault(user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            try:
+                await asyncio.wait_for(entry[0].acquire(), SESSION_LOCK_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise SessionLockTimeout(user_id)
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[user_id]
+
+
+class SessionStore(abc.ABC):
+    """
+    대화 세션 저장소 인터페이스.
+    ci_chat 은 lock(user_id) 안에서 get -> 단계 처리 -> save 순서로 사용한다.
+    """
+
+    shared = False  # 프로세스 재시작/다른 레플리카 후에도 같은 세션이 보이는지 (백그라운드 작업 재개에 필요)
+
+    @abc.abstractmethod
+    async def get(self, user_id: str):
+        """세션 dict, 없거나 만료되었으면 None"""
+
+    @abc.abstractmethod
+    async def save(self, user_id: str, session: dict):
+        """세션 저장 (TTL 갱신)"""
+
+    @abc.abstractmethod
+    async def delete(self, user_id: str):
+        """세션 삭제"""
+
+    @abc.abstractmethod
+    def lock(self, user_id: str):
+        """사용자별 잠금 async context manager. SESSION_LOCK_TIMEOUT 안에 못 잡으면 SessionLockTimeout"""
+
+    async def ping(self):
+        """readiness 확인용. 저장소를 쓸 수 없으면 예외"""
+
+    async def aclose(self):
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """
+    단일 프로세스용 LRU + TTL 세션 저장소.
+    SESSION_MAX_SIZE 를 넘으면 가장 오래된 대화부터 제거되고, SESSION_TTL 동안 대화가 없으면 만료된다.
+    """
+
+    def __init__(self, maxsize: int = SESSION_MAX_SIZE, ttl: float = SESSION_TTL):
+        self._cache = TTLCache(maxsize, ttl)
+        self._locks = _UserLocks()
+
+    async def get(self, user_id: str):
+        return self._cache.get(user_id)
+
+    async def save(self, user_id: str, session: dict):
+        self._cache.set(user_id, session)
+
+    async def delete(self, user_id: str):
+        self._cache.invalidate(user_id)
+
+    def lock(self, user_id: str):
+        return self._locks.hold(user_id)
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    여러 워커/레플리카가 공유하는 SQLite(WAL) 세션 저장소.
+    사용자별 잠금은 lease 테이블로 구현하여 프로세스 간에도 같은 user_id 의 단계 처리가 직렬화된다.
+    """
+
+    shared = True
+
+    def __init__(self, path: str = SESSION_DB_PATH, ttl: float = SESSION_TTL, lease: float = SESSION_LOCK_LEASE):
+        self.ttl = ttl
+        self.lease = lease
+        self._owner = uuid.uuid4().hex
+        self._db_lock = threading.Lock()
+        self._local_locks = _UserLocks()  # 같은 프로세스 내 대기는 DB 폴링 없이 asyncio 잠금으로 처리
+        self._next_purge = 0.0
+
+        self._path = path
+        self._conn = None  # 첫 쿼리 때 연다 (서버 시작 경로에서 공유 볼륨 I/O 를 하지 않도록)
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " user_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions(expires_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_locks ("
+            " user_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        return conn
+
+    def _execute(self, sql: str, params=()):
+        with self._db_lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            cursor = self._conn.execute(sql, params)
+            return cursor.fetchone(), cursor.rowcount
+
+    async def _run(self, sql: str, params=()):
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def get(self, user_id: str):
+        row, _ = await self._run(
+            "SELECT data FROM sessions WHERE user_id = ? AND expires_at >= ?", (user_id, time.time())
+        )
+        return json.loads(row[0]) if row else None
+
+    async def save(self, user_id: str, session: dict):
+        now = time.time()
+        await self._run(
+            "INSERT INTO sessions (user_id, data, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+            (user_id, json.dumps(session, ensure_ascii=False), now + self.ttl),
+        )
+        if now >= self._next_purge:
+            # 만료된 세션은 주기적으로 일괄 삭제 (expires_at 인덱스 사용)
+            self._next_purge = now + 60
+            await self._run("DELETE FROM sessions WHERE expires_at < ?", (now,))
+
+    async def delete(self, user_id: str):
+        await self._run("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+
+    async def _try_acquire(self, user_id: str) -> bool:
+        now = time.time()
+        _, rowcount = await self._run(
+            "INSERT INTO session_locks (user_id, owner, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(user_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+            " WHERE session_locks.expires_at < ?",
+            (user_id, self._owner, now + self.lease, now),
+        )
+        return rowcount == 1
+
+    async def _heartbeat(self, user_id: str):
+        """잠금을 보유하는 동안 lease 를 연장 (긴 단계 처리 중에 다른 레플리카가 잠금을 가져가지 않도록)"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                _, rowcount = await self._run(
+                    "UPDATE session_locks SET expires_at = ? WHERE user_id = ? AND owner = ?",
+                    (time.time() + self.lease, user_id, self._owner),
+                )
+                if rowcount == 0:
+                    logger.warning("session_lock_lost", extra={"user_id": user_id})
+            except Exception as e:
+                logger.warning("session_lock_renew_failed", extra={"user_id": user_id, "error": repr(e)})
+
+    @asynccontextmanager
+    async def lock(self, user_id: str):
+        async with self._local_locks.hold(user_id):
+            deadline = time.monotonic() + SESSION_LOCK_TIMEOUT
+            while not await self._try_acquire(user_id):
+                if time.monotonic() >= deadline:
+                    raise SessionLockTimeout(user_id)
+                await asyncio.sleep(0.05)
+            heartbeat = asyncio.ensure_future(self._heartbeat(user_id))
+            try:
+                yield
+            finally:
+                heartbeat.cancel()
+                await self._run(
+                    "DELETE FROM session_locks WHERE user_id = ? AND owner = ?", (user_id, self._owner)
+                )
+
+    async def ping(self):
+        await self._run("SELECT 1")
+
+    async def aclose(self):
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store = None
+
+
+def get_session_store() -> SessionStore:
+    """SESSION_BACKEND 환경변수에 따른 프로세스 공유 세션 저장소 (최초 사용 시 생성)"""
+    global _store
+    if _store is None:
+        _store = SQLiteSessionStore() if SESSION_BACKEND == "sqlite" else MemorySessionStore()
+    return _store
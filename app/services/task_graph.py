@@ -0,0 +1,117 @@
+"""
+채팅 단계 안의 독립적인 GitLab/LLM 호출을 동시에 실행하는 작은 task graph 실행기.
+
+    graph = TaskGraph("url_parse")
+    graph.add("project", lambda: gateway.get_project(path))
+    graph.add("dockerfile", lambda project: gateway.file_exists(project["id"], "Dockerfile", "main"), after=["project"])
+    graph.add("stack", lambda project: detect_stack(project["id"], "main"), after=["project"])
+    results = await graph.run()   # {"project": ..., "dockerfile": ..., "stack": ...}
+
+- 각 단계는 after 에 적은 단계가 모두 끝나면 시작하고, 그 결과를 같은 이름의 키워드 인자로 받는다.
+- 한 단계가 실패하면 나머지 단계를 모두 취소하고, 그 사이 실패한 단계까지 모아 TaskGraphError 로 올린다.
+  호출하는 쪽은 leaf_errors(error) 로 (중첩된 graph 까지 펼친) 원래 예외를 확인한다.
+- cancel(name) 으로 더 이상 필요 없는 단계를 취소하면 그 단계와 뒤따르는 단계는 결과에서 빠진다.
+- 단계별 시간은 STEP_SECONDS{step="<graph>:<단계>"} 로 기록된다.
+"""
+import asyncio
+import inspect
+
+from app.services.telemetry import timed
+
+
+class TaskGraphError(Exception):
+    """하나 이상의 단계가 실패함. errors: {단계 이름: 예외}"""
+
+    def __init__(self, graph: str, errors: dict):
+        self.graph = graph
+        self.errors = errors
+        super().__init__(f"{graph}: " + "; ".join(f"{name} 단계 실패 ({error!r})" for name, error in errors.items()))
+
+
+def leaf_errors(error: BaseException) -> list:
+    """TaskGraphError 를 (중첩된 것까지) 펼쳐 실제로 실패한 예외 목록을 단계 순서대로 반환"""
+    if not isinstance(error, TaskGraphError):
+        return [error]
+    return [leaf for inner in error.errors.values() for leaf in leaf_errors(inner)]
+
+
+class _Skipped(Exception):
+    """앞 단계가 실패/취소되어 실행하지 않음 (내부용)"""
+
+
+class TaskGraph:
+    def __init__(self, name: str):
+        self.name = name
+        self._steps = {}  # 단계 이름 -> (함수, 선행 단계 목록). 추가 순서가 곧 위상 정렬 순서
+        self._tasks = {}
+
+    def add(self, name: str, fn, after=()):
+        """단계 추가. 선행 단계는 먼저 추가되어 있어야 한다 (순환 의존이 생길 수 없음)"""
+        if name in self._steps:
+            raise ValueError(f"이미 추가된 단계입니다: {name}")
+        unknown = [dep for dep in after if dep not in self._steps]
+        if unknown:
+            raise ValueError(f"{name} 의 선행 단계가 없습니다: {', '.join(unknown)}")
+        self._steps[name] = (fn, tuple(after))
+        return self
+
+    def cancel(self, name: str):
+        """아직 끝나지 않은 단계를 취소 (뒤따르는 단계도 실행되지 않음)"""
+        task = self._tasks.get(name)
+        if task is not None:
+            task.cancel()
+
+    async def _run_step(self, name: str, fn, after: tuple, results: dict):
+        if after:
+            deps = [self._tasks[dep] for dep in after]
+            await asyncio.wait(deps)
+            if any(dep.cancelled() or dep.exception() is not None for dep in deps):
+                raise _Skipped(name)
+        with timed(f"{self.name}:{name}"):
+            value = fn(**{dep: results[dep] for dep in after})
+            if inspect.isawaitable(value):
+                value = await value
+        results[name] = value
+
+    async def run(self) -> dict:
+        """모든 단계를 실행하고 {단계 이름: 결과} 반환 (취소/건너뛴 단계는 없음)"""
+        results = {}
+        names = {}
+        for name, (fn, after) in self._steps.items():
+            task = asyncio.ensure_future(self._run_step(name, fn, after, results))
+            self._tasks[name] = task
+            names[task] = name
+
+        pending = set(names)
+        errors = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                errors.update(self._errors(done, names))
+                if errors:
+                    # 하나라도 실패하면 이 단계의 결과는 쓸 수 없으므로 나머지를 정리
+                    for task in pending:
+                        task.cancel()
+                    if pending:
+                        done, _ = await asyncio.wait(pending)
+                        errors.update(self._errors(done, names))
+                    errors = {name: errors[name] for name in self._steps if name in errors}  # 추가 순서로 정렬
+                    raise TaskGraphError(self.name, errors) from next(iter(errors.values()))
+        except asyncio.CancelledError:
+            # 요청 자체가 취소되면 실행 중인 호출도 모두 취소
+            for task in names:
+                task.cancel()
+            await asyncio.gather(*names, return_exceptions=True)
+            raise
+        return results
+
+    @staticmethod
+    def _errors(done, names: dict) -> dict:
+        errors = {}
+        for task in done:
+            if task.cancelled():
+                continue
+            error = task.exception()
+            if error is not None and not isinstance(error, _Skipped):
+                errors[names[task]] = error
+        return errors
@@ -0,0 +1,216 @@
+"""
+지연 시간/토큰 사용량 계측과 구조화 로그.
+
+- Prometheus 지표: LLM/GitLab 호출 시간, 단계별(검증/렌더링/커밋/채팅 단계) 시간, 모델별 토큰 수와 비용,
+  백그라운드 작업 대기/실행 시간, 업스트림 호출 한도 대기 시간
+- 요청별 타이밍: TimingMiddleware 가 요청마다 누적 dict 를 contextvar 로 열어 두고,
+  record() 된 시간을 Server-Timing 응답 헤더와 요청 로그에 싣는다.
+- 로그: LOG_FORMAT=json 이면 한 줄에 JSON 하나 (extra 필드 포함)
+"""
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Histogram
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")                                   # json | text
+TIMING_HEADERS = os.environ.get("TIMING_HEADERS", "false").lower() == "true"        # 모든 응답에 Server-Timing 포함
+TIMING_REQUEST_HEADER = "x-debug-timing"                                            # 요청별로 켤 때 사용하는 헤더
+
+# 1M 토큰당 USD (입력, 출력). MODEL_PRICES='{"gpt-4o": [2.5, 10]}' 형식으로 덮어쓸 수 있다
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    **{k: tuple(v) for k, v in json.loads(os.environ.get("MODEL_PRICES", "{}")).items()},
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HTTP_SECONDS = Histogram(
+    "gpt_manager_http_request_seconds", "API 요청 처리 시간", ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "gpt_manager_llm_request_seconds", "LLM 호출 시간 (재시도 포함)", ["model", "mode", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("gpt_manager_llm_tokens_total", "LLM 토큰 사용량", ["model", "kind"])
+LLM_COST = Counter("gpt_manager_llm_cost_usd_total", "LLM 예상 비용(USD)", ["model"])
+GITLAB_SECONDS = Histogram(
+    "gpt_manager_gitlab_request_seconds", "GitLab API 호출 시간", ["method", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STEP_SECONDS = Histogram(
+    "gpt_manager_step_seconds", "처리 단계별 시간 (chat 단계, 렌더링, 검증, 커밋)", ["step"],
+    buckets=LATENCY_BUCKETS,
+)
+JOB_SECONDS = Histogram(
+    "gpt_manager_job_seconds", "백그라운드 작업 대기/실행 시간", ["kind", "phase"],
+    buckets=LATENCY_BUCKETS,
+)
+JOBS_TOTAL = Counter("gpt_manager_jobs_total", "끝난 백그라운드 작업 수", ["kind", "status"])
+RATE_LIMIT_WAIT = Histogram(
+    "gpt_manager_rate_limit_wait_seconds", "업스트림 호출 한도 대기 시간", ["upstream", "lane"],
+    buckets=LATENCY_BUCKETS,
+)
+RATE_LIMITED_TOTAL = Counter(
+    "gpt_manager_rate_limited_total", "호출 한도 초과 (throttled: 429 응답, timeout: 마감 시간 초과)", ["upstream", "outcome"],
+)
+
+_timings: ContextVar = ContextVar("timings", default=None)
+
+logger = logging.getLogger("gpt_manager")
+
+
+class JSONFormatter(logging.Formatter):
+    """logging 의 extra 필드까지 한 줄 JSON 으로 출력"""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in self._RESERVED})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging():
+    handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logger.handlers[:] = [handler]
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+# -------------------------------
+# 요청별 타이밍
+# -------------------------------
+def record(category: str, seconds: float):
+    """현재 요청의 카테고리별 누적 시간에 더한다 (요청 밖에서는 무시)"""
+    timings = _timings.get()
+    if timings is not None:
+        timings[category] = timings.get(category, 0.0) + seconds
+
+
+@contextmanager
+def timed(step: str, category: str = None):
+    """블록 실행 시간을 STEP_SECONDS{step} 에 기록하고, category 가 있으면 요청별 타이밍에도 더한다"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STEP_SECONDS.labels(step).observe(elapsed)
+        if category:
+            record(category, elapsed)
+
+
+def observe_llm(model: str, mode: str, outcome: str, seconds: float, usage=None):
+    LLM_SECONDS.labels(model, mode, outcome).observe(seconds)
+    record("llm", seconds)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    LLM_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(model, "completion").inc(completion_tokens)
+    price = MODEL_PRICES.get(model)
+    if price:
+        LLM_COST.labels(model).inc((prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000)
+    timings = _timings.get()
+    if timings is not None:
+        timings["tokens"] = timings.get("tokens", 0) + prompt_tokens + completion_tokens
+
+
+# 지표 label 값이 프로젝트/파일/커밋마다 늘어나지 않도록 경로의 가변 부분을 자리표시자로 바꾼다
+_ENDPOINT_PATTERNS = (
+    (re.compile(r"^/projects/[^/]+"), "/projects/:id"),
+    (re.compile(r"/repository/files/.+$"), "/repository/files/:path"),
+    (re.compile(r"/repository/blobs/[^/]+"), "/repository/blobs/:sha"),
+    (re.compile(r"/repository/branches/.+$"), "/repository/branches/:branch"),
+)
+
+
+def gitlab_endpoint(path: str) -> str:
+    """지표 label 용으로 프로젝트 id/파일 경로/blob SHA/브랜치를 지운 경로 (예: /projects/:id/repository/files/:path)"""
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def observe_gitlab(method: str, path: str, status, seconds: float):
+    GITLAB_SECONDS.labels(method, gitlab_endpoint(path), str(status)).observe(seconds)
+    record("gitlab", seconds)
+
+
+# -------------------------------
+# ASGI 미들웨어
+# -------------------------------
+class TimingMiddleware:
+    """
+    요청별 타이밍 수집 + HTTP 지표 + 요청 로그.
+    TIMING_HEADERS=true 이거나 요청에 X-Debug-Timing 헤더가 있으면 Server-Timing 헤더를 붙인다.
+    스트리밍 응답은 헤더가 먼저 나가므로 그 시점까지의 값만 담긴다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+        want_header = TIMING_HEADERS or any(name == TIMING_REQUEST_HEADER.encode() for name, _ in scope["headers"])
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if want_header:
+                    total = time.perf_counter() - start
+                    header = server_timing(timings, total)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            elapsed = time.perf_counter() - start
+            endpoint = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            HTTP_SECONDS.labels(endpoint, scope["method"], str(status)).observe(elapsed)
+            fields = {"method": scope["method"], "path": scope["path"], "status": status,
+                      "duration_ms": round(elapsed * 1000, 2)}
+            for name, value in timings.items():
+                if name == "tokens":
+                    fields["tokens"] = value
+                else:
+                    fields[f"{name}_ms"] = round(value * 1000, 2)
+            logger.info("request", extra=fields)
+
+
+def server_timing(timings: dict, total: float) -> str:
+    parts = [f"{name};dur={value * 1000:.1f}" for name, value in timings.items() if name != "tokens"]
+    if "tokens" in timings:
+        parts.append(f'tokens;desc="{timings["tokens"]}"')
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,109 @@
+"""
+같은 Agent 로 동시에 온보딩할 때 config.yaml 의 ci_access 항목이 유실되지 않는지 확인하는 동시성 테스트.
+
+N개의 세션을 agent_check 단계에 두고 --spread 초 안에 고르게 Agent 이름을 보낸다.
+- naive      : 이전 방식 (읽기 -> 수정 -> last_commit_id 없이 덮어쓰기) 을 직접 재현
+- replicas   : --replicas 개의 AgentConfigWriter 에 세션을 나눠 배정 (여러 레플리카가 같은 파일을 쓰는 경우,
+               레플리카 사이의 충돌은 last_commit_id 재시도로 해결)
+- coalesced  : /api/ci/chat 경유, 공유 AgentConfigWriter (요청을 모아서 커밋)
+
+    python -m bench.agent_config_bench --sessions 50 --gitlab-latency 0.02 --spread 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from ruamel.yaml import YAML
+
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--gitlab-latency", type=float, default=0.02)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--spread", type=float, default=0.5, help="세션 도착 시각을 0~spread 초에 고르게 분산")
+    args = parser.parse_args()
+
+    fake = FakeGitLab(latency=args.gitlab_latency)
+    gitlab_url = serve_in_thread(fake.app)
+    fake.base_url = gitlab_url
+    apps = [fake.add_project(f"team/app{i}") for i in range(args.sessions)]
+    os.environ["GITLAB_URL"] = gitlab_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    from app.main import app, session_store
+    from app.services import agent_config
+    from app.services.gitlab_client import get_gateway
+    from app.services.onboarding import DEFAULT_AGENT_PROJECT
+
+    agent_project = fake.add_project(DEFAULT_AGENT_PROJECT)
+
+    async def naive_grant(agent_name: str, path: str):
+        gateway = get_gateway()
+        agent_project = await gateway.get_project(DEFAULT_AGENT_PROJECT)
+        config_path = agent_config.agent_config_path(agent_name)
+        current = await gateway.get_file(agent_project["id"], config_path, "main")
+        content, _ = agent_config.merge_agent_config(current["text"] if current else None, [path])
+        try:
+            await gateway.commit_files(agent_project["id"], "main", {config_path: content}, "grant")
+        except Exception:
+            pass  # 이전 코드도 생성 충돌은 사용자에게 오류로만 알렸음
+
+    async def run(mode: str, client: httpx.AsyncClient):
+        # 모드마다 다른 Agent 를 사용하여 서로의 결과가 섞이지 않게 함
+        agent_name = f"shared-{mode}"
+        commits_before = len(fake.commits)
+        conflicts_before = fake.conflicts
+        agent_config._writer = agent_config.AgentConfigWriter()
+        writers = [agent_config.AgentConfigWriter() for _ in range(args.replicas)]
+        failures = 0
+
+        async def one(i: int):
+            await asyncio.sleep(args.spread * i / args.sessions)
+            if mode == "naive":
+                return await naive_grant(agent_name, apps[i]["path_with_namespace"])
+            if mode == "replicas":
+                try:
+                    await writers[i % args.replicas].grant(
+                        DEFAULT_AGENT_PROJECT, agent_name, [apps[i]["path_with_namespace"]], "main"
+                    )
+                except Exception:
+                    nonlocal failures
+                    failures += 1
+                return
+            uid = f"agent-{mode}-{i}"
+            await session_store.save(uid, {
+                "stage": "agent_check",
+                "project_id": apps[i]["id"],
+                "project_path_with_namespace": apps[i]["path_with_namespace"],
+                "default_branch": "main",
+            })
+            r = await client.post("/api/ci/chat", json={"user_id": uid, "message": agent_name})
+            r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - start
+
+        content = agent_project["files"].get(agent_config.agent_config_path(agent_name), "")
+        listed = {p["id"] for p in (YAML(typ="safe").load(content) or {}).get("ci_access", {}).get("projects", [])}
+        commits = sum(1 for c in fake.commits[commits_before:] if c["project_id"] == agent_project["id"])
+        print(f"{mode:10s}  grants={len(listed):3d}/{args.sessions}  lost={args.sessions - len(listed):3d}  "
+              f"commits={commits:3d}  conflicts={fake.conflicts - conflicts_before:3d}  "
+              f"failed={failures:2d}  wall={elapsed:5.2f}s")
+
+    async def run_all():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+            for mode in ("naive", "replicas", "coalesced"):
+                await run(mode, client)
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
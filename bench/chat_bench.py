@@ -0,0 +1,240 @@
+"""
+/api/ci/chat 전체 온보딩 대화(url_parse -> get_deployment_requirements) 벤치마크.
+
+fake GitLab 과 OpenAI stub 을 지연 시간을 주입해 띄우고, 동시 사용자 N명이 각각
+--conversations 번씩 새 프로젝트를 처음부터 끝까지 온보딩한다.
+단계별 p50/p95/p99, 동시 사용자 수별 처리량(req/s), 세션 저장소 메모리 증가량을 출력하고
+--output 으로 JSON 결과를 남긴다. --compare 로 이전 결과와 비교할 수 있다.
+
+    python -m bench.chat_bench --users 1 8 32 --llm-latency 0.3 --gitlab-latency 0.02 --output bench-results.json
+    python -m bench.chat_bench --users 1 8 32 --compare bench-results.json
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app, scripted_responder
+
+STAGES = ["url_parse", "dockerfile_check", "agent_check", "generate_manifests", "get_deployment_requirements"]
+
+
+def conversation(gitlab_url: str, project_path: str) -> list:
+    """단계 순서대로 보낼 메시지"""
+    return [
+        f"{gitlab_url}/{project_path} 배포해줘",
+        "예",
+        "bench-agent",
+        "default",
+        "외부 노출 예, 내부 8080 외부 80, CPU 500m 메모리 512Mi, 영속성 아니오",
+    ]
+
+
+def percentile(values: list, q: float) -> float:
+    """nearest-rank 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def rss_mb() -> float:
+    """현재 RSS (Linux 는 /proc, 그 외는 최대 RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--conversations", type=int, default=3, help="사용자당 온보딩 대화 수")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--gitlab-latency", type=float, default=0.02)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--generation-cache", action="store_true", help="생성 캐시 사용 (기본: 끔)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="tracemalloc 으로 단계별 메모리 증가량 측정 (느려짐, fake GitLab 데이터 포함한 상한값)")
+    parser.add_argument("--output", help="JSON 결과 파일")
+    parser.add_argument("--compare", help="비교할 이전 JSON 결과 파일")
+    args = parser.parse_args()
+
+    fake = FakeGitLab(latency=args.gitlab_latency)
+    gitlab_url = serve_in_thread(fake.app)
+    fake.base_url = gitlab_url
+    fake.add_project("test1")
+    stub = create_app(latency=args.llm_latency, responder=scripted_responder(gitlab_url, agent_name="bench-agent"),
+                      token_delay=args.token_delay)
+    openai_url = serve_in_thread(stub)
+
+    os.environ["GITLAB_URL"] = gitlab_url
+    os.environ["OPENAI_BASE_URL"] = openai_url + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if not args.generation_cache:
+        os.environ["GENERATION_CACHE_ENABLED"] = "false"
+
+    # 환경변수 설정 이후에 import 해야 stub 서버를 사용함
+    from app.main import app, session_store
+
+    runs = itertools.count()
+
+    async def run_level(client: httpx.AsyncClient, users: int) -> dict:
+        run = next(runs)  # 워밍업 실행과 프로젝트 경로가 겹치면 이미 Dockerfile 이 있는 프로젝트로 대화가 어긋남
+        latencies = {stage: [] for stage in STAGES}
+        errors = 0
+        requests = 0
+
+        async def user_loop(u: int):
+            nonlocal errors, requests
+            for c in range(args.conversations):
+                path = f"bench/r{run}-u{users}-{u}-c{c}"
+                fake.add_project(path, files={"main.py": "print('hi')"})
+                uid = f"bench-{users}-{u}"
+                await session_store.delete(uid)
+                for stage, message in zip(STAGES, conversation(gitlab_url, path)):
+                    start = time.perf_counter()
+                    r = await client.post("/api/ci/chat", json={"user_id": uid, "message": message})
+                    latencies[stage].append(time.perf_counter() - start)
+                    requests += 1
+                    if r.status_code != 200:
+                        errors += 1
+                # 다음 대화를 위해 새 세션으로 시작 (완료된 세션은 저장소에 남겨 메모리 측정에 포함)
+                await session_store.save(f"{uid}-done-{c}", await session_store.get(uid) or {})
+
+        calls_before = stub.state.calls
+        start = time.perf_counter()
+        await asyncio.gather(*(user_loop(u) for u in range(users)))
+        wall = time.perf_counter() - start
+        completed = users * args.conversations
+        return {
+            "users": users,
+            "requests": requests,
+            "errors": errors,
+            "wall_s": round(wall, 3),
+            "rps": round(requests / wall, 2),
+            "conversations_per_s": round(completed / wall, 3),
+            "llm_calls": stub.state.calls - calls_before,
+            "stages": {stage: summarize(values) for stage, values in latencies.items()},
+        }
+
+    async def run_all():
+        results = []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app",
+                                     timeout=120) as client:
+            # 커넥션 풀/템플릿/지연 import 초기화가 첫 단계 결과에 섞이지 않도록 한 번 실행 후 버림
+            await run_level(client, 1)
+            if args.trace_memory:
+                tracemalloc.start()
+            for users in args.users:
+                gc.collect()
+                rss_before = rss_mb()
+                traced_before = tracemalloc.get_traced_memory()[0] if args.trace_memory else None
+                sessions_before = len(session_store) if hasattr(session_store, "__len__") else None
+
+                level = await run_level(client, users)
+
+                gc.collect()
+                sessions_after = len(session_store) if hasattr(session_store, "__len__") else None
+                memory = {"rss_mb": round(rss_mb(), 1), "rss_delta_mb": round(rss_mb() - rss_before, 2)}
+                if sessions_before is not None:
+                    memory["sessions"] = sessions_after
+                    memory["new_sessions"] = sessions_after - sessions_before
+                if traced_before is not None:
+                    traced_delta = tracemalloc.get_traced_memory()[0] - traced_before
+                    memory["traced_delta_kb"] = round(traced_delta / 1024, 1)
+                    if memory.get("new_sessions"):
+                        memory["bytes_per_session"] = round(traced_delta / memory["new_sessions"])
+                level["memory"] = memory
+                results.append(level)
+        return results
+
+    levels = asyncio.run(run_all())
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "levels": levels,
+    }
+
+    print_report(report)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(json.load(f), report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nresults written to {args.output}", file=sys.stderr)
+
+
+def print_report(report: dict):
+    params = report["params"]
+    print(f"commit={report['commit']}  llm={params['llm_latency']}s  gitlab={params['gitlab_latency']}s  "
+          f"conversations/user={params['conversations']}")
+    for level in report["levels"]:
+        memory = level["memory"]
+        print(f"\nusers={level['users']:3d}  rps={level['rps']:7.1f}  conv/s={level['conversations_per_s']:6.2f}  "
+              f"errors={level['errors']}  llm_calls={level['llm_calls']}  rss={memory['rss_mb']}MB "
+              f"(+{memory['rss_delta_mb']}MB)  sessions={memory.get('sessions')}"
+              + (f"  bytes/session={memory['bytes_per_session']}" if "bytes_per_session" in memory else ""))
+        print(f"  {'stage':28s} {'p50':>9s} {'p95':>9s} {'p99':>9s}")
+        for stage, s in level["stages"].items():
+            print(f"  {stage:28s} {s['p50_ms']:7.1f}ms {s['p95_ms']:7.1f}ms {s['p99_ms']:7.1f}ms")
+
+
+def print_comparison(before: dict, after: dict):
+    """같은 동시 사용자 수끼리 p50/p99 와 처리량 변화율 출력"""
+    print(f"\ncompare {before.get('commit')} -> {after.get('commit')}")
+    previous = {level["users"]: level for level in before["levels"]}
+    for level in after["levels"]:
+        old = previous.get(level["users"])
+        if old is None:
+            continue
+        print(f"users={level['users']:3d}  rps {old['rps']:7.1f} -> {level['rps']:7.1f} "
+              f"({_change(old['rps'], level['rps'])})")
+        for stage, s in level["stages"].items():
+            o = old["stages"].get(stage)
+            if o:
+                print(f"  {stage:28s} p50 {_change(o['p50_ms'], s['p50_ms']):>8s}  p99 {_change(o['p99_ms'], s['p99_ms']):>8s}")
+
+
+def _change(old: float, new: float) -> str:
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+
+if __name__ == "__main__":
+    main()
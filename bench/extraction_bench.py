@@ -0,0 +1,93 @@
+"""
+규칙 기반 fast-path 추출기의 지연 시간/LLM 호출 감소 효과 측정.
+
+bench/data/chat_messages.jsonl 의 기록된 메시지를 각 단계에 그대로 넣어
+fast-path 를 끈 경우(모든 추출을 GPT 로)와 켠 경우를 비교한다.
+
+    python -m bench.extraction_bench --llm-latency 0.8
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app, scripted_responder
+
+CORPUS = Path(__file__).parent / "data" / "chat_messages.jsonl"
+
+
+def seed_session(stage: str, project: dict) -> dict:
+    session = {
+        "stage": stage,
+        "project_id": project["id"],
+        "project_path_with_namespace": project["path_with_namespace"],
+        "web_url": project["web_url"],
+        "default_branch": "main",
+        "primary_lang": "Python",
+    }
+    return session
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    args = parser.parse_args()
+
+    fake = FakeGitLab()
+    gitlab_url = serve_in_thread(fake.app)
+    fake.base_url = gitlab_url
+    project = fake.add_project("group/app", files={"main.py": "print('hi')"})
+    fake.add_project("test1")
+
+    stub = create_app(latency=args.llm_latency, responder=scripted_responder(f"{gitlab_url}/group/app"))
+    openai_url = serve_in_thread(stub)
+    os.environ["GITLAB_URL"] = gitlab_url
+    os.environ["OPENAI_BASE_URL"] = openai_url + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    from app.main import app, session_store
+    from app.services import fast_extract
+
+    corpus = [json.loads(line) for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    for item in corpus:
+        item["message"] = item["message"].replace("{GITLAB_URL}", gitlab_url)
+
+    async def run(fast_path: bool) -> dict:
+        fast_extract.FAST_PATH_ENABLED = fast_path
+        latencies = {}
+        paths = Counter()
+        calls_before = stub.state.calls
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+            for i, item in enumerate(corpus):
+                uid = f"bench-{fast_path}-{i}"
+                await session_store.save(uid, seed_session(item["stage"], project))
+                start = time.perf_counter()
+                r = await client.post("/api/ci/chat", json={"user_id": uid, "message": item["message"]})
+                latencies.setdefault(item["stage"], []).append(time.perf_counter() - start)
+                paths[r.json().get("extraction", "none")] += 1
+        return {"latencies": latencies, "paths": paths, "llm_calls": stub.state.calls - calls_before}
+
+    async def run_all():
+        return await run(False), await run(True)
+
+    baseline, fast = asyncio.run(run_all())
+    print(f"corpus={len(corpus)} messages, llm latency={args.llm_latency}s")
+    print(f"{'stage':22s} {'llm-only mean':>14s} {'fast-path mean':>15s}")
+    for stage in baseline["latencies"]:
+        before = statistics.mean(baseline["latencies"][stage])
+        after = statistics.mean(fast["latencies"][stage])
+        print(f"{stage:22s} {before * 1000:12.0f}ms {after * 1000:13.0f}ms")
+    print(f"paths (fast-path run): {dict(fast['paths'])}")
+    print(f"LLM calls: {baseline['llm_calls']} -> {fast['llm_calls']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import asyncio
+import base64
+import hashlib
+import math
+import time
+from urllib.parse import unquote
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+
+def _blob_sha(content: str) -> str:
+    data = content.encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class FakeGitLab:
+    """
+    GitLab REST API(v4) 일부를 흉내내는 in-process 서버.
+    프로젝트/파일은 메모리에 보관하고, 모든 요청에 latency 초의 지연을 주입한다.
+    rpm 을 주면 분당 요청 한도를 넘는 /projects 요청에 GitLab 처럼 429 (Retry-After, RateLimit-* 헤더) 로 응답한다.
+    """
+
+    def __init__(self, latency: float = 0.0, base_url: str = "http://gitlab.local", rpm: float = None):
+        self.latency = latency
+        self.base_url = base_url
+        self.rpm = rpm
+        self.projects = {}
+        self.requests = 0
+        self.throttled = 0
+        self.reset_rate_limit()
+        self.commits = []
+        self.conflicts = 0
+        self._file_commits = {}  # (프로젝트 id, 파일 경로) -> 마지막 커밋 id
+        self.app = self._build_app()
+
+    # -------------------------------
+    # 테스트 데이터 구성
+    # -------------------------------
+    def add_project(self, path_with_namespace: str, files: dict = None, languages: dict = None,
+                    default_branch: str = "main") -> dict:
+        project_id = len(self.projects) + 1
+        project = {
+            "id": project_id,
+            "path": path_with_namespace.split("/")[-1],
+            "path_with_namespace": path_with_namespace,
+            "web_url": f"{self.base_url}/{path_with_namespace}",
+            "default_branch": default_branch,
+            "files": dict(files or {}),
+            "languages": languages or {"Python": 100.0},
+        }
+        self.projects[project_id] = project
+        return project
+
+    def find_project(self, id_or_path: str):
+        if id_or_path.isdigit():
+            return self.projects.get(int(id_or_path))
+        for project in self.projects.values():
+            if project["path_with_namespace"] == id_or_path:
+                return project
+        return None
+
+    # -------------------------------
+    # API
+    # -------------------------------
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/api/v4/version")
+        async def version():
+            return {"version": "17.0.0-fake", "revision": "fake"}
+
+        @app.middleware("http")
+        async def rate_limit(request: Request, call_next):
+            if not self.rpm or not request.url.path.startswith("/api/v4/projects/"):
+                return await call_next(request)
+            allowed, headers = self._charge()
+            if not allowed:
+                self.throttled += 1
+                return JSONResponse({"message": "Retry later"}, status_code=429, headers=headers)
+            response = await call_next(request)
+            response.headers.update(headers)
+            return response
+
+        @app.api_route("/api/v4/projects/{rest:path}", methods=["GET", "HEAD", "POST"])
+        async def projects_api(request: Request):
+            self.requests += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            # 경로 파라미터가 %2F 로 인코딩되어 오므로 raw_path 를 직접 분해
+            raw = request.scope["raw_path"].decode().split("?")[0]
+            parts = [unquote(p) for p in raw[len("/api/v4/projects/"):].split("/")]
+            project = self.find_project(parts[0])
+            if project is None:
+                return JSONResponse({"message": "404 Project Not Found"}, status_code=404)
+            body = await request.json() if request.method == "POST" else {}
+            return self._dispatch(request, project, parts[1:], body)
+
+        return app
+
+    def reset_rate_limit(self):
+        self._allowance = [self.rpm, time.monotonic()]  # [남은 요청 수, 갱신 시각]
+
+    def _charge(self):
+        """분당 rpm 만큼 연속으로 채워지는 한도에서 요청 1개 차감 -> (허용 여부, RateLimit-* 헤더)"""
+        now = time.monotonic()
+        remaining = min(self.rpm, self._allowance[0] + (now - self._allowance[1]) * self.rpm / 60)
+        allowed = remaining >= 1
+        self._allowance = [remaining - 1 if allowed else remaining, now]
+        headers = {
+            "RateLimit-Limit": str(int(self.rpm)),
+            "RateLimit-Remaining": str(max(0, int(self._allowance[0]))),
+            "RateLimit-Reset": str(int(time.time() + (self.rpm - self._allowance[0]) * 60 / self.rpm)),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(math.ceil((1 - remaining) * 60 / self.rpm))
+        return allowed, headers
+
+    def _dispatch(self, request: Request, project: dict, parts: list, body: dict):
+        method = request.method
+        if not parts:
+            return JSONResponse({k: v for k, v in project.items() if k not in ("files", "languages")})
+        if parts == ["languages"]:
+            return JSONResponse(project["languages"])
+        if parts[:2] == ["repository", "files"] and len(parts) == 3:
+            return self._files(method, project, parts[2], body)
+        if parts[:2] == ["repository", "branches"] and len(parts) == 3:
+            return JSONResponse({"name": parts[2], "commit": {"id": self._head(project)}})
+        if parts[:2] == ["repository", "blobs"] and parts[3:] == ["raw"]:
+            for content in project["files"].values():
+                if _blob_sha(content) == parts[2]:
+                    return Response(content.encode(), media_type="text/plain")
+            return JSONResponse({"message": "404 Blob Not Found"}, status_code=404)
+        if parts == ["repository", "tree"]:
+            return self._tree(project, request.query_params.get("path", ""))
+        if parts == ["repository", "commits"] and method == "POST":
+            return self._commit(project, body)
+        return JSONResponse({"message": "404 Not Found"}, status_code=404)
+
+    def _tree(self, project: dict, path: str):
+        prefix = f"{path.strip('/')}/" if path.strip("/") else ""
+        entries = {}
+        for file_path in project["files"]:
+            if not file_path.startswith(prefix):
+                continue
+            name, _, rest = file_path[len(prefix):].partition("/")
+            entry = {"name": name, "path": prefix + name, "type": "tree" if rest else "blob"}
+            if not rest:
+                entry["id"] = _blob_sha(project["files"][file_path])
+            entries[name] = entry
+        if prefix and not entries:
+            return JSONResponse({"message": "404 Tree Not Found"}, status_code=404)
+        return JSONResponse(sorted(entries.values(), key=lambda e: e["path"]))
+
+    def _commit(self, project: dict, body: dict):
+        files = project["files"]
+        for action in body["actions"]:
+            exists = action["file_path"] in files
+            if action["action"] == "create" and exists:
+                self.conflicts += 1
+                return JSONResponse({"message": "A file with this name already exists"}, status_code=400)
+            if action["action"] in ("update", "delete") and not exists:
+                return JSONResponse({"message": "A file with this name doesn't exist"}, status_code=400)
+            last_commit_id = action.get("last_commit_id")
+            if last_commit_id and last_commit_id != self._last_commit(project, action["file_path"]):
+                self.conflicts += 1
+                return JSONResponse({"message": "You are attempting to update a file that has changed "
+                                                "since you started editing it."}, status_code=400)
+        commit_id = f"{len(self.commits) + 1:040x}"
+        self.commits.append({"id": commit_id, "project_id": project["id"], "message": body.get("commit_message"),
+                             "paths": [a["file_path"] for a in body["actions"]]})
+        for action in body["actions"]:
+            if action["action"] == "delete":
+                del files[action["file_path"]]
+                self._file_commits.pop((project["id"], action["file_path"]), None)
+                continue
+            files[action["file_path"]] = action["content"]
+            self._file_commits[(project["id"], action["file_path"])] = commit_id
+        return JSONResponse({"id": commit_id}, status_code=201)
+
+    def _head(self, project: dict) -> str:
+        """프로젝트의 마지막 커밋 id (커밋이 없으면 0번 커밋)"""
+        for commit in reversed(self.commits):
+            if commit["project_id"] == project["id"]:
+                return commit["id"]
+        return "0" * 40
+
+    def _last_commit(self, project: dict, file_path: str) -> str:
+        # add_project 로 넣은 초기 파일은 0번 커밋으로 취급
+        return self._file_commits.get((project["id"], file_path), "0" * 40)
+
+    def _files(self, method: str, project: dict, file_path: str, body: dict):
+        files = project["files"]
+        if method in ("GET", "HEAD"):
+            if file_path not in files:
+                return JSONResponse({"message": "404 File Not Found"}, status_code=404)
+            content = files[file_path]
+            if method == "HEAD":
+                return Response(status_code=200, headers={"X-Gitlab-Blob-Id": _blob_sha(content),
+                                                          "X-Gitlab-Last-Commit-Id": self._last_commit(project, file_path)})
+            return JSONResponse({
+                "file_path": file_path,
+                "content": base64.b64encode(content.encode()).decode(),
+                "encoding": "base64",
+                "last_commit_id": self._last_commit(project, file_path),
+                "blob_id": _blob_sha(content),
+            })
+        return JSONResponse({"message": "405 Method Not Allowed"}, status_code=405)
@@ -0,0 +1,131 @@
+"""
+레포지토리 fingerprint 벤치마크.
+
+여러 스택의 샘플 레포를 fake GitLab 에 올리고
+- 판별 결과(런타임/프레임워크/진입점/포트/템플릿)
+- 최초 분석(cold)과 같은 커밋 재분석(cached)의 지연 시간, GitLab 요청 수
+- GPT 로 Dockerfile 을 생성할 때(--llm-latency 초 stub)와 템플릿 렌더링 시간
+을 출력한다.
+
+    python -m bench.fingerprint_bench --gitlab-latency 0.02 --llm-latency 2
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app
+
+SAMPLES = {
+    "py-fastapi": {
+        "requirements.txt": "fastapi==0.110.0\nuvicorn[standard]\npydantic\n",
+        "main.py": "from fastapi import FastAPI\napp = FastAPI()\n",
+    },
+    "py-django": {
+        "requirements.txt": "Django>=4.2\npsycopg[binary]\n",
+        "manage.py": "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop.settings')\n",
+        "shop/settings.py": "",
+        "shop/wsgi.py": "",
+    },
+    "py-poetry-flask": {
+        "pyproject.toml": '[tool.poetry]\nname = "svc"\n\n[tool.poetry.dependencies]\npython = "^3.10"\nflask = "^3"\n',
+        "poetry.lock": "",
+        "app/main.py": "",
+        "app/__init__.py": "",
+    },
+    "node-next": {
+        "package.json": '{"scripts": {"build": "next build", "start": "next start"}, '
+                        '"dependencies": {"next": "14.1.0", "react": "18"}, "engines": {"node": ">=18"}}',
+        "package-lock.json": "{}",
+        "tsconfig.json": "{}",
+        "pages/index.tsx": "",
+    },
+    "node-express": {
+        "package.json": '{"main": "server.js", "dependencies": {"express": "^4.18.0"}}',
+        "yarn.lock": "",
+        "server.js": "",
+    },
+    "go-gin": {
+        "go.mod": "module github.com/acme/orders\n\ngo 1.21\n\nrequire github.com/gin-gonic/gin v1.9.1\n",
+        "go.sum": "",
+        "cmd/orders/main.go": "",
+        "internal/handler.go": "",
+    },
+    "java-maven": {
+        "pom.xml": '<project xmlns="http://maven.apache.org/POM/4.0.0"><parent>'
+                   '<artifactId>spring-boot-starter-parent</artifactId></parent>'
+                   '<properties><java.version>21</java.version></properties></project>',
+        "src/main/java/App.java": "",
+    },
+    "kotlin-gradle": {
+        "build.gradle.kts": 'plugins { id("org.springframework.boot") version "3.2.0"; kotlin("jvm") }\n'
+                            'java { toolchain { languageVersion.set(JavaLanguageVersion.of(17)) } }\n',
+        "settings.gradle.kts": "",
+        "src/main/kotlin/App.kt": "",
+    },
+    "monorepo-backend": {
+        "README.md": "",
+        "backend/requirements.txt": "flask\ngunicorn\n",
+        "backend/app.py": "",
+        "frontend/index.html": "",
+    },
+    "ruby-rails": {
+        "Gemfile": "gem 'rails'\n",
+        "config.ru": "",
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gitlab-latency", type=float, default=0.02)
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="GPT Dockerfile 생성 비교용 stub 지연")
+    args = parser.parse_args()
+
+    fake = FakeGitLab(latency=args.gitlab_latency)
+    gitlab_url = serve_in_thread(fake.app)
+    fake.base_url = gitlab_url
+    projects = {name: fake.add_project(f"samples/{name}", files=files) for name, files in SAMPLES.items()}
+    stub = create_app(latency=args.llm_latency, responder=lambda body: "FROM scratch\n")
+    openai_url = serve_in_thread(stub)
+
+    os.environ["GITLAB_URL"] = gitlab_url
+    os.environ["OPENAI_BASE_URL"] = openai_url + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from app.services import onboarding
+    from app.services.llm_client import chat_completion
+
+    async def run():
+        print(f"{'sample':18s} {'template':8s} {'cold':>8s} {'cached':>8s} {'req':>4s}  stack")
+        for name, project in projects.items():
+            requests_before = fake.requests
+            start = time.perf_counter()
+            fp = await onboarding.detect_stack(project["id"], "main")
+            cold = time.perf_counter() - start
+            requests = fake.requests - requests_before
+
+            start = time.perf_counter()
+            await onboarding.detect_stack(project["id"], "main")
+            cached = time.perf_counter() - start
+            print(f"{name:18s} {fp.template or '-':8s} {cold * 1000:6.1f}ms {cached * 1000:6.1f}ms {requests:4d}  "
+                  f"{fp.describe() if fp.runtime else fp.language}")
+
+        fp = await onboarding.detect_stack(projects["py-fastapi"]["id"], "main")
+        start = time.perf_counter()
+        for _ in range(100):
+            onboarding.template_dockerfile(fp)
+        template = (time.perf_counter() - start) / 100
+        start = time.perf_counter()
+        await chat_completion(model="gpt-4o", messages=[{"role": "user", "content": onboarding.dockerfile_prompt("Python")}])
+        gpt = time.perf_counter() - start
+        print(f"\nDockerfile: template {template * 1000:.2f}ms vs GPT {gpt * 1000:.0f}ms (stub latency {args.llm_latency}s)")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+느린 GitLab 인스턴스가 채팅 세션들을 직렬화하지 않는지 확인하는 부하 테스트.
+
+fake GitLab(지연 주입)과 OpenAI stub 을 띄우고, N명의 사용자가 동시에
+url_parse 단계(프로젝트 조회 + Dockerfile 확인 + 언어 조회)를 실행한다.
+
+    python -m bench.gitlab_load --gitlab-latency 0.2 --users 1 8 32
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gitlab-latency", type=float, default=0.2)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    fake = FakeGitLab(latency=args.gitlab_latency)
+    gitlab_url = serve_in_thread(fake.app)
+    fake.base_url = gitlab_url
+    fake.add_project("group/app", files={"main.py": "print('hi')"})
+
+    openai_url = serve_in_thread(create_app(latency=args.llm_latency,
+                                            responder=lambda body: f"{gitlab_url}/group/app"))
+    os.environ["GITLAB_URL"] = gitlab_url
+    os.environ["OPENAI_BASE_URL"] = openai_url + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    from app.main import app, session_store
+
+    async def run_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            for users in args.users:
+                async def one(uid):
+                    await session_store.delete(uid)
+                    r = await client.post("/api/ci/chat", json={"user_id": uid, "message": "이 레포 배포해줘"})
+                    r.raise_for_status()
+                    assert (await session_store.get(uid))["stage"] == "dockerfile_check", r.text
+
+                start = time.perf_counter()
+                await asyncio.gather(*(one(f"gl-{users}-{i}") for i in range(users)))
+                elapsed = time.perf_counter() - start
+                print(f"users={users:4d}  wall={elapsed:6.2f}s  (serialized would be >= "
+                      f"{users * 3 * args.gitlab_latency:6.2f}s)")
+
+    asyncio.run(run_all())
+    print(f"fake GitLab requests: {fake.requests}")
+
+
+if __name__ == "__main__":
+    main()
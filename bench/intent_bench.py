@@ -0,0 +1,58 @@
+"""
+의도 분류 엔진의 캐시 효과 측정.
+
+bench/data/intent_requests.txt 의 요청(레포 주소만 다르거나 조사/문장부호만 다른 문장 포함)을
+--rounds 번 반복해 분류하고 출처(cache/llm)별 지연 시간과 모델 호출 수를 출력한다.
+
+    python -m bench.intent_bench --llm-latency 0.5 --rounds 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from pathlib import Path
+
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app, scripted_responder
+
+CORPUS = Path(__file__).parent / "data" / "intent_requests.txt"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    stub = create_app(latency=args.llm_latency, responder=scripted_responder(""))
+    os.environ["OPENAI_BASE_URL"] = serve_in_thread(stub) + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    from app.services.intent_engine import get_intent_engine
+
+    texts = [line.strip() for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    engine = get_intent_engine()
+
+    async def run():
+        timings = {"llm": [], "cache": []}
+        for round_no in range(args.rounds):
+            for text in texts:
+                start = time.perf_counter()
+                result = await engine.classify(text)
+                timings[result["source"]].append(time.perf_counter() - start)
+                if round_no == 0:
+                    print(f"{result['source']:5s} sim={result['similarity']:.2f} {result['action_type']:8s} {text}")
+        return timings
+
+    timings = asyncio.run(run())
+    print()
+    for source, values in timings.items():
+        if values:
+            print(f"{source:5s} n={len(values):3d}  median={statistics.median(values) * 1e6:10.1f}us  "
+                  f"max={max(values) * 1e6:10.1f}us")
+    print(f"model calls: {stub.state.calls}  stats: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    main()
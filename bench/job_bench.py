@@ -0,0 +1,94 @@
+"""
+백그라운드 작업 큐 벤치마크.
+
+동시 사용자 --users 명이 온보딩 대화 전체를 background=true 로 보내고 (각 메시지는 이전 작업이 끝나면 전송),
+워커 수(--workers)별로
+- enqueue  : POST /api/ci/chat 응답 시간 (작업 등록만 하므로 단계 처리 시간과 무관해야 함)
+- complete : 작업 등록부터 done 까지의 시간 (대기 + 실행)
+- 처리량   : 초당 완료된 작업 수
+를 출력한다. fake GitLab 과 OpenAI stub 을 사용한다.
+
+    python -m bench.job_bench --users 32 --workers 1 4 16 --llm-latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+import httpx
+
+from bench.chat_bench import STAGES, conversation, percentile
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app, scripted_responder
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--gitlab-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    fake = FakeGitLab(latency=args.gitlab_latency)
+    gitlab_url = serve_in_thread(fake.app)
+    fake.base_url = gitlab_url
+    fake.add_project("test1")
+    openai_url = serve_in_thread(create_app(
+        latency=args.llm_latency, responder=scripted_responder(gitlab_url, agent_name="bench-agent")
+    ))
+    workdir = tempfile.mkdtemp(prefix="job-bench-")
+    os.environ["GITLAB_URL"] = gitlab_url
+    os.environ["OPENAI_BASE_URL"] = openai_url + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["GENERATION_CACHE_ENABLED"] = "false"
+    os.environ["JOB_DB_PATH"] = os.path.join(workdir, "jobs.db")
+    os.environ["SESSION_BACKEND"] = "sqlite"  # background 실행은 공유 세션 저장소가 필요
+    os.environ["SESSION_DB_PATH"] = os.path.join(workdir, "sessions.db")
+
+    from app.main import app, job_workers
+
+    async def run(client: httpx.AsyncClient, workers: int):
+        job_workers.size = workers
+        job_workers.start()
+        enqueue, complete = [], []
+
+        async def user(u: int):
+            path = f"bench/w{workers}-u{u}"
+            fake.add_project(path, files={"main.py": "print('hi')"})
+            for message in conversation(gitlab_url, path):
+                start = time.perf_counter()
+                r = await client.post("/api/ci/chat", json={"user_id": path, "message": message, "background": True})
+                enqueue.append(time.perf_counter() - start)
+                job_id = r.json()["job_id"]
+                while (await client.get(f"/api/ci/jobs/{job_id}")).json()["status"] not in ("done", "failed"):
+                    await asyncio.sleep(0.02)
+                complete.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(u) for u in range(args.users)))
+        wall = time.perf_counter() - start
+        await job_workers.aclose()
+        print(f"workers={workers:3d}  jobs={len(complete)}  jobs/s={len(complete) / wall:6.1f}  "
+              f"enqueue p50={percentile(enqueue, 50) * 1000:6.1f}ms p99={percentile(enqueue, 99) * 1000:6.1f}ms  "
+              f"complete p50={percentile(complete, 50) * 1000:7.1f}ms p99={percentile(complete, 99) * 1000:7.1f}ms")
+
+    async def run_all():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app",
+                                     timeout=300) as client:
+            print(f"users={args.users}  stages/user={len(STAGES)}  llm={args.llm_latency}s  gitlab={args.gitlab_latency}s")
+            for workers in args.workers:
+                await run(client, workers)
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
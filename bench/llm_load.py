@@ -0,0 +1,61 @@
+"""
+/api/ci/chat 처리량이 동시 사용자 수에 비례해 늘어나는지 확인하는 부하 테스트.
+
+로컬 OpenAI stub 서버(지연 시간 주입)를 띄우고, LLM 호출만 하는
+generate_manifests 단계를 N명의 사용자가 동시에 반복 호출한다.
+
+    python -m bench.llm_load --latency 0.2 --turns 5 --users 1 4 16 64
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app
+
+
+async def run_level(app, session_store, users: int, turns: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+
+        async def user_loop(uid: str):
+            for _ in range(turns):
+                await session_store.save(uid, {"stage": "generate_manifests"})
+                r = await client.post("/api/ci/chat", json={"user_id": uid, "message": "namespace는 default"})
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user_loop(f"load-{users}-{i}") for i in range(users)))
+        elapsed = time.perf_counter() - start
+    return users * turns / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    base_url = serve_in_thread(create_app(latency=args.latency))
+    os.environ["OPENAI_BASE_URL"] = base_url + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    # 환경변수 설정 이후에 import 해야 stub 서버를 사용함
+    from app.main import app, session_store
+
+    async def run_all():
+        # 공유 클라이언트가 이벤트 루프에 묶이므로 모든 단계를 하나의 루프에서 실행
+        for users in args.users:
+            rps = await run_level(app, session_store, users, args.turns)
+            print(f"users={users:4d}  throughput={rps:8.1f} req/s")
+
+    print(f"stub latency={args.latency}s, turns/user={args.turns}")
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
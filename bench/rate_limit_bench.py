@@ -0,0 +1,119 @@
+"""
+호출 한도(rate limit) 스케줄러 벤치마크.
+
+OpenAI stub 에 모델별 분당 요청/토큰 한도(--rpm/--tpm)를, fake GitLab 에 분당 요청 한도(--gitlab-rpm)를 걸고
+동시 사용자 --users 명이 --duration 초 동안 온보딩 대화를 반복한다 (실패한 대화는 버리고 새 대화 시작).
+스케줄러를 끈 경우(RATE_LIMIT_ENABLED=false: 429 를 몇 번 재시도한 뒤 실패)와 켠 경우를
+같은 한도(매 실행 전 초기화)에서 차례로 실행해
+- goodput  : 시간 안에 끝까지 성공한 대화 수 / 초
+- failed   : 오류(HTTP 500) 또는 "요청이 많아" 응답으로 중단된 대화 수
+- wasted   : 중단된 대화가 이미 써 버린 LLM 호출 수
+- 429      : stub/fake GitLab 이 돌려준 429 수
+- 단계별 p50/p99 (get_deployment_requirements 는 interactive 레인, dockerfile_check 는 generation 레인)
+를 출력한다. 클라이언트의 기본 한도(OPENAI_RPM 등)는 stub 보다 크게 두어 응답 헤더로 한도를 맞추는지도 함께 본다.
+
+    python -m bench.rate_limit_bench --users 4 16 64 --duration 30 --rpm 60
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from bench.chat_bench import STAGES, conversation, percentile
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app, scripted_responder
+
+RATE_LIMITED_MESSAGE = "요청이 많아"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--duration", type=float, default=30, help="실행당 측정 시간(초)")
+    parser.add_argument("--rpm", type=float, default=60, help="stub 의 모델별 분당 요청 한도")
+    parser.add_argument("--tpm", type=float, default=40000, help="stub 의 모델별 분당 토큰 한도")
+    parser.add_argument("--gitlab-rpm", type=float, default=3000, help="fake GitLab 의 분당 요청 한도")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--gitlab-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    fake = FakeGitLab(latency=args.gitlab_latency, rpm=args.gitlab_rpm)
+    gitlab_url = serve_in_thread(fake.app)
+    fake.base_url = gitlab_url
+    fake.add_project("test1")
+    stub = create_app(latency=args.llm_latency, responder=scripted_responder(gitlab_url, agent_name="bench-agent"),
+                      rpm=args.rpm, tpm=args.tpm)
+    openai_url = serve_in_thread(stub)
+    os.environ["GITLAB_URL"] = gitlab_url
+    os.environ["OPENAI_BASE_URL"] = openai_url + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ["GENERATION_CACHE_ENABLED"] = "false"
+
+    from app.main import app
+    from app.services import rate_limit
+
+    async def run(client: httpx.AsyncClient, users: int, enabled: bool):
+        # 스케줄러 on/off 전환, limiter 와 stub/fake GitLab 한도 초기화
+        rate_limit.RATE_LIMIT_ENABLED = enabled
+        rate_limit._limiters.clear()
+        stub.state.quota.buckets.clear()
+        fake.reset_rate_limit()
+        stub.state.throttled = fake.throttled = 0
+        calls_before = stub.state.calls
+        latencies = {stage: [] for stage in STAGES}
+        counts = {"completed": 0, "failed": 0, "wasted": 0}
+        conversations = iter(range(10 ** 9))
+
+        async def chat(user: str, message: str, stage: str) -> bool:
+            start = time.perf_counter()
+            r = await client.post("/api/ci/chat", json={"user_id": user, "message": message})
+            latencies[stage].append(time.perf_counter() - start)
+            return r.status_code == 200 and RATE_LIMITED_MESSAGE not in r.json().get("message", "")
+
+        async def user(u: int):
+            while True:
+                path = f"bench/{'on' if enabled else 'off'}-u{users}-{u}-c{next(conversations)}"
+                fake.add_project(path, files={"main.py": "print('hi')"})
+                for i, (stage, message) in enumerate(zip(STAGES, conversation(gitlab_url, path))):
+                    if not await chat(path, message, stage):
+                        counts["failed"] += 1
+                        # dockerfile_check(GPT) 이후 단계에서 실패하면 이미 쓴 Dockerfile 생성 호출이 낭비된다
+                        counts["wasted"] += i > STAGES.index("dockerfile_check")
+                        break
+                else:
+                    counts["completed"] += 1
+
+        tasks = [asyncio.create_task(user(u)) for u in range(users)]
+        await asyncio.sleep(args.duration)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        print(f"scheduler={'on ' if enabled else 'off'}  users={users:3d}  "
+              f"goodput={counts['completed'] / args.duration:5.2f} conv/s  completed={counts['completed']:4d}  "
+              f"failed={counts['failed']:4d}  wasted={counts['wasted']:4d}  "
+              f"llm_calls={stub.state.calls - calls_before:4d}  429: openai={stub.state.throttled} gitlab={fake.throttled}")
+        for stage in ("dockerfile_check", "get_deployment_requirements"):
+            values = latencies[stage]
+            if values:
+                print(f"    {stage:<28} p50={percentile(values, 50) * 1000:7.1f}ms  "
+                      f"p99={percentile(values, 99) * 1000:7.1f}ms  n={len(values)}")
+
+    async def run_all():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+                                     base_url="http://app", timeout=600) as client:
+            print(f"stub rpm={args.rpm:g} tpm={args.tpm:g}  gitlab rpm={args.gitlab_rpm:g}  "
+                  f"llm={args.llm_latency}s  duration={args.duration:g}s  "
+                  f"(최대 {args.rpm * args.duration / 60 / 2 + args.rpm / 2:.0f} 대화: 대화당 GPT 2회)")
+            for users in args.users:
+                for enabled in (False, True):
+                    await run(client, users, enabled)
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+재배포 벤치마크.
+
+사용자 --users 명이 온보딩을 마친 뒤 배포 요구사항 단계에서 아래 메시지를 차례로 보내고,
+경우별로 응답 시간 p50/p99, GitLab 커밋 수, 바뀐 파일 수, LLM 호출 수를 출력한다.
+- regenerate : 같은 요구사항을 regenerate=true 로 다시 보냄 (GPT 로 처음부터 다시 추출)
+- same       : 같은 요구사항을 다시 보냄 (내용이 같으므로 커밋 없음)
+- replicas   : "레플리카 3개로 바꿔줘" (GPT 없이 deployment.yaml 만 커밋)
+- memory     : "메모리 1Gi로" (GPT 없이 deployment.yaml 만 커밋)
+fake GitLab 과 OpenAI stub 을 사용한다.
+
+    python -m bench.redeploy_bench --users 16 --llm-latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from bench.chat_bench import conversation, percentile
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app, scripted_responder
+
+CASES = [
+    ("regenerate", None, True),
+    ("same", None, False),
+    ("replicas", "레플리카 3개로 바꿔줘", False),
+    ("memory", "메모리 1Gi로", False),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--gitlab-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    fake = FakeGitLab(latency=args.gitlab_latency)
+    gitlab_url = serve_in_thread(fake.app)
+    fake.base_url = gitlab_url
+    fake.add_project("test1")
+    stub = create_app(latency=args.llm_latency, responder=scripted_responder(gitlab_url, agent_name="bench-agent"))
+    openai_url = serve_in_thread(stub)
+    os.environ["GITLAB_URL"] = gitlab_url
+    os.environ["OPENAI_BASE_URL"] = openai_url + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["GENERATION_CACHE_ENABLED"] = "false"
+
+    from app.main import app
+
+    async def chat(client: httpx.AsyncClient, user: str, message: str, regenerate: bool = False) -> dict:
+        r = await client.post("/api/ci/chat", json={"user_id": user, "message": message, "regenerate": regenerate})
+        r.raise_for_status()
+        return r.json()
+
+    async def run_all():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app",
+                                     timeout=300) as client:
+            users = [f"bench/redeploy-{u}" for u in range(args.users)]
+
+            async def onboard(path: str):
+                fake.add_project(path, files={"main.py": "print('hi')"})
+                for message in conversation(gitlab_url, path):
+                    await chat(client, path, message)
+
+            await asyncio.gather(*(onboard(path) for path in users))
+            requirements = conversation(gitlab_url, users[0])[-1]
+
+            print(f"users={args.users}  llm={args.llm_latency}s  gitlab={args.gitlab_latency}s")
+            for case, message, regenerate in CASES:
+                latencies, changed = [], 0
+                commits_before, calls_before = len(fake.commits), stub.state.calls
+
+                async def redeploy(path: str):
+                    nonlocal changed
+                    start = time.perf_counter()
+                    reply = await chat(client, path, message or requirements, regenerate)
+                    latencies.append(time.perf_counter() - start)
+                    changed += reply["message"].count(": updated") + reply["message"].count(": created")
+
+                await asyncio.gather(*(redeploy(path) for path in users))
+                print(f"{case:<11} p50={percentile(latencies, 50) * 1000:7.1f}ms  "
+                      f"p99={percentile(latencies, 99) * 1000:7.1f}ms  "
+                      f"commits={len(fake.commits) - commits_before:3d}  files_changed={changed:3d}  "
+                      f"llm_calls={stub.state.calls - calls_before}")
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import socket
+import threading
+import time
+
+import uvicorn
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(asgi_app, port: int = None) -> str:
+    """ASGI 앱을 백그라운드 스레드에서 실행하고 base URL 반환"""
+    port = port or _free_port()
+    config = uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
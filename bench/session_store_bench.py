@@ -0,0 +1,63 @@
+"""
+세션 수가 늘어나도 메모리 사용량과 조회 지연이 일정한지 확인하는 벤치마크.
+
+    python -m bench.session_store_bench --backend memory --sizes 1000 10000 100000
+    python -m bench.session_store_bench --backend sqlite --db /tmp/sessions.db
+"""
+import argparse
+import asyncio
+import random
+import resource
+import time
+
+from app.services.session_store import MemorySessionStore, SQLiteSessionStore
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def fill(store, start: int, end: int):
+    for i in range(start, end):
+        await store.save(f"user-{i}", {
+            "stage": "dockerfile_check",
+            "project_id": i,
+            "project_path_with_namespace": f"group/app-{i}",
+            "default_branch": "main",
+        })
+
+
+async def measure(store, size: int, samples: int = 2000) -> float:
+    keys = [f"user-{random.randrange(size)}" for _ in range(samples)]
+    start = time.perf_counter()
+    for key in keys:
+        async with store.lock(key):
+            session = await store.get(key)
+            await store.save(key, session)
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+async def run(args):
+    if args.backend == "sqlite":
+        store = SQLiteSessionStore(args.db)
+    else:
+        store = MemorySessionStore(maxsize=max(args.sizes))
+    filled = 0
+    for size in args.sizes:
+        await fill(store, filled, size)
+        filled = size
+        latency = await measure(store, size)
+        print(f"{args.backend:6s} sessions={size:7d}  lock+get+save={latency:8.1f}us  maxrss={rss_mb():7.1f}MB")
+    await store.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--db", default="/tmp/sessions-bench.db")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+콜드 스타트 측정 (레플리카 0 -> 1 스케일 시 첫 응답까지의 시간과 상주 메모리).
+
+- import  : 새 인터프리터에서 `import app.main` 에 걸린 시간과 그 직후 최대 RSS
+- serve   : uvicorn 프로세스 시작부터 첫 HTTP 응답까지의 시간과 그 시점의 RSS
+- ready   : /health/ready 가 200 을 돌려줄 때까지의 시간 (Service 에 트래픽이 붙는 시점, 엔드포인트가 없으면 serve 와 같음)
+- first   : ready 직후 첫 /api/natural/analyze 요청 (백그라운드 warm_up 이 덜 끝났으면 남은 초기화 시간 포함) 의 응답 시간
+
+fake GitLab 과 OpenAI stub 을 띄워서 사용하므로 네트워크 없이 실행된다. 각 항목은 --runs 번 반복한 중앙값.
+
+    python -m bench.startup_bench --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.fake_gitlab import FakeGitLab
+from bench.server import serve_in_thread
+from bench.stub_openai import create_app, intent_responder
+
+IMPORT_SNIPPET = (
+    "import resource, time\n"
+    "start = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)\n"
+)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure_import(env: dict) -> tuple:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True,
+                         check=True).stdout.split()
+    return float(out[0]), float(out[1])
+
+
+def measure_serve(env: dict) -> tuple:
+    """(첫 응답까지 시간, 그 시점 RSS, ready 까지 시간, 첫 analyze 요청 시간, 그 이후 RSS)"""
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while True:
+                try:
+                    client.get("/__startup_probe")  # 어떤 응답이든 오면 요청을 받을 수 있는 상태
+                    break
+                except httpx.TransportError:
+                    if proc.poll() is not None:
+                        raise RuntimeError("uvicorn 프로세스가 종료되었습니다.")
+                    time.sleep(0.005)
+            serving = time.perf_counter() - start
+            serving_rss = rss_mb(proc.pid)
+
+            while client.get("/health/ready").status_code == 503:
+                time.sleep(0.005)
+            ready = time.perf_counter() - start
+
+            first_start = time.perf_counter()
+            r = client.post("/api/natural/analyze", json={"text": "https://gitlab.example.com/a/b 배포해줘"})
+            r.raise_for_status()
+            first = time.perf_counter() - first_start
+            return serving, serving_rss, ready, first, rss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    fake = FakeGitLab()
+    gitlab_url = serve_in_thread(fake.app)
+    openai_url = serve_in_thread(create_app(
+        latency=0.0, responder=lambda body: intent_responder(body["messages"][-1]["content"])
+    ))
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub"),
+        "OPENAI_BASE_URL": openai_url + "/v1",
+        "GITLAB_URL": gitlab_url,
+        "GITLAB_TOKEN": os.environ.get("GITLAB_TOKEN", "stub"),
+        "LOG_LEVEL": "WARNING",
+        "GENERATION_CACHE_PATH": "/tmp/gpt-manager-startup-bench/generation_cache.db",
+    }
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    serves = [measure_serve(env) for _ in range(args.runs)]
+
+    def median(values, i):
+        return statistics.median(v[i] for v in values)
+
+    print(f"import app.main     {median(imports, 0) * 1000:8.1f}ms   max_rss={median(imports, 1):6.1f}MB")
+    print(f"uvicorn first resp  {median(serves, 0) * 1000:8.1f}ms   rss={median(serves, 1):6.1f}MB")
+    print(f"/health/ready 200   {median(serves, 2) * 1000:8.1f}ms")
+    print(f"first analyze req   {median(serves, 3) * 1000:8.1f}ms   rss={median(serves, 4):6.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
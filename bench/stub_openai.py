@@ -0,0 +1,188 @@
+import asyncio
+import json
+import math
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def default_responder(body: dict) -> str:
+    return "default"
+
+
+REQUIREMENTS = {
+    "expose": True, "service_type": "LoadBalancer", "container_port": 8080, "service_port": 80,
+    "cpu": "500m", "memory": "512Mi", "persistence": False, "storage_size": None, "mount_path": None,
+    "replicas": None,
+}
+
+
+def intent_responder(text: str) -> str:
+    """의도 분류 요청에 키워드로 응답"""
+    lowered = text.lower()
+    if "테스트 서버" in text or "test server" in lowered:
+        result = {"action_type": "k8s_api", "command": "setup_test_server"}
+    elif any(word in lowered for word in ("배포", "deploy", "ci", "파이프라인", "pipeline")):
+        result = {"action_type": "cicd", "command": "deploy_repo"}
+    elif any(word in lowered for word in ("pod", "파드", "node", "노드", "namespace", "네임스페이스")):
+        result = {"action_type": "k8s_api", "command": "unknown"}
+    else:
+        result = {"action_type": "unknown", "command": "unknown"}
+    return json.dumps({**result, "summary": text[:40], "confidence": 0.9 if result["action_type"] != "unknown" else 0.3})
+
+
+def scripted_responder(project_url: str, agent_name: str = "my-agent", namespace: str = "default"):
+    """ci_chat 각 단계의 프롬프트를 구분해 GPT 처럼 응답하는 responder 생성"""
+
+    def responder(body: dict) -> str:
+        prompt = body["messages"][-1]["content"]
+        if body.get("response_format", {}).get("json_schema", {}).get("name") == "intent":
+            return intent_responder(prompt)
+        if "URL을 추출" in prompt:
+            return project_url
+        if "Dockerfile 생성 여부" in prompt:
+            return json.dumps({"status": "AGREE"})
+        if "최적의 Dockerfile" in prompt:
+            return "FROM python:3.11-slim\nWORKDIR /app\nCOPY . .\nCMD [\"python\", \"main.py\"]\n"
+        if "Agent의 이름" in prompt:
+            return agent_name
+        if "네임스페이스의 이름" in prompt:
+            return namespace
+        if "Kubernetes 배포 설정" in prompt or "배포 설정 JSON" in prompt:
+            return json.dumps(REQUIREMENTS)
+        return "unknown"
+
+    return responder
+
+
+def _usage(body: dict, content: str) -> dict:
+    """글자 수 / 4 로 어림한 토큰 사용량"""
+    prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(content) // 4,
+        "total_tokens": prompt_tokens + len(content) // 4,
+    }
+
+
+class Quota:
+    """
+    모델별 분당 요청/토큰 한도 흉내 (한도만큼 연속으로 채워지는 버킷).
+    charge() 는 통과 여부와 함께 OpenAI 와 같은 x-ratelimit-* 헤더를 돌려준다.
+    """
+
+    def __init__(self, rpm: float = None, tpm: float = None):
+        self.limits = {"requests": rpm, "tokens": tpm}
+        self.buckets = {}  # (모델, 종류) -> [남은 양, 갱신 시각]
+
+    def _bucket(self, model: str, kind: str, now: float) -> list:
+        limit = self.limits[kind]
+        bucket = self.buckets.setdefault((model, kind), [limit, now])
+        bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * limit / 60)
+        bucket[1] = now
+        return bucket
+
+    def charge(self, model: str, tokens: int):
+        now = time.monotonic()
+        cost = {"requests": 1, "tokens": tokens}
+        headers, wait = {}, 0.0
+        for kind, limit in self.limits.items():
+            if not limit:
+                continue
+            bucket = self._bucket(model, kind, now)
+            need = min(cost[kind], limit)
+            if bucket[0] < need:
+                wait = max(wait, (need - bucket[0]) * 60 / limit)
+            headers[f"x-ratelimit-limit-{kind}"] = str(int(limit))
+        if wait == 0:
+            for kind, limit in self.limits.items():
+                if limit:
+                    self._bucket(model, kind, now)[0] -= cost[kind]
+        for kind, limit in self.limits.items():
+            if limit:
+                remaining = self._bucket(model, kind, now)[0]
+                headers[f"x-ratelimit-remaining-{kind}"] = str(max(0, int(remaining)))
+                headers[f"x-ratelimit-reset-{kind}"] = f"{max(0.0, (limit - remaining) * 60 / limit):.3f}s"
+        if wait:
+            headers["retry-after"] = str(math.ceil(wait))
+            headers["retry-after-ms"] = str(int(wait * 1000))
+        return wait == 0, headers
+
+
+def _stream_chunks(model: str, content: str, token_delay: float, usage: dict = None, headers: dict = None):
+    """stream=True 요청용 SSE 응답 (몇 글자씩 나눠 전송, usage 가 있으면 마지막에 사용량 chunk)"""
+
+    async def events():
+        for i in range(0, len(content), 8):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[i:i + 8]}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            if token_delay:
+                await asyncio.sleep(token_delay)
+        done = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(done)}\n\n"
+        if usage is not None:
+            yield f"data: {json.dumps({**done, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+def create_app(latency: float = 0.2, responder=default_responder, token_delay: float = 0.0,
+               rpm: float = None, tpm: float = None) -> FastAPI:
+    """
+    OpenAI chat completions 호환 stub 서버.
+    latency 초만큼 대기 후 responder(body) 결과를 응답으로 돌려준다.
+    stream=True 요청에는 첫 토큰까지 latency 를 기다리고 8글자마다 token_delay 씩 나눠 보낸다.
+    rpm/tpm 을 주면 모델별 분당 한도를 넘는 요청에 OpenAI 처럼 429 (retry-after, x-ratelimit-* 헤더) 로 응답한다.
+    """
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.throttled = 0
+    app.state.quota = Quota(rpm, tpm) if rpm or tpm else None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        content = responder(body)
+        usage = _usage(body, content)
+        headers = None
+        if app.state.quota is not None:
+            ok, headers = app.state.quota.charge(body.get("model"), usage["total_tokens"])
+            if not ok:
+                app.state.throttled += 1
+                return JSONResponse({"error": {
+                    "message": f"Rate limit reached for {body.get('model')}", "type": "requests",
+                    "param": None, "code": "rate_limit_exceeded",
+                }}, status_code=429, headers=headers)
+        app.state.calls += 1
+        await asyncio.sleep(latency)
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            return _stream_chunks(body.get("model"), content, token_delay, usage if include_usage else None, headers)
+        return JSONResponse({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }, headers=headers)
+
+    return app
@@ -0,0 +1,21 @@
+import os
+
+import httpx
+import pytest
+
+# app.main 을 import 하는 테스트가 외부 서비스나 /data 에 접근하지 않도록
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("GENERATION_CACHE_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from app.services import gitlab_client  # noqa: E402
+from bench.fake_gitlab import FakeGitLab  # noqa: E402
+
+
+@pytest.fixture
+def fake_gitlab(monkeypatch):
+    """프로세스 안에서 도는 fake GitLab 을 공유 게이트웨이로 사용 (네트워크 없이 ASGI 로 직접 호출)"""
+    fake = FakeGitLab(latency=0.005)
+    gateway = gitlab_client.GitLabGateway(base_url=fake.base_url, transport=httpx.ASGITransport(app=fake.app))
+    monkeypatch.setattr(gitlab_client, "_gateway", gateway)
+    return fake
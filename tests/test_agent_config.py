@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from ruamel.yaml import YAML
+
+from app.services.agent_config import AgentConfigWriter, agent_config_path, is_conflict, merge_agent_config
+from app.services.gitlab_client import GitLabError, get_gateway
+
+AGENT_PROJECT = "infra/agents"
+SESSIONS = 50  # 동시에 같은 Agent 로 온보딩하는 세션 수
+
+
+def granted(fake, agent_name: str) -> list:
+    project = fake.find_project(AGENT_PROJECT)
+    content = project["files"].get(agent_config_path(agent_name), "")
+    return [p["id"] for p in (YAML(typ="safe").load(content) or {}).get("ci_access", {}).get("projects", [])]
+
+
+def test_merge_keeps_existing_entries():
+    content, added = merge_agent_config("ci_access:\n  projects:\n  - id: a/one\n", ["a/one", "a/two"])
+    assert added == ["a/two"]
+    assert [p["id"] for p in YAML(typ="safe").load(content)["ci_access"]["projects"]] == ["a/one", "a/two"]
+
+
+def test_concurrent_grants_through_one_writer_are_not_lost(fake_gitlab):
+    fake_gitlab.add_project(AGENT_PROJECT)
+    paths = [f"team/app{i}" for i in range(SESSIONS)]
+    writer = AgentConfigWriter(flush_window=0.01)
+
+    async def run():
+        async def one(i: int):
+            await asyncio.sleep(0.002 * i)
+            return await writer.grant(AGENT_PROJECT, "shared", [paths[i]], "main")
+        return await asyncio.gather(*(one(i) for i in range(len(paths))))
+
+    results = asyncio.run(run())
+    assert sorted(granted(fake_gitlab, "shared")) == sorted(paths)
+    assert sorted(path for r in results for path in r["added"]) == sorted(paths)
+    # 요청을 모아서 커밋하므로 요청 수보다 커밋이 훨씬 적다
+    assert writer.commits < len(paths)
+    assert not writer._flushes
+
+
+def test_concurrent_grants_from_several_replicas_are_not_lost(fake_gitlab):
+    """레플리카마다 writer 가 따로 있어도 last_commit_id 충돌 재시도로 모든 권한이 남는다"""
+    fake_gitlab.add_project(AGENT_PROJECT)
+    fake_gitlab.latency = 0.01
+    paths = [f"team/app{i}" for i in range(SESSIONS)]
+    writers = [AgentConfigWriter(flush_window=0.005, max_retries=20) for _ in range(4)]
+
+    async def run():
+        async def one(i: int):
+            await asyncio.sleep(0.002 * i)
+            await writers[i % len(writers)].grant(AGENT_PROJECT, "shared", [paths[i]], "main")
+        await asyncio.gather(*(one(i) for i in range(len(paths))))
+
+    asyncio.run(run())
+    assert sorted(granted(fake_gitlab, "shared")) == sorted(paths)
+    assert fake_gitlab.conflicts > 0  # 실제로 레플리카끼리 충돌한 상황을 검증했는지 확인
+    assert sum(writer.commits for writer in writers) < len(paths)
+
+
+@pytest.mark.parametrize("status, message, expected", [
+    (409, "Conflict", True),
+    (400, "You are attempting to update a file that has changed since you started editing it.", True),
+    (400, "A file with this name already exists", True),
+    (400, "A file with this name doesn't exist", True),
+    (400, "branch is invalid", False),
+    (400, "file_path should be a valid file path", False),
+    (403, "403 Forbidden", False),
+])
+def test_is_conflict(status, message, expected):
+    assert is_conflict(GitLabError(status, message)) is expected
+
+
+def test_validation_errors_are_not_retried(fake_gitlab, monkeypatch):
+    fake_gitlab.add_project(AGENT_PROJECT)
+    gateway = get_gateway()
+    calls = []
+
+    async def create_commit(project_id, branch, message, actions):
+        calls.append(actions)
+        raise GitLabError(400, "You can only create or edit files when you are on a branch")
+
+    monkeypatch.setattr(gateway, "create_commit", create_commit)
+    writer = AgentConfigWriter(flush_window=0.0, max_retries=5)
+    with pytest.raises(GitLabError) as exc:
+        asyncio.run(writer.grant(AGENT_PROJECT, "shared", ["team/app"], "missing-branch"))
+    assert "only create or edit" in exc.value.message
+    assert len(calls) == 1 and writer.conflicts == 0
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app import main
+from app.services.gitlab_client import GitLabError, get_gateway
+from app.services.rate_limit import RateLimitTimeout
+from app.services.task_graph import TaskGraphError
+
+STAGES = {
+    "dockerfile_check": "go",
+    "get_deployment_requirements": "외부 노출 필요, 내부 8080 외부 80, CPU 500m 메모리 512Mi, 영속성 필요 없음",
+}
+
+
+def start_session(fake, user_id: str, stage: str) -> dict:
+    project = fake.add_project(f"team/{user_id}")
+    session = {"stage": stage, "project_id": project["id"], "default_branch": "main", "primary_lang": "Python",
+               "agent_path": "test1", "agent_name": "agent", "namespace": "default"}
+    asyncio.run(main.session_store.save(user_id, session))
+    return session
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_llm_rate_limit_inside_task_graph(fake_gitlab, monkeypatch, stage):
+    async def query_gpt(prompt, events=None, **kwargs):
+        raise RateLimitTimeout("openai", "interactive", 4.0)
+
+    monkeypatch.setattr(main, "query_gpt", query_gpt)
+    user_id = f"llm-{stage}"
+    start_session(fake_gitlab, user_id, stage)
+    response = asyncio.run(main.process_chat(main.ChatRequest(user_id=user_id, message=STAGES[stage])))
+    assert response["retry_after"] == 4.0
+    # 단계가 그대로라 같은 메시지를 다시 보내면 이어서 진행된다
+    assert asyncio.run(main.session_store.get(user_id))["stage"] == stage
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_gitlab_rate_limit_inside_task_graph(fake_gitlab, monkeypatch, stage):
+    async def existing_files(project_id, branch, paths):
+        raise GitLabError(429, "Too Many Requests")
+
+    async def query_gpt(prompt, events=None, **kwargs):
+        await asyncio.sleep(1)  # GitLab 쪽 실패가 먼저 나도록
+        return ""
+
+    monkeypatch.setattr(get_gateway(), "existing_files", existing_files)
+    monkeypatch.setattr(main, "query_gpt", query_gpt)
+    user_id = f"gitlab-{stage}"
+    start_session(fake_gitlab, user_id, stage)
+    response = asyncio.run(main.process_chat(main.ChatRequest(user_id=user_id, message=STAGES[stage])))
+    assert response["message"].startswith("GitLab 요청이 많아")
+    assert asyncio.run(main.session_store.get(user_id))["stage"] == stage
+
+
+def test_other_errors_still_raise(fake_gitlab, monkeypatch):
+    async def query_gpt(prompt, events=None, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "query_gpt", query_gpt)
+    start_session(fake_gitlab, "boom", "dockerfile_check")
+    with pytest.raises(TaskGraphError):
+        asyncio.run(main.process_chat(main.ChatRequest(user_id="boom", message="go")))
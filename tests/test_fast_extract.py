@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.fast_extract import classify_dockerfile_answer, classify_yes_no
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("예", {"status": "AGREE"}),
+    ("네, 생성해주세요", {"status": "AGREE"}),
+    ("네 go", {"status": "AGREE"}),
+    ("아니요 Java로 해주세요", {"status": "DISAGREE", "language": "Java"}),
+    ("node.js 기반으로 만들어줘", {"status": "DISAGREE", "language": "Node.js"}),
+    ("go", {"status": "DISAGREE", "language": "Go"}),
+    ("Go 기반으로", {"status": "DISAGREE", "language": "Go"}),
+    ("go로 해줘", {"status": "DISAGREE", "language": "Go"}),
+    (".net", {"status": "DISAGREE", "language": "C#"}),
+    ("C#(.NET) 기반으로", {"status": "DISAGREE", "language": "C#"}),
+    ("node.js.", {"status": "DISAGREE", "language": "Node.js"}),
+    ("python.", {"status": "DISAGREE", "language": "Python"}),
+    ("안녕하세요 python으로 해주세요", {"status": "DISAGREE", "language": "Python"}),
+])
+def test_dockerfile_answer_fast_path(message, expected):
+    extraction = classify_dockerfile_answer(message)
+    assert extraction.confident
+    assert extraction.value == expected
+
+
+@pytest.mark.parametrize("message", [
+    "go ahead",
+    "let's go",
+    "그래 python 말고",
+    "python말고 java",
+    "not python",
+    "java 대신 go로",
+    "no problem",
+    "python 안 해",
+    "파이썬으로 하지 마",
+    "파이썬으로 하지마세요",
+    "java는 싫어요",
+    "node.js 쓰지 않을래요",
+    "자바 못 써요",
+    "python 안해",
+])
+def test_dockerfile_answer_falls_back_to_llm(message):
+    assert not classify_dockerfile_answer(message).confident
+
+
+def test_lone_no_in_phrase_is_not_confident():
+    assert classify_yes_no("no").confident
+    assert not classify_yes_no("no problem").confident
+    assert classify_yes_no("아니요 안해요").value == "DISAGREE"
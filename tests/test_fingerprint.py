@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from app.services.fingerprint import detect, python_version
+
+
+def node(package):
+    return detect({"package.json", "index.js"}, {"package.json": json.dumps(package)})
+
+
+@pytest.mark.parametrize("package", [
+    {"dependencies": None},
+    {"devDependencies": ["express"], "dependencies": "express"},
+    {"engines": "node >= 18"},
+    {"engines": {"node": 18}},
+    {"scripts": {"start": ["x"]}},
+    {"scripts": ["start"]},
+    {"packageManager": 8},
+    {"main": ["index.js"]},
+])
+def test_malformed_package_json(package):
+    fp = node(package)
+    assert fp.language == "Node.js"
+    assert fp.version == "20" and fp.port == 3000
+    assert fp.command == ["node", "index.js"]
+
+
+def test_package_json_that_is_not_an_object():
+    fp = detect({"package.json"}, {"package.json": "[1, 2]"})
+    assert fp.runtime == "node" and not fp.command
+
+
+@pytest.mark.parametrize("pyproject", [
+    '[project]\ndependencies = "fastapi"\n',
+    '[project]\ndependencies = ["fastapi", 1]\nrequires-python = 3\n',
+    'project = "x"\ntool = "poetry"\n',
+    '[tool]\npoetry = 1\n',
+    '[tool.poetry]\ndependencies = ["fastapi"]\n',
+    'not = toml = at all',
+])
+def test_malformed_pyproject(pyproject):
+    fp = detect({"pyproject.toml", "main.py"}, {"pyproject.toml": pyproject})
+    assert fp.language == "Python" and fp.version == "3.12"
+
+
+def test_well_formed_manifests_still_detected():
+    fp = node({"dependencies": {"express": "^4"}, "engines": {"node": "18.x"},
+               "scripts": {"start": "node server.js --port 8080"}, "packageManager": "pnpm@8"})
+    assert (fp.framework, fp.version, fp.port, fp.package_manager) == ("express", "18", 8080, "pnpm")
+    pyproject = '[tool.poetry.dependencies]\npython = "~3.11"\nfastapi = "*"\n'
+    fp = detect({"pyproject.toml", "main.py"}, {"pyproject.toml": pyproject})
+    assert (fp.framework, fp.version) == ("fastapi", "3.11")
+
+
+@pytest.mark.parametrize("spec, expected", [
+    (">=3.8", "3.12"),
+    ("==3.10.4", "3.10"),
+    ("3.11.*", "3.11"),
+    ("^3.10", "3.12"),
+    (">=3.8,<3.11", "3.8"),
+    (">=3.8,<=3.12", "3.12"),
+    (">=3.8,<3.12.1", "3.12"),
+    (">=3.8,<3.12", "3.8"),
+    (">=3.8, !=3.9.*", "3.12"),
+    (">=3.8,<3.11,!=3.8.*", "3.9"),
+    (">=3.12,!=3.12.*", "3.13"),
+    (">=3.12,!=3.12.1", "3.12"),
+    ({"version": ">=3.9,<=3.12"}, "3.12"),
+    ("<3", None),
+    (None, None),
+])
+def test_python_version(spec, expected):
+    assert python_version(spec) == expected
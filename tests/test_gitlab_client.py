@@ -0,0 +1,127 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import gitlab_client
+from app.services.gitlab_client import GitLabError, GitLabGateway, get_gateway
+
+def test_project_files_and_languages(fake_gitlab):
+    project = fake_gitlab.add_project("group/sub/app", files={"Dockerfile": "FROM python:3.12\n", "app/main.py": ""},
+                                      languages={"Python": 90.0, "Shell": 10.0})
+
+    async def run():
+        gateway = get_gateway()
+        by_path = await gateway.get_project("group/sub/app")
+        by_id = await gateway.get_project(project["id"])
+        requests = fake_gitlab.requests
+        assert await gateway.get_project("group/sub/app") is by_path  # 캐시
+        assert fake_gitlab.requests == requests
+        dockerfile = await gateway.get_file(project["id"], "Dockerfile", "main")
+        return (by_path, by_id, dockerfile, await gateway.get_file(project["id"], "missing.txt", "main"),
+                await gateway.file_exists(project["id"], "app/main.py", "main"),
+                await gateway.file_exists(project["id"], "app/other.py", "main"),
+                await gateway.get_languages(project["id"]))
+
+    by_path, by_id, dockerfile, missing, exists, other, languages = asyncio.run(run())
+    assert by_path["id"] == by_id["id"] == project["id"]
+    assert dockerfile["text"] == "FROM python:3.12\n"
+    assert missing is None
+    assert exists and not other
+    assert languages == {"Python": 90.0, "Shell": 10.0}
+
+
+def test_unknown_project_raises_gitlab_error(fake_gitlab):
+    with pytest.raises(GitLabError) as exc:
+        asyncio.run(get_gateway().get_project("nobody/nothing"))
+    assert exc.value.status_code == 404
+
+
+def test_concurrent_requests_are_bounded(fake_gitlab, monkeypatch):
+    """느린 GitLab 에서도 동시 요청 수는 max_concurrency 를 넘지 않고, 그 안에서는 병렬로 처리된다"""
+    fake_gitlab.latency = 0.02
+    project = fake_gitlab.add_project("team/app")
+    in_flight = [0, 0]  # 현재, 최대
+
+    async def counting_app(scope, receive, send):
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        try:
+            await fake_gitlab.app(scope, receive, send)
+        finally:
+            in_flight[0] -= 1
+
+    gateway = GitLabGateway(base_url=fake_gitlab.base_url, max_concurrency=3,
+                            transport=httpx.ASGITransport(app=counting_app))
+    monkeypatch.setattr(gitlab_client, "_gateway", gateway)
+
+    async def run():
+        await asyncio.gather(*(gateway.get_file(project["id"], f"f{i}.txt", "main") for i in range(12)))
+
+    asyncio.run(run())
+    assert in_flight[1] == 3
+
+
+def test_commit_file_wrapper(fake_gitlab):
+    from app import main
+
+    project = fake_gitlab.add_project("team/app")
+
+    async def run():
+        first = await main.commit_file(project["id"], "Dockerfile", "FROM scratch\n", "add")
+        again = await main.commit_file(project["id"], "Dockerfile", "FROM scratch\n", "add again")
+        changed = await main.commit_file(project["id"], "Dockerfile", "FROM alpine\n", "change")
+        return first, again, changed
+
+    assert asyncio.run(run()) == ("created", "unchanged", "updated")
+    assert project["files"]["Dockerfile"] == "FROM alpine\n"
+    assert len(fake_gitlab.commits) == 2
+
+
+V1 = "apiVersion: v1\nkind: Service\nmetadata:\n  name: v1\n"
+V2 = "apiVersion: v1\nkind: Service\nmetadata:\n  name: v2\n"
+
+
+def external_commit(fake, project_id, path: str, content: str):
+    """게이트웨이 캐시를 거치지 않는 다른 클라이언트(사용자, 다른 레플리카)의 커밋"""
+    async def post():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app), base_url=fake.base_url) as client:
+            response = await client.post(f"/api/v4/projects/{project_id}/repository/commits", json={
+                "branch": "main", "commit_message": "edit",
+                "actions": [{"action": "update", "file_path": path, "content": content}],
+            })
+            assert response.status_code == 201
+    return post()
+
+
+def test_commit_sees_external_edits(fake_gitlab):
+    project = fake_gitlab.add_project("team/app")
+
+    async def run():
+        gateway = get_gateway()
+        first = await gateway.commit_files(project["id"], "main", {"kubernetes/service.yaml": V1}, "v1")
+        await external_commit(fake_gitlab, project["id"], "kubernetes/service.yaml", V2)
+        # 트리 캐시가 브랜치 이름으로 남아 있었다면 V1 그대로라고 판단해 커밋하지 않았다
+        second = await gateway.commit_files(project["id"], "main", {"kubernetes/service.yaml": V1}, "v1 again")
+        third = await gateway.commit_files(project["id"], "main", {"kubernetes/service.yaml": V1}, "no-op")
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == {"kubernetes/service.yaml": "created"}
+    assert second == {"kubernetes/service.yaml": "updated"}
+    assert third == {"kubernetes/service.yaml": "unchanged"}
+    assert project["files"]["kubernetes/service.yaml"] == V1
+
+
+def test_update_refuses_to_overwrite_a_newer_file(fake_gitlab, monkeypatch):
+    project = fake_gitlab.add_project("team/app", files={"kubernetes/service.yaml": V1})
+    gateway = get_gateway()
+
+    async def stale_last_commit(project_id, file_path, ref):
+        return "f" * 40  # 비교한 뒤 다른 곳에서 파일이 바뀐 상황
+
+    monkeypatch.setattr(gateway, "last_commit_id", stale_last_commit)
+    with pytest.raises(GitLabError) as exc:
+        asyncio.run(gateway.commit_files(project["id"], "main", {"kubernetes/service.yaml": V2}, "v2"))
+    assert exc.value.status_code == 400
+    assert project["files"]["kubernetes/service.yaml"] == V1
@@ -0,0 +1,38 @@
+import pytest
+
+from app.services.intent_engine import IntentCache, has_negation, normalize
+
+DEPLOY = {"action_type": "cicd", "command": "deploy_repo", "summary": "레포 배포", "confidence": 0.9}
+
+
+@pytest.mark.parametrize("text", [
+    "do not deploy this repository with gitlab ci pipeline",
+    "don't deploy this repository",
+    "이 레포 배포하지 마세요",
+    "배포는 하지말고 테스트 서버만",
+    "이 레포는 배포 안 해요",
+])
+def test_negated_text_is_not_a_near_match(text):
+    cache = IntentCache(min_similarity=0.75)
+    cache.store(normalize("please deploy this repository with gitlab ci pipeline"), DEPLOY)
+    cache.store(normalize("이 레포 배포해 주세요"), DEPLOY)
+    cache.store(normalize("배포는 하고 테스트 서버도"), DEPLOY)
+    cache.store(normalize("이 레포는 배포 해요"), DEPLOY)
+    assert has_negation(normalize(text))
+    assert cache.lookup(normalize(text)) == (None, 0.0)
+
+
+def test_negated_entries_are_reused_only_verbatim():
+    cache = IntentCache(min_similarity=0.75)
+    negated = normalize("do not deploy this repository with gitlab ci pipeline")
+    cache.store(negated, {**DEPLOY, "command": "unknown"})
+    assert cache.lookup(negated)[1] == 1.0
+    assert cache.lookup(normalize("now deploy this repository with gitlab ci pipeline")) == (None, 0.0)
+
+
+def test_near_match_still_works_without_negation():
+    cache = IntentCache(min_similarity=0.75)
+    cache.store(normalize("please deploy this repository with gitlab ci pipeline"), DEPLOY)
+    result, similarity = cache.lookup(normalize("please deploy this repository with the gitlab ci pipeline"))
+    assert result == DEPLOY and 0.75 <= similarity < 1.0
+    assert not has_negation(normalize("https://gitlab.com/a/b 레포를 배포해줘 know notes"))
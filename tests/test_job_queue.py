@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import job_queue
+from app.services.job_queue import JobQueue, JobWorkers, RetryLater
+
+
+def test_retry_later_requeues_the_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_DELAY", 0.2)
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RetryLater(0.0, "rate limited")
+        return {"ok": True}
+
+    async def run():
+        workers = JobWorkers(queue, {"chat": handler}, size=0)
+        job = await queue.enqueue("chat", {"message": "hi"}, "u1")
+        await queue.enqueue("chat", {"message": "next"}, "u1")
+
+        await workers._execute(await queue.claim(workers.owner))
+        assert (await queue.get(job["id"]))["status"] == "queued"
+        # 재시도 대기 중에는 그 작업도, 같은 사용자의 뒤 작업도 가져가지 않는다
+        assert await queue.claim(workers.owner) is None
+
+        await asyncio.sleep(0.25)
+        claimed = await queue.claim(workers.owner)
+        assert claimed["id"] == job["id"] and claimed["attempts"] == 2
+        await workers._execute(claimed)
+        done = await queue.get(job["id"])
+        await queue.aclose()
+        return done
+
+    done = asyncio.run(run())
+    assert done["status"] == "done" and done["result"] == {"ok": True}
+    assert calls == [{"message": "hi"}, {"message": "hi"}]
+
+
+def test_background_chat_requires_shared_session_store():
+    from app import main
+
+    async def post():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/ci/chat", json={"user_id": "u1", "message": "hi", "background": True})
+
+    assert not main.session_store.shared
+    response = asyncio.run(post())
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("wrapped", [False, True])
+def test_rate_limited_chat_job_is_retried(monkeypatch, wrapped):
+    from app import main
+    from app.services.rate_limit import RateLimitTimeout
+    from app.services.task_graph import TaskGraphError
+
+    async def run_stage(req, events=None):
+        error = RateLimitTimeout("openai", "interactive", 12.0)
+        raise TaskGraphError("dockerfile_check", {"dockerfile": error}) if wrapped else error
+
+    monkeypatch.setattr(main, "run_stage", run_stage)
+    with pytest.raises(RetryLater) as exc:
+        asyncio.run(main.run_chat_job({"user_id": "u1", "message": "hi"}))
+    assert exc.value.delay == 12.0
@@ -0,0 +1,95 @@
+import pytest
+
+from app.services.manifest_diff import blob_sha, same_content
+
+DEPLOYMENT = """\
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: web
+  labels:
+    app: web
+spec:
+  replicas: 2
+"""
+
+
+def test_blob_sha_matches_git():
+    # git hash-object 와 같은 값
+    assert blob_sha("") == "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"
+    assert blob_sha("hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+@pytest.mark.parametrize("new", [
+    # 키 순서
+    "kind: Deployment\napiVersion: apps/v1\nspec:\n  replicas: 2\nmetadata:\n  labels:\n    app: web\n  name: web\n",
+    # 따옴표, 들여쓰기
+    'apiVersion: "apps/v1"\nkind: \'Deployment\'\nmetadata:\n    name: "web"\n    labels: {app: web}\nspec:\n    replicas: 2\n',
+    # 주석만 추가
+    "# generated\n" + DEPLOYMENT.replace("replicas: 2", "replicas: 2  # HPA 가 조정"),
+])
+def test_yaml_formatting_only_changes_are_same(new):
+    assert same_content("k8s/deployment.yaml", DEPLOYMENT, new)
+
+
+@pytest.mark.parametrize("new", [
+    DEPLOYMENT.replace("replicas: 2", "replicas: 3"),
+    DEPLOYMENT.replace("replicas: 2", 'replicas: "2"'),  # 숫자와 문자열은 다르다
+    DEPLOYMENT + "  paused: true\n",
+])
+def test_yaml_value_changes_are_different(new):
+    assert not same_content("k8s/deployment.yml", DEPLOYMENT, new)
+
+
+def test_multi_document_yaml():
+    service = "apiVersion: v1\nkind: Service\nmetadata:\n  name: web\n"
+    old = DEPLOYMENT + "---\n" + service
+    assert same_content("k8s/app.yaml", old, "---\n" + DEPLOYMENT + "---\n" + service.replace("  name: web", '  name: "web"'))
+    # 문서 순서나 개수가 달라지면 다른 파일
+    assert not same_content("k8s/app.yaml", old, service + "---\n" + DEPLOYMENT)
+    assert not same_content("k8s/app.yaml", old, DEPLOYMENT)
+
+
+@pytest.mark.parametrize("old, new", [
+    (DEPLOYMENT, "spec: [replicas: 2\n"),
+    ("spec: {replicas: 2\n", DEPLOYMENT),
+    ("a: 1\na: 2\n", "a: 2\n"),  # 중복 키
+])
+def test_invalid_yaml_is_treated_as_changed(old, new):
+    assert same_content("values.yaml", old, new) is False
+
+
+DOCKERFILE = """\
+# syntax=docker/dockerfile:1
+FROM python:3.11-slim
+WORKDIR /app
+RUN apt-get update && apt-get install -y curl && rm -rf /var/lib/apt/lists/*
+CMD ["python", "main.py"]
+"""
+
+
+@pytest.mark.parametrize("new", [
+    DOCKERFILE.replace("&& apt-get install", "\\\n    && apt-get install").replace("&& rm", "\\\n    && rm"),
+    DOCKERFILE.replace("&& apt-get install", "\\   \n    && apt-get install"),  # \ 뒤 공백
+    DOCKERFILE.replace("&& apt-get install", "\\\n    # 캐시 정리\n\n    && apt-get install"),  # 이어지는 줄 사이 주석/빈 줄
+    DOCKERFILE.replace("\n", "\r\n"),
+    DOCKERFILE.replace("WORKDIR /app", "# 작업 디렉터리\n\nworkdir   /app   "),
+])
+def test_dockerfile_formatting_only_changes_are_same(new):
+    assert same_content("Dockerfile", DOCKERFILE, new)
+    assert same_content("docker/api.Dockerfile", DOCKERFILE, new)
+
+
+@pytest.mark.parametrize("new", [
+    DOCKERFILE.replace("python:3.11-slim", "python:3.12-slim"),
+    DOCKERFILE.replace("# syntax=docker/dockerfile:1", "# syntax=docker/dockerfile:1.7"),  # parser directive
+    DOCKERFILE.replace("RUN apt-get update && ", "RUN apt-get update\nRUN "),
+])
+def test_dockerfile_instruction_changes_are_different(new):
+    assert not same_content("Dockerfile", DOCKERFILE, new)
+
+
+def test_other_files_compare_bytes():
+    assert same_content("README.md", "a\n", "a\n")
+    assert not same_content("README.md", "a\n", "a \n")
+    assert not same_content("Dockerfile.md", DOCKERFILE, DOCKERFILE.replace("WORKDIR", "workdir"))
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from ruamel.yaml import YAML
+
+from app.models.deploy_models import DeploymentSpec
+from app.services.fingerprint import detect
+from app.services.manifest_renderer import render_dockerfile, render_gitlab_ci, render_manifests
+from app.services.manifest_validation import validate_manifests
+
+yaml = YAML(typ="safe", pure=True)
+
+
+@pytest.mark.parametrize("app_name, expected_name", [
+    ("app", "app"),
+    ("My_App.v2", "my-app-v2"),
+    ("--Weird__Name--", "weird-name"),
+    ("x" * 80, "x" * 63),
+    ("___", "app"),
+])
+def test_manifests_round_trip(app_name, expected_name):
+    spec = DeploymentSpec(
+        app_name=app_name, namespace="prod-1", expose=True, cpu="0.5", memory="1Gi", replicas=3,
+        persistence=True, storage_size="5Gi", mount_path="/var/lib/data dir: #1",
+    )
+    manifests = render_manifests(spec)
+    assert validate_manifests(manifests) == {}
+
+    deployment = yaml.load(manifests["deployment"])
+    assert deployment["metadata"] == {"name": expected_name, "namespace": "prod-1", "labels": {"app": expected_name}}
+    assert deployment["spec"]["replicas"] == 3
+    container = deployment["spec"]["template"]["spec"]["containers"][0]
+    assert container["image"] == "$CI_REGISTRY_IMAGE:$CI_COMMIT_SHORT_SHA"
+    assert container["ports"] == [{"containerPort": 8080}]
+    assert container["resources"]["limits"] == {"cpu": "0.5", "memory": "1Gi"}
+    assert container["volumeMounts"][0]["mountPath"] == "/var/lib/data dir: #1"
+
+    service = yaml.load(manifests["service"])
+    assert service["spec"]["type"] == "LoadBalancer"
+    assert service["spec"]["selector"] == {"app": expected_name}
+    assert service["spec"]["ports"][0]["port"] == 80 and service["spec"]["ports"][0]["targetPort"] == 8080
+
+    pvc = yaml.load(manifests["pvc"])
+    assert pvc["metadata"]["name"] == f"{expected_name}-data"
+    assert pvc["spec"]["resources"]["requests"]["storage"] == "5Gi"
+
+
+def test_minimal_manifests_round_trip():
+    manifests = render_manifests(DeploymentSpec(app_name="app"))
+    assert manifests["pvc"] == ""
+    assert validate_manifests(manifests) == {}
+    container = yaml.load(manifests["deployment"])["spec"]["template"]["spec"]["containers"][0]
+    assert "resources" not in container and "volumeMounts" not in container
+    assert yaml.load(manifests["service"])["spec"]["type"] == "ClusterIP"
+
+
+@pytest.mark.parametrize("branch", [
+    "main",
+    "feature/login-v2",
+    "release/1.0",
+    "it's-#1",
+    'say-"hi"',
+    "{braces}&!%@",
+    "한글-브랜치",
+])
+@pytest.mark.parametrize("agent_path, agent_name", [
+    ("test1", "my-agent"),
+    ("group/sub.group/agents", "a"),
+])
+def test_gitlab_ci_round_trip(branch, agent_path, agent_name):
+    ci = yaml.load(render_gitlab_ci(agent_path, agent_name, branch))
+    assert ci["stages"] == ["build", "deploy"]
+    assert ci["variables"]["KUBE_CONTEXT"] == f"{agent_path}:{agent_name}"
+    for job in ("build", "deploy"):
+        rule = ci[job]["rules"][0]["if"]
+        prefix = "$CI_COMMIT_BRANCH == "
+        assert rule.startswith(prefix)
+        # GitLab CI 의 rules:if 는 큰따옴표 문자열을 JSON 과 같은 방식으로 해석한다
+        assert yaml.load(rule[len(prefix):]) == branch
+
+
+@pytest.mark.parametrize("manager, lockfile", [("pnpm", "pnpm-lock.yaml"), ("yarn", "yarn.lock")])
+def test_node_dockerfile_without_lockfile(manager, lockfile):
+    package = json.dumps({"packageManager": f"{manager}@8", "scripts": {"start": "node index.js"}})
+    fp = detect({"package.json", "index.js"}, {"package.json": package})
+    assert fp.package_manager == manager and fp.lockfile is None
+    dockerfile = render_dockerfile(fp)
+    assert lockfile not in dockerfile and "--frozen-lockfile" not in dockerfile
+    assert f"RUN {manager} install\n" in dockerfile
+
+    locked = detect({"package.json", "index.js", lockfile}, {"package.json": package})
+    assert f"COPY package.json {lockfile} ./" in render_dockerfile(locked)
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.models.deploy_models import DeploymentSpec
+from app.services import onboarding
+from app.services.gitlab_client import GitLabError, get_gateway
+from app.services.task_graph import TaskGraph, TaskGraphError
+
+
+class FailingEngine:
+    def __init__(self, *errors):
+        self.errors = errors
+
+    async def fingerprint(self, project_id, branch):
+        graph = TaskGraph("fingerprint")
+        for i, error in enumerate(self.errors):
+            graph.add(f"step{i}", lambda error=error: self._raise(error))
+        return await graph.run()
+
+    @staticmethod
+    async def _raise(error):
+        raise error
+
+
+def test_detect_stack_falls_back_when_fingerprint_graph_fails(monkeypatch):
+    monkeypatch.setattr(onboarding, "get_fingerprint_engine", lambda: FailingEngine(GitLabError(502, "Bad Gateway")))
+
+    async def languages(project_id):
+        return {"Go": 80.0, "Shell": 20.0}
+
+    monkeypatch.setattr(onboarding, "project_languages", languages)
+    fp = asyncio.run(onboarding.detect_stack(1, "main"))
+    assert fp.language == "Go"
+
+
+def test_fingerprint_project_keeps_non_gitlab_errors(monkeypatch):
+    engine = FailingEngine(GitLabError(500, "Internal Server Error"), RuntimeError("bug"))
+    monkeypatch.setattr(onboarding, "get_fingerprint_engine", lambda: engine)
+    with pytest.raises(TaskGraphError):
+        asyncio.run(onboarding.fingerprint_project(1, "main"))
+
+
+def test_turning_persistence_off_deletes_the_pvc(fake_gitlab):
+    project = fake_gitlab.add_project("team/app", files={"kubernetes/ingress.yaml": "kind: Ingress\n"})
+    gateway = get_gateway()
+
+    async def deploy(persistence: bool):
+        files = onboarding.render_deployment_manifests(DeploymentSpec(app_name="app", persistence=persistence))
+        return await gateway.commit_files(project["id"], "main", files, "deploy",
+                                          delete=onboarding.stale_manifests(files))
+
+    first = asyncio.run(deploy(True))
+    assert first["kubernetes/pvc.yaml"] == "created"
+    second = asyncio.run(deploy(False))
+    assert second == {"kubernetes/deployment.yaml": "updated", "kubernetes/service.yaml": "unchanged",
+                      "kubernetes/pvc.yaml": "deleted"}
+    assert "kubernetes/pvc.yaml" not in project["files"]
+    assert "kubernetes/ingress.yaml" in project["files"]  # 직접 추가한 Manifest 는 건드리지 않는다
+    # 이미 없으면 삭제할 것도 없다
+    assert "kubernetes/pvc.yaml" not in asyncio.run(deploy(False))
+
+
+def test_fingerprint_project_survives_unexpected_manifest_shapes(monkeypatch):
+    class BrokenEngine:
+        async def fingerprint(self, project_id, branch):
+            raise TypeError("'NoneType' object is not a mapping")
+
+    monkeypatch.setattr(onboarding, "get_fingerprint_engine", lambda: BrokenEngine())
+    assert asyncio.run(onboarding.fingerprint_project(1, "main")).language is None
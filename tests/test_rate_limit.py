@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import rate_limit
+from app.services.rate_limit import RateLimiter, RateLimitTimeout, TokenBucket, gitlab_headers, openai_headers
+
+
+def test_bucket_refills_at_the_configured_rate():
+    bucket = TokenBucket(60)  # 초당 1개
+    now = bucket.updated
+    bucket.take(60, now)
+    assert bucket.delay(1, now) == pytest.approx(1.0)
+    assert bucket.delay(1, now + 0.5) == pytest.approx(0.5)
+    assert bucket.delay(1, now + 1.0) == 0.0
+    bucket.take(1, now + 1.0)
+    # 오래 쉬어도 capacity 이상으로는 쌓이지 않는다
+    assert bucket.delay(60, now + 3600) == 0.0
+    bucket._refill(now + 7200)
+    assert bucket.tokens == 60
+    # 한도보다 큰 요청은 버킷이 가득 차 있으면 통과
+    assert bucket.delay(500, now + 7200) == 0.0
+
+
+def test_bucket_observe_clamps_to_server_headers():
+    bucket = TokenBucket(100)
+    now = bucket.updated
+    bucket.observe(None, 10, now)
+    assert bucket.tokens == 10
+    bucket.observe(None, 50, now)  # 서버가 더 많이 남았다고 해도 어림값을 늘리지 않는다
+    assert bucket.tokens == 10
+    bucket.observe(20, None, now)
+    assert bucket.capacity == 20 and bucket.tokens == 10
+    bucket.observe(5, None, now)
+    assert bucket.capacity == 5 and bucket.tokens == 5
+
+
+def test_header_parsing():
+    assert openai_headers({"x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-tokens": "1200",
+                           "retry-after-ms": "1500"}) == {
+        "limit_requests": 500.0, "remaining_requests": None, "limit_tokens": None, "remaining_tokens": 1200.0,
+        "retry_after": 1.5,
+    }
+    assert gitlab_headers({"ratelimit-limit": "600", "ratelimit-remaining": "x", "retry-after": "3"}) == {
+        "limit_requests": 600.0, "remaining_requests": None, "retry_after": 3.0,
+    }
+
+
+def test_interactive_lane_goes_before_batch():
+    limiter = RateLimiter("test", rpm=600)  # 0.1초에 1개
+    limiter.requests.tokens = 0
+    order = []
+
+    async def call(lane_name: str):
+        await limiter.acquire(lane_name=lane_name)
+        order.append(lane_name)
+
+    async def run():
+        batch = [asyncio.ensure_future(call("batch")) for _ in range(2)]
+        await asyncio.sleep(0.01)  # batch 가 먼저 줄을 선 뒤에
+        interactive = asyncio.ensure_future(call("interactive"))
+        generation = asyncio.ensure_future(call("generation"))
+        await asyncio.gather(*batch, interactive, generation)
+
+    asyncio.run(run())
+    assert order == ["interactive", "generation", "batch", "batch"]
+
+
+def test_deadline_expiry_raises_rate_limit_timeout():
+    limiter = RateLimiter("test", rpm=60)
+    limiter.requests.tokens = 0
+
+    async def run():
+        start = time.monotonic()
+        with pytest.raises(RateLimitTimeout) as exc:
+            await limiter.acquire(lane_name="batch", deadline=time.monotonic() + 0.1)
+        return time.monotonic() - start, exc.value
+
+    elapsed, error = asyncio.run(run())
+    # 마감 전에 한도가 생길 수 없으면 기다리지 않고 바로 실패한다
+    assert elapsed < 0.05
+    assert error.upstream == "test" and error.lane == "batch"
+    assert error.retry_after == pytest.approx(1.0, abs=0.05)
+    assert limiter.counts["timeouts"] == 1 and not limiter._waiters
+
+
+def test_queued_waiter_times_out_and_leaves_the_queue():
+    limiter = RateLimiter("test", rpm=60)
+    limiter.requests.tokens = 0
+
+    async def run():
+        first = asyncio.ensure_future(limiter.acquire(deadline=time.monotonic() + 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire(deadline=time.monotonic() + 0.05)
+        assert len(limiter._waiters) == 1
+        await first
+
+    asyncio.run(run())
+    assert limiter.counts["acquired"] == 1
+
+
+def test_throttled_pauses_for_retry_after(monkeypatch):
+    limiter = RateLimiter("test", rpm=6000)
+
+    async def run():
+        limiter.throttled(retry_after=0.2, remaining_requests=100)
+        start = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.19
+    assert limiter.counts["throttled"] == 1
+
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_RETRY_AFTER", 5.0)
+    limiter.throttled()  # Retry-After 가 없으면 기본 시간만큼 멈춘다
+    with pytest.raises(RateLimitTimeout) as exc:
+        asyncio.run(limiter.acquire(deadline=time.monotonic() + 1))
+    assert exc.value.retry_after == pytest.approx(5.0, abs=0.1)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import session_store
+from app.services.session_store import MemorySessionStore, SessionLockTimeout, SessionStore, SQLiteSessionStore
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+    class NoLock(SessionStore):
+        async def get(self, user_id):
+            return None
+
+        async def save(self, user_id, session):
+            pass
+
+        async def delete(self, user_id):
+            pass
+
+    with pytest.raises(TypeError):
+        NoLock()
+    assert not MemorySessionStore().shared and SQLiteSessionStore(":memory:").shared
+
+
+def test_sqlite_round_trip(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+
+    async def run():
+        await store.save("u1", {"stage": "intent", "이름": "앱"})
+        loaded = await store.get("u1")
+        await store.delete("u1")
+        return loaded, await store.get("u1")
+
+    try:
+        assert asyncio.run(run()) == ({"stage": "intent", "이름": "앱"}, None)
+    finally:
+        asyncio.run(store.aclose())
+
+
+def test_lock_lease_is_renewed_while_held(tmp_path, monkeypatch):
+    """lease 보다 오래 걸리는 단계 처리 중에도 다른 레플리카가 잠금을 가져가지 못한다"""
+    monkeypatch.setattr(session_store, "SESSION_LOCK_TIMEOUT", 0.6)
+    path = str(tmp_path / "sessions.db")
+    holder, other = SQLiteSessionStore(path, lease=0.3), SQLiteSessionStore(path, lease=0.3)
+    events = []
+
+    async def hold():
+        async with holder.lock("u1"):
+            events.append("held")
+            await asyncio.sleep(1.0)  # lease 의 3배 이상
+        events.append("released")
+
+    async def contend():
+        await asyncio.sleep(0.05)
+        with pytest.raises(SessionLockTimeout):
+            async with other.lock("u1"):
+                pass
+        events.append("timed_out")
+        start = time.monotonic()
+        async with other.lock("u1"):
+            events.append("acquired")
+        return time.monotonic() - start
+
+    async def run():
+        _, waited = await asyncio.gather(hold(), contend())
+        return waited
+
+    try:
+        waited = asyncio.run(run())
+    finally:
+        asyncio.run(holder.aclose())
+        asyncio.run(other.aclose())
+    assert events == ["held", "timed_out", "released", "acquired"]
+    assert waited < 0.6
+
+
+def test_lock_of_dead_owner_expires_after_lease(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "SESSION_LOCK_TIMEOUT", 2)
+    path = str(tmp_path / "sessions.db")
+    dead, other = SQLiteSessionStore(path, lease=0.3), SQLiteSessionStore(path, lease=0.3)
+
+    async def run():
+        assert await dead._try_acquire("u1")  # 잠금을 잡은 채 프로세스가 죽어 갱신도 해제도 하지 않음
+        start = time.monotonic()
+        async with other.lock("u1"):
+            return time.monotonic() - start
+
+    try:
+        waited = asyncio.run(run())
+    finally:
+        asyncio.run(dead.aclose())
+        asyncio.run(other.aclose())
+    assert 0.2 < waited < 1.0
@@ -0,0 +1,17 @@
+import pytest
+
+from app.services.telemetry import gitlab_endpoint
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/projects/group%2Fapp", "/projects/:id"),
+    ("/projects/42/languages", "/projects/:id/languages"),
+    ("/projects/42/repository/files/kubernetes%2Fdeployment.yaml", "/projects/:id/repository/files/:path"),
+    ("/projects/42/repository/blobs/" + "a" * 40 + "/raw", "/projects/:id/repository/blobs/:sha/raw"),
+    ("/projects/42/repository/branches/feature%2Flogin", "/projects/:id/repository/branches/:branch"),
+    ("/projects/42/repository/tree", "/projects/:id/repository/tree"),
+    ("/projects/42/repository/commits", "/projects/:id/repository/commits"),
+    ("/version", "/version"),
+])
+def test_gitlab_endpoint_label(path, expected):
+    assert gitlab_endpoint(path) == expected